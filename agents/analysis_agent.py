@@ -4,6 +4,7 @@ from core.models import AnalysisResult, DiscoveryResult
 from tools.ast_parser import ASTParser
 from tools.dependency_analyzer import DependencyAnalyzer
 from tools.traversal_detector import TraversalDetector
+from tools.work_analyzer import WorkAnalyzer
 
 
 class ProgramAnalysisAgent:
@@ -13,20 +14,26 @@ class ProgramAnalysisAgent:
         self.parser = ASTParser()
         self.dependency_analyzer = DependencyAnalyzer()
         self.traversal_detector = TraversalDetector()
+        self.work_analyzer = WorkAnalyzer()
 
     def analyze(self, discovery: DiscoveryResult) -> AnalysisResult:
         artifacts = []
         for candidate in discovery.candidates:
             tree = self.parser.parse_file(candidate.file_path)
-            globals_mutable = self.dependency_analyzer.find_mutable_globals(tree)
+            globals_mutable = self.dependency_analyzer.find_mutable_globals(tree, candidate.function_name)
             shared_vars = self.dependency_analyzer.find_shared_state(tree, candidate.function_name)
+            loop = self.dependency_analyzer.analyze_loop(tree, candidate.function_name)
             safe = self.traversal_detector.is_safe(candidate.traversal_type, shared_vars, globals_mutable)
+            if loop is not None and (loop.carried or loop.attribute_writes):
+                safe = False
             artifacts.append(
                 self.dependency_analyzer.build_artifact(
                     candidate=candidate,
                     shared_state=shared_vars,
                     mutable_globals=globals_mutable,
                     safe=safe,
+                    work_profile=self.work_analyzer.profile(tree, candidate.function_name),
+                    loop_dependence=loop,
                 )
             )
         return AnalysisResult(artifacts=artifacts)
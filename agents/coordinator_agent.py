@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List
 
 from core.models import (
     AnalysisResult,
     DiscoveryResult,
+    ExecutionMetrics,
     ExecutionResult,
     OrchestratorConfig,
     PipelineContext,
+    StrategyDecision,
     StrategyResult,
     TransformationResult,
 )
@@ -17,6 +19,9 @@ from agents.analysis_agent import ProgramAnalysisAgent
 from agents.strategy_agent import ParallelizationStrategyAgent
 from agents.transformation_agent import CodeTransformationAgent
 from agents.execution_agent import ExecutionValidationAgent
+from tools.autotuner import Autotuner
+from tools.checkpoint_store import CheckpointStore
+from tools.stage_profiler import StageProfiler
 
 
 class CoordinatorAgent:
@@ -28,43 +33,204 @@ class CoordinatorAgent:
             target_dir=config.target_dir,
             output_dir=config.output_dir,
         )
+        self.stage_profiler = StageProfiler(trace_memory=config.trace_memory)
+        self.context.stage_stats = self.stage_profiler.stats
         self.discovery_agent = CodeDiscoveryAgent()
         self.analysis_agent = ProgramAnalysisAgent()
-        self.strategy_agent = ParallelizationStrategyAgent()
-        self.transformation_agent = CodeTransformationAgent(output_dir=config.output_dir)
+        self.strategy_agent = ParallelizationStrategyAgent(
+            knowledge_db=config.knowledge_db or config.output_dir / "knowledge.sqlite"
+        )
+        self.transformation_agent = CodeTransformationAgent(
+            output_dir=config.output_dir,
+            memoize=config.memoize,
+            memo_size=config.memo_size,
+            memo_spill_dir=config.memo_spill_dir,
+            reorder=config.reorder,
+        )
         self.execution_agent = ExecutionValidationAgent(
             use_processes=config.use_processes,
             max_workers=config.max_workers,
             timeout_s=config.timeout_s,
+            stage_profiler=self.stage_profiler,
+            repeat=config.repeat,
+            isolate=config.isolate,
+            memory_limit_mb=config.memory_limit_mb,
+            cpu_affinity=config.cpu_affinity,
+            workload_manifest=config.workload_manifest,
         )
+        self.checkpoints = CheckpointStore(config.checkpoint_dir or config.output_dir / ".checkpoints")
+        self._stage_key = ""
 
     def run(self) -> PipelineContext:
         self.context.discovery = self._discover()
         self.context.analysis = self._analyze()
         self.context.strategy = self._plan()
+        if self.config.autotune:
+            self.context.strategy = self._autotune()
         self.context.transformations = self._transform()
         self.context.execution = self._execute()
         return self.context
 
     def _discover(self) -> DiscoveryResult:
-        return self.discovery_agent.discover(self.context.target_dir)
+        target_dir = self.context.target_dir
+        files = self.discovery_agent.scanner.source_files(target_dir)
+        self._stage_key = self.checkpoints.key(
+            "discovery", str(target_dir), self.checkpoints.hash_tree(target_dir, files)
+        )
+        return self._checkpointed(
+            "discovery", self._stage_key, self.discovery_agent, lambda: self.discovery_agent.discover(target_dir)
+        )
 
     def _analyze(self) -> AnalysisResult:
         if not self.context.discovery:
             return AnalysisResult()
-        return self.analysis_agent.analyze(self.context.discovery)
+        # Discovery already hashed every source file, so downstream keys chain off it.
+        self._stage_key = self.checkpoints.key("analysis", self._stage_key)
+        return self._checkpointed(
+            "analysis", self._stage_key, self.analysis_agent, lambda: self.analysis_agent.analyze(self.context.discovery)
+        )
 
     def _plan(self) -> StrategyResult:
         if not self.context.analysis:
             return StrategyResult()
-        return self.strategy_agent.select_strategies(self.context.analysis)
+        # Past runs change what the knowledge base recommends, so its size is part of the key.
+        self._stage_key = self.checkpoints.key("strategy", self._stage_key, self.strategy_agent.kb.revision())
+        return self._checkpointed(
+            "strategy",
+            self._stage_key,
+            self.strategy_agent,
+            lambda: self.strategy_agent.select_strategies(self.context.analysis, self._fixture_sizes()),
+        )
+
+    def _fixture_sizes(self) -> Dict[Path, int]:
+        # Learned history is keyed by graph size class, so each module's GRAPH is sized up front.
+        sizes: Dict[Path, int] = {}
+        for path in {a.candidate.file_path for a in self.context.analysis.artifacts}:
+            summary = self.execution_agent.sandbox.fixture_summary(path)
+            if summary is not None and summary.nodes:
+                sizes[path] = summary.nodes
+        return sizes
+
+    def _autotune(self) -> StrategyResult:
+        if not self.context.strategy:
+            return StrategyResult()
+        tuner = Autotuner(
+            rewriter=self.transformation_agent.rewriter,
+            sandbox=self.execution_agent.sandbox,
+            kb=self.strategy_agent.kb,
+            cache_path=self.config.autotune_cache or self.context.output_dir / "autotune.json",
+        )
+        with self.stage_profiler.measure("autotune", type(tuner).__name__) as record:
+            decisions = [tuner.tune(decision) for decision in self.context.strategy.decisions]
+            record.items = len(decisions)
+        return StrategyResult(decisions=decisions)
 
     def _transform(self) -> List[TransformationResult]:
         if not self.context.strategy:
             return []
-        return self.transformation_agent.rewrite_all(self.context.strategy)
+        groups = self.transformation_agent.group_by_file(self.context.strategy.decisions)
+        return [result for decisions in groups.values() for result in self._transform_file(decisions)]
+
+    def _transform_file(self, decisions: List[StrategyDecision]) -> List[TransformationResult]:
+        # Every candidate of a file lands in one output module, so the file is the unit of work.
+        src_path = decisions[0].candidate.file_path
+        key = self.checkpoints.key(
+            "transformation",
+            [
+                (
+                    d.candidate.function_name,
+                    d.candidate.traversal_type,
+                    d.strategy,
+                    d.granularity,
+                    d.workers,
+                    d.inline_below_nodes,
+                    d.dispatch_cost_s,
+                )
+                for d in decisions
+            ],
+            self.config.memoize,
+            self.config.memo_size,
+            str(self.config.memo_spill_dir or ""),
+            self.config.reorder,
+            self.checkpoints.hash_file(src_path),
+            str(self.context.output_dir),
+        )
+        label = f"transformation:{src_path.name}"
+        with self.stage_profiler.measure(label, type(self.transformation_agent).__name__) as record:
+            record.items = len(decisions)
+            if self.config.resume:
+                cached = self.checkpoints.load("transformation", key)
+                # The rewritten file must still be on disk and untouched for the checkpoint to count.
+                if cached is not None and self.checkpoints.hash_file(cached[0][0].output_file) == cached[1]:
+                    self.context.resumed_stages.append(label)
+                    record.cached = True
+                    return cached[0]
+            results = self.transformation_agent.rewrite_file(decisions)
+            self.checkpoints.save("transformation", key, (results, self.checkpoints.hash_file(results[0].output_file)))
+            return results
 
     def _execute(self) -> ExecutionResult:
         if not self.context.transformations:
             return ExecutionResult()
-        return self.execution_agent.run_all(self.context.transformations)
+        try:
+            return ExecutionResult(
+                metrics=[m for t in self.context.transformations for m in self._execute_one(t)]
+            )
+        finally:
+            self.execution_agent.close()
+            self.strategy_agent.kb.close()
+
+    def _execute_one(self, transformation: TransformationResult) -> List[ExecutionMetrics]:
+        key = self.checkpoints.key(
+            "execution",
+            transformation.candidate.function_name,
+            transformation.parallel_function_name,
+            self.checkpoints.hash_file(transformation.output_file),
+            self.config.max_workers,
+            self.config.use_processes,
+            self.config.timeout_s,
+            self.config.repeat,
+            self.config.isolate,
+            self.config.memory_limit_mb,
+            self.config.cpu_affinity,
+            self.checkpoints.hash_file(self.config.workload_manifest) if self.config.workload_manifest else "",
+        )
+        return self._checkpointed(
+            "execution",
+            key,
+            self.execution_agent,
+            lambda: self._learn(self.execution_agent.run_candidate(transformation)),
+            label=f"execution:{transformation.candidate.function_name}",
+        )
+
+    def _learn(self, metrics: List[ExecutionMetrics]) -> List[ExecutionMetrics]:
+        # Only fresh measurements are recorded; resumed checkpoints were learned from when they ran.
+        if self.context.strategy:
+            self.strategy_agent.learn(self.context.strategy, ExecutionResult(metrics=metrics))
+        return metrics
+
+    def _checkpointed(
+        self, stage: str, key: str, agent: Any, compute: Callable[[], Any], label: str | None = None
+    ) -> Any:
+        label = label or stage
+        with self.stage_profiler.measure(label, type(agent).__name__) as record:
+            result = self.checkpoints.load(stage, key) if self.config.resume else None
+            if result is not None:
+                self.context.resumed_stages.append(label)
+                record.cached = True
+            else:
+                result = compute()
+                self.checkpoints.save(stage, key, result)
+            record.items = self._count_items(result)
+        return result
+
+    def _count_items(self, result: Any) -> int:
+        if isinstance(result, DiscoveryResult):
+            return len(result.candidates)
+        if isinstance(result, AnalysisResult):
+            return len(result.artifacts)
+        if isinstance(result, StrategyResult):
+            return len(result.decisions)
+        if isinstance(result, list):
+            return len(result)
+        return 1
@@ -1,31 +1,131 @@
 from __future__ import annotations
 
+from dataclasses import replace
+from pathlib import Path
 from typing import List
 
-from core.models import ExecutionResult, TransformationResult
+from core.models import ExecutionMetrics, ExecutionResult, GraphSource, TransformationResult, Workload
 from tools.execution_sandbox import ExecutionSandbox
 from tools.correctness_validator import CorrectnessValidator
 from tools.profiler_tool import ProfilerTool
+from tools.stage_profiler import StageProfiler
+from tools.workload_manifest import WorkloadManifest
 
 
 class ExecutionValidationAgent:
     """Runs sequential and parallel versions, validates correctness, and collects metrics."""
 
-    def __init__(self, use_processes: bool, max_workers: int, timeout_s: float | None) -> None:
-        self.sandbox = ExecutionSandbox(use_processes=use_processes, max_workers=max_workers, timeout_s=timeout_s)
+    # Sources for the multi-source check when the manifest has no batched workload.
+    DEFAULT_MULTI_SOURCES = 16
+
+    def __init__(
+        self,
+        use_processes: bool,
+        max_workers: int,
+        timeout_s: float | None,
+        stage_profiler: StageProfiler | None = None,
+        repeat: int = 1,
+        isolate: bool = False,
+        memory_limit_mb: int | None = None,
+        cpu_affinity: List[int] | None = None,
+        workload_manifest: Path | None = None,
+    ) -> None:
+        self.repeat = repeat
+        self.manifest = WorkloadManifest.load(workload_manifest) if workload_manifest else None
+        self.sandbox = ExecutionSandbox(
+            use_processes=use_processes,
+            max_workers=max_workers,
+            timeout_s=timeout_s,
+            stage_profiler=stage_profiler,
+            isolate=isolate,
+            memory_limit_mb=memory_limit_mb,
+            cpu_affinity=cpu_affinity,
+        )
         self.validator = CorrectnessValidator()
         self.profiler = ProfilerTool()
 
     def run_all(self, transformations: List[TransformationResult]) -> ExecutionResult:
-        metrics = []
-        for t in transformations:
-            seq_output, seq_time = self.sandbox.run_function(
-                t.output_file, t.candidate.function_name
-            )
-            par_output, par_time = self.sandbox.run_function(
-                t.output_file, t.parallel_function_name
-            )
-            correct = self.validator.compare_outputs(seq_output, par_output)
-            speedup = self.profiler.compute_speedup(seq_time, par_time)
-            metrics.append(self.profiler.build_metrics(t, seq_time, par_time, speedup, correct))
+        try:
+            metrics = [m for t in transformations for m in self.run_candidate(t)]
+        finally:
+            self.close()
         return ExecutionResult(metrics=metrics)
+
+    def close(self) -> None:
+        self.sandbox.close()
+
+    def run_candidate(self, t: TransformationResult) -> List[ExecutionMetrics]:
+        """Runs every manifest workload for the candidate, or its module fixtures when it has none."""
+        workloads = self.manifest.for_candidate(t.candidate) if self.manifest else []
+        single = [w for w in workloads if not w.batch]
+        batched = [w for w in workloads if w.batch]
+        metrics = [self.run_one(t, workload) for workload in single] if workloads else [self.run_one(t)]
+        if t.cached_function_name:
+            cached = replace(t, parallel_function_name=t.cached_function_name)
+            for workload in single or [None]:
+                if (workload.repetitions if workload and workload.repetitions else self.repeat) < 2:
+                    # A single repetition would only time the cold miss that fills the memo.
+                    continue
+                metric = self.run_one(cached, workload, warm=True)
+                metric.workload = f"{workload.name}, cached" if workload else "cached"
+                metric.variant = "cached"
+                metrics.append(metric)
+        if not t.multi_function_name:
+            # Without a multi-source variant a batched workload is just many single queries.
+            return metrics + [self.run_one(t, replace(w, batch=False)) for w in batched]
+        if not batched:
+            batched = [
+                Workload(
+                    name=f"multi-source x{self.DEFAULT_MULTI_SOURCES}",
+                    candidate=t.candidate.function_name,
+                    graph=GraphSource(kind="module", generator="GRAPH"),
+                    sample_starts=self.DEFAULT_MULTI_SOURCES,
+                    batch=True,
+                )
+            ]
+        return metrics + [self.run_multi(t, workload) for workload in batched]
+
+    def run_multi(self, t: TransformationResult, workload: Workload) -> ExecutionMetrics:
+        """Times the multi-source variant once per source against one call covering every source.
+
+        The variant skips the original's per-node work, so the original only serves as the
+        correctness reference; timing it would credit batching with the skipped work.
+        """
+        repeat = workload.repetitions or self.repeat
+        per_source = replace(workload, batch=False, args=workload.args or ["$graph", "$sources"])
+        ref = self.sandbox.run_function(t.output_file, t.candidate.function_name, 1, replace(workload, batch=False))
+        seq = self.sandbox.run_function(t.output_file, t.multi_function_name, repeat, per_source)
+        par = self.sandbox.run_function(t.output_file, t.multi_function_name, repeat, workload)
+        if ref.outcome != "ok":
+            metrics = self.profiler.build_failed_metrics(t, ref, par, workers=t.multi_workers)
+        elif seq.outcome != "ok" or par.outcome != "ok":
+            metrics = self.profiler.build_failed_metrics(t, seq, par, workers=t.multi_workers)
+        else:
+            if t.candidate.traversal_type == "bfs":
+                hop_depths = self.sandbox.hop_depths(t.output_file, workload)
+                correct = hop_depths is not None and self.validator.compare_bfs_depths(ref.output, par.output, hop_depths)
+            else:
+                correct = self.validator.compare_distance_rows(ref.output, par.output)
+            metrics = self.profiler.build_metrics(t, seq, par, correct, workers=t.multi_workers)
+            sources = len(ref.output)
+            metrics.throughput_qps = sources / metrics.parallel_time_s if metrics.parallel_time_s > 0 else 0.0
+        metrics.workload = workload.name
+        metrics.variant = "multi-source"
+        return metrics
+
+    def run_one(self, t: TransformationResult, workload: Workload | None = None, warm: bool = False) -> ExecutionMetrics:
+        repeat = workload.repetitions if workload and workload.repetitions else self.repeat
+        seq = self.sandbox.run_function(t.output_file, t.candidate.function_name, repeat, workload)
+        # The memo only caches versioned graphs; the fixture is never edited between repetitions.
+        call_kwargs = {"graph_version": 0} if warm else None
+        par = self.sandbox.run_function(t.output_file, t.parallel_function_name, repeat, workload, call_kwargs)
+        if warm and len(par.wall_times_s) > 1:
+            # The first repetition fills the memo; the rest time cached queries.
+            par = replace(par, wall_times_s=par.wall_times_s[1:])
+        if seq.outcome != "ok" or par.outcome != "ok":
+            metrics = self.profiler.build_failed_metrics(t, seq, par, workers=t.workers)
+        else:
+            correct = self.validator.compare_outputs(seq.output, par.output)
+            metrics = self.profiler.build_metrics(t, seq, par, correct, workers=t.workers)
+        metrics.workload = workload.name if workload else ""
+        return metrics
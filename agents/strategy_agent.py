@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from core.models import AnalysisResult, StrategyResult
+from pathlib import Path
+from typing import Dict
+
+from core.models import AnalysisResult, ExecutionResult, StrategyResult
 from tools.knowledge_base import ParallelizationKnowledgeBase
 from tools.strategy_selector import StrategySelector
 
@@ -8,9 +11,17 @@ from tools.strategy_selector import StrategySelector
 class ParallelizationStrategyAgent:
     """Chooses a parallelization approach per traversal candidate."""
 
-    def __init__(self) -> None:
-        self.kb = ParallelizationKnowledgeBase()
+    def __init__(self, knowledge_db: Path | None = None) -> None:
+        self.kb = ParallelizationKnowledgeBase(db_path=knowledge_db)
         self.selector = StrategySelector(self.kb)
 
-    def select_strategies(self, analysis: AnalysisResult) -> StrategyResult:
-        return self.selector.select(analysis)
+    def select_strategies(self, analysis: AnalysisResult, graph_nodes: Dict[Path, int] | None = None) -> StrategyResult:
+        return self.selector.select(analysis, graph_nodes)
+
+    def learn(self, strategy: StrategyResult, execution: ExecutionResult) -> None:
+        decisions = {(d.candidate.file_path, d.candidate.function_name): d for d in strategy.decisions}
+        for metrics in execution.metrics:
+            decision = decisions.get((metrics.candidate.file_path, metrics.candidate.function_name))
+            # Variant rows measure a different function than the one the decision chose.
+            if decision is not None and not metrics.variant:
+                self.kb.record(decision, metrics)
@@ -1,22 +1,47 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
-from core.models import StrategyResult, TransformationResult
+from core.models import StrategyDecision, StrategyResult, TransformationResult
 from tools.code_rewriter import CodeRewriter
 
 
 class CodeTransformationAgent:
     """Rewrites traversal functions into parallelized variants."""
 
-    def __init__(self, output_dir: Path) -> None:
+    def __init__(
+        self,
+        output_dir: Path,
+        memoize: bool = False,
+        memo_size: int = 128,
+        memo_spill_dir: Path | None = None,
+        reorder: str = "none",
+    ) -> None:
         self.output_dir = output_dir
-        self.rewriter = CodeRewriter(output_dir=output_dir)
+        self.rewriter = CodeRewriter(
+            output_dir=output_dir,
+            memoize=memoize,
+            memo_size=memo_size,
+            memo_spill_dir=memo_spill_dir,
+            reorder=reorder,
+        )
 
     def rewrite_all(self, strategy: StrategyResult) -> List[TransformationResult]:
         results: List[TransformationResult] = []
-        for decision in strategy.decisions:
-            result = self.rewriter.rewrite(decision)
-            results.append(result)
+        for decisions in self.group_by_file(strategy.decisions).values():
+            results.extend(self.rewrite_file(decisions))
         return results
+
+    def rewrite(self, decision: StrategyDecision) -> TransformationResult:
+        return self.rewriter.rewrite(decision)
+
+    def rewrite_file(self, decisions: List[StrategyDecision]) -> List[TransformationResult]:
+        return self.rewriter.rewrite_file(decisions)
+
+    def group_by_file(self, decisions: List[StrategyDecision]) -> Dict[Path, List[StrategyDecision]]:
+        # Candidates of one source file share an output module, so they are rewritten together.
+        groups: Dict[Path, List[StrategyDecision]] = {}
+        for decision in decisions:
+            groups.setdefault(decision.candidate.file_path, []).append(decision)
+        return groups
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from tools.benchmark_suite import BenchmarkSuite
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark regression suite for generated parallel traversals")
+    parser.add_argument("--examples", type=Path, default=Path("."), help="Directory holding the *_example.py workloads")
+    parser.add_argument("--baseline", type=Path, default=Path("benchmarks/baseline.json"), help="Baseline results file")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BenchmarkSuite.DEFAULT_SIZES), help="Graph sizes")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the workload graphs")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per variant")
+    parser.add_argument("--max-workers", type=int, default=4, help="Maximum workers for parallel execution")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--t-critical", type=float, default=2.0, help="Welch t-statistic needed to call it significant")
+    parser.add_argument(
+        "--knowledge-db",
+        type=Path,
+        default=Path("benchmarks/knowledge.sqlite"),
+        help="SQLite store that every benchmark run teaches",
+    )
+    parser.add_argument("--work-dir", type=Path, default=None, help="Keep generated workloads here instead of a temp dir")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    suite = BenchmarkSuite(
+        examples_dir=args.examples,
+        repeat=args.repeat,
+        max_workers=args.max_workers,
+        threshold=args.threshold,
+        t_critical=args.t_critical,
+        knowledge_db=args.knowledge_db,
+    )
+    workloads = suite.default_workloads(sizes=args.sizes, seed=args.seed)
+    if args.work_dir:
+        results = suite.run(workloads, args.work_dir)
+    else:
+        with tempfile.TemporaryDirectory(prefix="traversal-bench-") as tmp:
+            results = suite.run(workloads, Path(tmp))
+
+    if args.update_baseline:
+        suite.save_baseline(args.baseline, results)
+        print(f"Stored baseline for {len(results)} workloads in {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.", file=sys.stderr)
+        return 2
+
+    machine, baseline = suite.load_baseline(args.baseline)
+    if machine and machine != suite.machine_fingerprint():
+        print("Warning: baseline was recorded on a different machine; timings may not be comparable.")
+    comparisons = suite.compare(results, baseline)
+    for line in suite.format_report(comparisons):
+        print(line)
+    regressions = [c for c in comparisons if c.regressed]
+    print(f"\n{len(regressions)} regression(s) across {len(comparisons)} workloads")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
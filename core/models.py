@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 
 @dataclass
@@ -18,6 +18,84 @@ class DiscoveryResult:
     candidates: List[TraversalCandidate] = field(default_factory=list)
 
 
+@dataclass
+class WorkProfile:
+    work_class: str  # io | cpu | trivial
+    io_cost_s: float
+    cpu_cost_s: float
+    io_calls: List[str] = field(default_factory=list)
+    loop_lineno: int = 0
+    # CPU cost of the worklist, visited and output bookkeeping around the per-node work; it is
+    # left out of cpu_cost_s when the work can be told apart from the traversal.
+    machinery_cost_s: float = 0.0
+
+    @property
+    def estimated_cost_s(self) -> float:
+        return self.io_cost_s + self.cpu_cost_s + self.machinery_cost_s
+
+
+@dataclass
+class Reduction:
+    variable: str
+    operator: str  # sum | product | min | max | union
+    lineno: int
+    init: str = ""  # source of the accumulator's value before the loop
+
+
+@dataclass
+class LoopDependence:
+    """Read/write sets of a traversal's main loop, classified by how iterations share them."""
+
+    loop_lineno: int
+    reads: List[str] = field(default_factory=list)
+    writes: List[str] = field(default_factory=list)
+    # Assigned before any read in every iteration, so each iteration (or worker) can own a copy.
+    private: List[str] = field(default_factory=list)
+    # Worklist, visited set and returned output, which the parallel templates manage themselves.
+    traversal_state: List[str] = field(default_factory=list)
+    reductions: List[Reduction] = field(default_factory=list)
+    # Written in one iteration and read in a later one, outside any recognized pattern.
+    carried: List[str] = field(default_factory=list)
+    attribute_writes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FunctionSplit:
+    """A traversal function taken apart into its signature and the per-node work in its main loop."""
+
+    # Every parameter name; the first two are the graph and the start node.
+    params: List[str]
+    signature: str  # unparsed parameter list, defaults included
+    forward: str  # call arguments passing every parameter on unchanged
+    extras: List[str] = field(default_factory=list)
+    # Names the main loop binds per item: the popped node (or distance and node), or the round.
+    node_vars: List[str] = field(default_factory=list)
+    # Pre-loop assignments the per-node work reads, run once by the template.
+    setup: List[str] = field(default_factory=list)
+    setup_names: List[str] = field(default_factory=list)
+    visit: List[str] = field(default_factory=list)
+    # False when the main loop's per-node work could not be told apart from the traversal.
+    isolated: bool = True
+    # True when the traversal is a nested helper recursing on one node instead of a loop.
+    recursive: bool = False
+
+
+@dataclass
+class ReductionPlan:
+    """Source fragments of a traversal's reductions, spliced into a template by the code rewriter.
+
+    Fragments read a node's operands as `values[i]`, one slot per reduction.
+    """
+
+    operands: List[str] = field(default_factory=list)
+    inits: List[str] = field(default_factory=list)
+    # Sum and product statements, folded in visit order so float results round as in the original.
+    folds: List[str] = field(default_factory=list)
+    # (variable, per-node value, combine expression over a and b, statement applying `level`).
+    merges: List[Tuple[str, str, str, str]] = field(default_factory=list)
+    returns: str = ""
+
+
 @dataclass
 class AnalysisArtifact:
     candidate: TraversalCandidate
@@ -25,6 +103,8 @@ class AnalysisArtifact:
     mutable_globals: List[str]
     safe_to_parallelize: bool
     notes: str = ""
+    work_profile: Optional[WorkProfile] = None
+    loop_dependence: Optional[LoopDependence] = None
 
 
 @dataclass
@@ -35,8 +115,27 @@ class AnalysisResult:
 @dataclass
 class StrategyDecision:
     candidate: TraversalCandidate
-    strategy: str  # threads | processes | sequential
+    strategy: str  # threads | processes | asyncio | sequential
     rationale: str
+    granularity: int = 1  # loop iterations (or edges) per parallel task
+    workers: Optional[int] = None
+    work_profile: Optional[WorkProfile] = None
+    # Runtime dispatch: graphs below inline_below_nodes call the original function; a level
+    # fans out only when its measured work outweighs dispatch_cost_s per task.
+    inline_below_nodes: int = 0
+    dispatch_cost_s: float = 0.0
+    reductions: List[Reduction] = field(default_factory=list)
+
+
+@dataclass
+class StrategyRecommendation:
+    strategy: str
+    confidence: float
+    workers: Optional[int] = None
+    granularity: int = 1
+    samples: int = 0
+    mean_speedup: float = 0.0
+    source: str = "heuristic"  # heuristic | history
 
 
 @dataclass
@@ -51,6 +150,67 @@ class TransformationResult:
     parallel_function_name: str
     success: bool
     message: str = ""
+    strategy: str = ""
+    multi_function_name: str = ""
+    cached_function_name: str = ""
+    # Pool sizes the emitted function and its multi-source variant run with, after the
+    # executor's own default for None.
+    workers: int = 0
+    multi_workers: int = 0
+
+
+@dataclass
+class GraphSummary:
+    nodes: int
+    edges: int
+    fingerprint: str
+
+
+@dataclass
+class TimingStats:
+    samples_s: List[float]
+    mean_s: float
+    median_s: float
+    stdev_s: float
+    min_s: float
+    max_s: float
+
+
+@dataclass
+class RunMeasurement:
+    output: Any
+    wall_times_s: List[float]
+    cpu_time_s: float
+    peak_memory_mb: float
+    graph: Optional[GraphSummary] = None
+    outcome: str = "ok"  # ok | timeout | memory_limit | error | crashed
+    error: str = ""
+
+
+@dataclass
+class GraphSource:
+    kind: str  # generator | random | edge_list | binary | module
+    generator: str = ""  # generator function, or the module attribute for kind "module"
+    params: Dict[str, Any] = field(default_factory=dict)
+    path: Optional[Path] = None
+    seed: Optional[int] = None
+    weighted: Optional[bool] = None
+    undirected: bool = False
+
+
+@dataclass
+class Workload:
+    name: str
+    candidate: str  # "func" or "file.py::func"
+    graph: GraphSource
+    starts: List[Any] = field(default_factory=list)
+    goals: List[Any] = field(default_factory=list)
+    repetitions: int = 0  # 0 keeps the pipeline's --repeat
+    args: List[Any] = field(default_factory=list)
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    heuristic: str = ""
+    sample_starts: int = 0  # take the first N graph nodes as starts
+    batch: bool = False  # one call with every start as "$sources"
 
 
 @dataclass
@@ -61,6 +221,22 @@ class ExecutionMetrics:
     speedup: float
     correct: bool
     details: Dict[str, float] = field(default_factory=dict)
+    strategy: str = ""
+    workers: int = 0
+    graph: Optional[GraphSummary] = None
+    sequential_timing: Optional[TimingStats] = None
+    parallel_timing: Optional[TimingStats] = None
+    seq_memory_mb: float = 0.0
+    par_memory_mb: float = 0.0
+    cpu_utilization_pct: float = 0.0
+    outcome: str = "ok"
+    error: str = ""
+    workload: str = ""
+    interpreter: str = ""
+    # Set for rows timing a generated variant rather than the candidate's own parallel version;
+    # their speedup is not the candidate's, so they never feed the knowledge base.
+    variant: str = ""
+    throughput_qps: float = 0.0
 
 
 @dataclass
@@ -68,6 +244,17 @@ class ExecutionResult:
     metrics: List[ExecutionMetrics] = field(default_factory=list)
 
 
+@dataclass
+class StageStats:
+    stage: str
+    agent: str
+    wall_time_s: float = 0.0
+    cpu_time_s: float = 0.0
+    items: int = 0
+    peak_memory_mb: Optional[float] = None  # only when memory tracing is enabled
+    cached: bool = False
+
+
 @dataclass
 class PipelineContext:
     target_dir: Path
@@ -77,6 +264,38 @@ class PipelineContext:
     strategy: Optional[StrategyResult] = None
     transformations: List[TransformationResult] = field(default_factory=list)
     execution: Optional[ExecutionResult] = None
+    resumed_stages: List[str] = field(default_factory=list)
+    stage_stats: List[StageStats] = field(default_factory=list)
+
+
+@dataclass
+class BenchmarkWorkload:
+    name: str
+    source: Path
+    generator: str
+    nodes: int
+    seed: int
+
+
+@dataclass
+class BenchmarkResult:
+    workload: str
+    candidate: str
+    parallel_samples_s: List[float]
+    sequential_samples_s: List[float]
+    speedup: float
+    correct: bool
+
+
+@dataclass
+class BenchmarkComparison:
+    workload: str
+    baseline_median_s: float
+    current_median_s: float
+    relative_change: float
+    t_statistic: float
+    regressed: bool
+    reason: str = ""
 
 
 @dataclass
@@ -86,3 +305,19 @@ class OrchestratorConfig:
     max_workers: int = 4
     use_processes: bool = False
     timeout_s: Optional[float] = None
+    resume: bool = False
+    checkpoint_dir: Optional[Path] = None
+    trace_memory: bool = False
+    repeat: int = 1
+    isolate: bool = True
+    memory_limit_mb: Optional[int] = None
+    cpu_affinity: Optional[List[int]] = None
+    workload_manifest: Optional[Path] = None
+    autotune: bool = False
+    autotune_cache: Optional[Path] = None
+    knowledge_db: Optional[Path] = None
+    memoize: bool = False
+    memo_size: int = 128
+    memo_spill_dir: Optional[Path] = None
+    # Vertex ordering for the packed graphs in generated code: none, bfs, rcm or degree.
+    reorder: str = "none"
@@ -5,6 +5,7 @@ from pathlib import Path
 
 from agents.coordinator_agent import CoordinatorAgent
 from core.models import OrchestratorConfig
+from tools.metrics_exporter import MetricsExporter
 
 
 def parse_args() -> argparse.Namespace:
@@ -13,7 +14,29 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--output", type=Path, default=Path("outputs"), help="Directory to write transformed files")
     parser.add_argument("--max-workers", type=int, default=4, help="Maximum workers for parallel execution")
     parser.add_argument("--processes", action="store_true", help="Use processes instead of threads for execution")
-    parser.add_argument("--timeout", type=float, default=None, help="Optional timeout per run")
+    parser.add_argument("--timeout", type=float, default=None, help="Hard wall-clock deadline per timed run")
+    parser.add_argument("--no-isolation", action="store_true", help="Run candidates in-process instead of a worker subprocess")
+    parser.add_argument("--memory-limit-mb", type=int, default=None, help="Address-space limit for the worker subprocess")
+    parser.add_argument("--cpus", type=str, default=None, help="Comma-separated CPU ids to pin the worker subprocess to")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed repetitions per variant")
+    parser.add_argument("--workloads", type=Path, default=None, help="TOML/JSON workload manifest for the execution stage")
+    parser.add_argument("--autotune", action="store_true", help="Calibrate strategy, workers and grain per candidate on a sampled graph")
+    parser.add_argument("--autotune-cache", type=Path, default=None, help="Tuned settings cache (default: <output>/autotune.json)")
+    parser.add_argument("--knowledge-db", type=Path, default=None, help="SQLite store of past runs (default: <output>/knowledge.sqlite)")
+    parser.add_argument("--memoize", action="store_true", help="Also emit an LRU-memoized parallel_<name>_cached per candidate")
+    parser.add_argument("--memo-size", type=int, default=128, help="Results kept in memory per memoized function")
+    parser.add_argument("--memo-spill", type=Path, default=None, help="Directory where evicted memo entries spill to disk")
+    parser.add_argument(
+        "--reorder",
+        choices=["none", "bfs", "rcm", "degree"],
+        default="none",
+        help="Relabel vertices of the packed graphs in generated code for cache locality",
+    )
+    parser.add_argument("--metrics-dir", type=Path, default=None, help="Export metrics as JSON Lines, CSV and OpenMetrics here")
+    parser.add_argument("--resume", action="store_true", help="Reuse checkpoints of unchanged stages and candidates")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak memory per stage (slower)")
+    parser.add_argument("--stats-json", type=Path, default=None, help="Write per-stage timing stats to this JSON file")
+    parser.add_argument("--checkpoint-dir", type=Path, default=None, help="Checkpoint directory (default: <output>/.checkpoints)")
     return parser.parse_args()
 
 
@@ -25,10 +48,28 @@ def main() -> None:
         max_workers=args.max_workers,
         use_processes=args.processes,
         timeout_s=args.timeout,
+        resume=args.resume,
+        checkpoint_dir=args.checkpoint_dir,
+        trace_memory=args.trace_memory,
+        repeat=args.repeat,
+        isolate=not args.no_isolation,
+        memory_limit_mb=args.memory_limit_mb,
+        cpu_affinity=[int(c) for c in args.cpus.split(",")] if args.cpus else None,
+        workload_manifest=args.workloads,
+        autotune=args.autotune,
+        autotune_cache=args.autotune_cache,
+        knowledge_db=args.knowledge_db,
+        memoize=args.memoize,
+        memo_size=args.memo_size,
+        memo_spill_dir=args.memo_spill,
+        reorder=args.reorder,
     )
     coordinator = CoordinatorAgent(config)
     context = coordinator.run()
 
+    if context.resumed_stages:
+        print(f"Resumed from checkpoints: {', '.join(context.resumed_stages)}\n")
+
     print("=== Discovery ===")
     for c in context.discovery.candidates if context.discovery else []:
         print(f"- {c.traversal_type.upper()} in {c.file_path}::{c.function_name} @ line {c.lineno}")
@@ -36,10 +77,15 @@ def main() -> None:
     print("\n=== Analysis ===")
     for a in context.analysis.artifacts if context.analysis else []:
         print(f"- {a.candidate.function_name}: safe={a.safe_to_parallelize} shared={a.shared_state_variables} globals={a.mutable_globals}")
+        loop = a.loop_dependence
+        if loop is not None and (loop.reductions or loop.carried or loop.attribute_writes):
+            reductions = [f"{r.variable}:{r.operator}" for r in loop.reductions]
+            print(f"  loop@{loop.loop_lineno}: reductions={reductions} carried={loop.carried} attributes={loop.attribute_writes}")
 
     print("\n=== Strategy ===")
     for s in context.strategy.decisions if context.strategy else []:
-        print(f"- {s.candidate.function_name}: {s.strategy} ({s.rationale})")
+        grain = f", workers={s.workers}, grain={s.granularity}" if s.strategy != "sequential" else ""
+        print(f"- {s.candidate.function_name}: {s.strategy}{grain} ({s.rationale})")
 
     print("\n=== Transformation ===")
     for t in context.transformations:
@@ -47,10 +93,29 @@ def main() -> None:
 
     print("\n=== Execution ===")
     for m in context.execution.metrics if context.execution else []:
+        name = f"{m.candidate.function_name}[{m.workload}]" if m.workload else m.candidate.function_name
+        if m.outcome != "ok":
+            print(f"- {name}: {m.outcome.upper()} ({m.error})")
+            continue
+        if m.variant == "multi-source":
+            print(
+                f"- {name}: per-source={m.sequential_time_s:.6f}s batched={m.parallel_time_s:.6f}s "
+                f"throughput={m.throughput_qps:.1f} queries/s batching speedup={m.speedup:.2f} correct={m.correct}"
+            )
+            continue
         print(
-            f"- {m.candidate.function_name}: seq={m.sequential_time_s:.6f}s "
+            f"- {name}: seq={m.sequential_time_s:.6f}s "
             f"par={m.parallel_time_s:.6f}s speedup={m.speedup:.2f} correct={m.correct}"
         )
+    if args.metrics_dir and context.execution:
+        for path in MetricsExporter(args.metrics_dir).export_all(context.execution.metrics):
+            print(f"  metrics -> {path}")
+
+    print("\n=== Pipeline Timing ===")
+    for line in coordinator.stage_profiler.format_report():
+        print(line)
+    if args.stats_json:
+        coordinator.stage_profiler.export_json(args.stats_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.correctness_validator import CorrectnessValidator  # noqa: E402
+
+
+class BfsDepthTest(unittest.TestCase):
+    GRAPH = {0: [1, 2], 1: [3], 2: [3], 3: [0], 4: [0]}
+
+    def setUp(self) -> None:
+        self.validator = CorrectnessValidator()
+
+    def test_hop_depths(self) -> None:
+        self.assertEqual(self.validator.hop_depths(self.GRAPH, 0), {0: 0, 1: 1, 2: 1, 3: 2})
+
+    def test_rejects_flattened_depths(self) -> None:
+        expected = [self.validator.hop_depths(self.GRAPH, 0)]
+        flat = [{0: 0, 1: 0, 2: 0, 3: 0}]
+        self.assertFalse(self.validator.compare_bfs_depths([[0, 1, 2, 3]], flat, expected))
+        self.assertTrue(self.validator.compare_bfs_depths([[0, 1, 2, 3]], expected, expected))
+
+    def test_rejects_nodes_the_original_never_visits(self) -> None:
+        expected = [self.validator.hop_depths(self.GRAPH, 0)]
+        self.assertFalse(self.validator.compare_bfs_depths([[0, 1, 2]], expected, expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
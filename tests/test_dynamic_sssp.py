@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import importlib.util
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.models import StrategyDecision, TraversalCandidate  # noqa: E402
+from tools.code_rewriter import CodeRewriter  # noqa: E402
+
+SOURCES = {
+    "dijkstra": '''
+import heapq
+
+
+def dijkstra_traversal(graph, start):
+    distances = {node: float('infinity') for node in graph}
+    distances[start] = 0
+    pq = [(0, start)]
+    while pq:
+        current_dist, current_node = heapq.heappop(pq)
+        if current_dist > distances[current_node]:
+            continue
+        for neighbor, weight in graph.get(current_node, {}).items():
+            distance = current_dist + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                heapq.heappush(pq, (distance, neighbor))
+    return distances
+''',
+    "bellman_ford": '''
+def bellman_ford_traversal(graph, start):
+    distances = {node: float('infinity') for node in graph}
+    distances[start] = 0
+    for _ in range(len(graph) - 1):
+        for u in graph:
+            for v, w in graph[u].items():
+                if distances[u] + w < distances[v]:
+                    distances[v] = distances[u] + w
+    return distances
+''',
+}
+
+
+class DynamicShortestPathTest(unittest.TestCase):
+    """Repaired trees must match a fresh run of the original after every batch of edge changes."""
+
+    NODES = 12
+    BATCHES = 40
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _generated(self, traversal_type: str):
+        src = Path(self.tmp.name) / f"{traversal_type}_example.py"
+        src.write_text(SOURCES[traversal_type], encoding="utf-8")
+        candidate = TraversalCandidate(src, f"{traversal_type}_traversal", traversal_type, 1)
+        decision = StrategyDecision(candidate=candidate, strategy="threads", rationale="test", workers=2)
+        [result] = CodeRewriter(Path(self.tmp.name) / "out").rewrite_file([decision])
+        self.assertTrue(result.success, result.message)
+        spec = importlib.util.spec_from_file_location(f"parallel_{traversal_type}", result.output_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return getattr(module, candidate.function_name), getattr(module, f"{result.parallel_function_name}_dynamic")
+
+    def _random_graph(self, rng: random.Random):
+        graph = {i: {} for i in range(self.NODES)}
+        for u in range(self.NODES):
+            for v in rng.sample(range(self.NODES), 3):
+                if u != v:
+                    graph[u][v] = rng.randint(1, 9)
+        return graph
+
+    def _random_batch(self, rng: random.Random, graph):
+        changes = []
+        for _ in range(rng.randint(1, 4)):
+            u = rng.randrange(self.NODES)
+            present = list(graph[u])
+            if present and rng.random() < 0.4:
+                v = rng.choice(present)
+                changes.append((u, v, None))
+                # Deleting and re-adding an edge in one batch.
+                if rng.random() < 0.5:
+                    changes.append((u, v, rng.randint(1, 9)))
+            else:
+                v = rng.choice([n for n in range(self.NODES) if n != u])
+                changes.append((u, v, rng.randint(1, 9)))
+        return changes
+
+    def _check(self, traversal_type: str) -> None:
+        original, dynamic = self._generated(traversal_type)
+        for seed in range(5):
+            rng = random.Random(seed)
+            graph = self._random_graph(rng)
+            tree = dynamic(graph, 0)
+            self.assertEqual(tree.distances, original(graph, 0))
+            for _ in range(self.BATCHES):
+                changes = self._random_batch(rng, graph)
+                tree.update(changes)
+                expected = original({u: dict(edges) for u, edges in graph.items()}, 0)
+                self.assertEqual(tree.distances, expected, f"seed {seed}, after {changes}")
+
+    def test_dijkstra_updates_match_recompute(self) -> None:
+        self._check("dijkstra")
+
+    def test_bellman_ford_updates_match_recompute(self) -> None:
+        self._check("bellman_ford")
+
+    def test_delete_then_readd_in_one_batch(self) -> None:
+        _, dynamic = self._generated("dijkstra")
+        tree = dynamic({0: {1: 1}, 1: {2: 1}, 2: {}}, 0)
+        tree.update([(0, 1, None), (0, 1, 5)])
+        self.assertEqual(tree.distances, {0: 0, 1: 5, 2: 6})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.models import StrategyDecision, TraversalCandidate  # noqa: E402
+from tools.code_rewriter import CodeRewriter  # noqa: E402
+from tests.test_dynamic_sssp import SOURCES  # noqa: E402
+
+
+class MemoTest(unittest.TestCase):
+    """The memoized variant must never answer for a graph that changed since it cached a result."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        src = Path(tmp.name) / "dijkstra_example.py"
+        src.write_text(SOURCES["dijkstra"], encoding="utf-8")
+        candidate = TraversalCandidate(src, "dijkstra_traversal", "dijkstra", 1)
+        decision = StrategyDecision(candidate=candidate, strategy="threads", rationale="test", workers=2)
+        [result] = CodeRewriter(Path(tmp.name) / "out", memoize=True).rewrite_file([decision])
+        spec = importlib.util.spec_from_file_location("parallel_dijkstra_memo", result.output_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.cached = getattr(module, result.cached_function_name)
+
+    def test_unversioned_calls_see_in_place_edits(self) -> None:
+        graph = {0: {1: 5}, 1: {2: 1}, 2: {}}
+        self.assertEqual(self.cached(graph, 0), {0: 0, 1: 5, 2: 6})
+        graph[0][1] = 1
+        self.assertEqual(self.cached(graph, 0), {0: 0, 1: 1, 2: 2})
+        self.assertEqual(self.cached(graph, 0, 2), 2)
+        self.assertEqual(self.cached.cache_info()["size"], 0)
+
+    def test_versioned_calls_hit_until_the_version_changes(self) -> None:
+        graph = {0: {1: 5}, 1: {2: 1}, 2: {}}
+        self.assertEqual(self.cached(graph, 0, graph_version=1), {0: 0, 1: 5, 2: 6})
+        self.assertEqual(self.cached(graph, 0, 1, graph_version=1), 5)
+        graph[0][1] = 1
+        self.assertEqual(self.cached(graph, 0, graph_version=2), {0: 0, 1: 1, 2: 2})
+        info = self.cached.cache_info()
+        self.assertEqual((info["hits"], info["misses"]), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.models import StrategyDecision, TraversalCandidate  # noqa: E402
+from tools.code_rewriter import CodeRewriter  # noqa: E402
+
+SOURCES = {
+    "bfs": '''
+from collections import deque
+
+SEEN = []
+
+
+def bfs_traversal(graph, start):
+    visited = {start}
+    order = []
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        SEEN.append(node)
+        for nbr in graph.get(node, []):
+            if nbr not in visited:
+                visited.add(nbr)
+                queue.append(nbr)
+    return order
+''',
+    "dijkstra": '''
+import heapq
+
+SEEN = []
+
+
+def dijkstra_traversal(graph, start):
+    distances = {node: float('infinity') for node in graph}
+    distances[start] = 0
+    pq = [(0, start)]
+    while pq:
+        current_dist, current_node = heapq.heappop(pq)
+        if current_dist > distances[current_node]:
+            continue
+        SEEN.append(current_node)
+        for neighbor, weight in graph.get(current_node, {}).items():
+            distance = current_dist + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                heapq.heappush(pq, (distance, neighbor))
+    return distances
+''',
+}
+
+
+class SearchVisitTest(unittest.TestCase):
+    """The goal-aware variants run the original's per-node work for every node they reach."""
+
+    def _module(self, traversal_type: str, strategy: str):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        src = Path(tmp.name) / f"{traversal_type}_search_example.py"
+        src.write_text(SOURCES[traversal_type], encoding="utf-8")
+        candidate = TraversalCandidate(src, f"{traversal_type}_traversal", traversal_type, 1)
+        decision = StrategyDecision(candidate=candidate, strategy=strategy, rationale="test", workers=2)
+        [result] = CodeRewriter(Path(tmp.name) / "out").rewrite_file([decision])
+        self.assertTrue(result.success, result.message)
+        spec = importlib.util.spec_from_file_location(f"search_{traversal_type}_{strategy}", result.output_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module, getattr(module, f"{result.parallel_function_name}_search")
+
+    def test_bfs_search_visits_its_order(self) -> None:
+        graph = {0: [1, 2], 1: [3], 2: [4], 3: [5], 4: [], 5: []}
+        for strategy in ("threads", "asyncio"):
+            module, search = self._module("bfs", strategy)
+            order, _ = search(graph, 0, targets=[3])
+            self.assertEqual(order, [0, 1, 2, 3])
+            self.assertEqual(sorted(module.SEEN), order)
+
+    def test_dijkstra_search_visits_settled_nodes(self) -> None:
+        graph = {0: {1: 1, 2: 4}, 1: {2: 1, 3: 7}, 2: {3: 1}, 3: {}}
+        module, search = self._module("dijkstra", "threads")
+        distances, _ = search(graph, 0, targets=[2])
+        self.assertEqual(distances, {0: 0, 1: 1, 2: 2})
+        self.assertEqual(sorted(module.SEEN), [0, 1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import statistics
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from textwrap import dedent
+from typing import Dict, List, Optional, Tuple
+
+from core.models import StrategyDecision
+from tools.code_rewriter import CodeRewriter
+from tools.correctness_validator import CorrectnessValidator
+from tools.execution_sandbox import ExecutionSandbox
+from tools.knowledge_base import ParallelizationKnowledgeBase
+from tools.machine_fingerprint import MachineFingerprinter
+
+
+class Autotuner:
+    """Calibrates strategy x workers x granularity per candidate on a sampled subgraph.
+
+    Every configuration is rendered into one calibration module next to the original
+    function, so all of them run against the same sampled ``GRAPH``. The fastest variant
+    whose output matches the original wins; if none beats the original, the decision
+    becomes sequential. Results are cached per machine and source hash.
+    """
+
+    WORKER_CHOICES = (1, 2, 4, 8, 16)
+    GRAIN_CHOICES = (1, 4, 16, 64)
+    SAMPLE_NODES = 200
+    CALIBRATION_REPEAT = 3
+
+    def __init__(
+        self,
+        rewriter: CodeRewriter,
+        sandbox: ExecutionSandbox,
+        kb: ParallelizationKnowledgeBase,
+        cache_path: Path,
+    ) -> None:
+        self.rewriter = rewriter
+        self.sandbox = sandbox
+        self.kb = kb
+        self.cache_path = cache_path
+        self.validator = CorrectnessValidator()
+        self.machine = MachineFingerprinter().digest()
+        self._cache: Dict[str, Dict] = self._load_cache()
+
+    def tune(self, decision: StrategyDecision) -> StrategyDecision:
+        # Sequential decisions are either unsafe or too cheap to be worth calibrating.
+        if decision.strategy == "sequential":
+            return decision
+        candidate = decision.candidate
+        source_hash = hashlib.sha256(candidate.file_path.read_bytes()).hexdigest()[:16]
+        key = f"{self.machine}:{source_hash}:{candidate.function_name}"
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._calibrate(decision)
+            if entry is None:
+                return decision
+            self._cache[key] = entry
+            self._save_cache()
+            source = "autotuned"
+        else:
+            source = "autotuned (cached)"
+        return replace(
+            decision,
+            strategy=entry["strategy"],
+            workers=entry["workers"],
+            granularity=entry["granularity"],
+            rationale=(
+                f"{source}: {entry['strategy']} workers={entry['workers']} grain={entry['granularity']} "
+                f"({entry['median_s']:.6f}s vs {entry['baseline_s']:.6f}s sequential on the sample)"
+            ),
+        )
+
+    def _calibrate(self, decision: StrategyDecision) -> Optional[Dict]:
+        variants = self._variants(decision)
+        if not variants:
+            return None
+        source = decision.candidate.file_path.read_text(encoding="utf-8")
+        functions = "\n".join(self.rewriter.render(variant, f"_autotune_{i}") for i, variant in enumerate(variants))
+        with tempfile.TemporaryDirectory(prefix="autotune_") as tmp:
+            path = Path(tmp) / f"autotune_{decision.candidate.file_path.name}"
+            path.write_text(f"{source}\n\n{self._sample_suffix()}\n{functions}\n", encoding="utf-8")
+            baseline = self.sandbox.run_function(path, decision.candidate.function_name, self.CALIBRATION_REPEAT)
+            if baseline.outcome != "ok":
+                return None
+            baseline_s = statistics.median(baseline.wall_times_s)
+            best: Tuple[float, StrategyDecision] | None = None
+            for i, variant in enumerate(variants):
+                run = self.sandbox.run_function(path, f"_autotune_{i}", self.CALIBRATION_REPEAT)
+                if run.outcome != "ok" or not self.validator.compare_outputs(baseline.output, run.output):
+                    continue
+                median_s = statistics.median(run.wall_times_s)
+                if best is None or median_s < best[0]:
+                    best = (median_s, variant)
+        if best is None or best[0] >= baseline_s:
+            return {
+                "strategy": "sequential",
+                "workers": None,
+                "granularity": 1,
+                "median_s": baseline_s,
+                "baseline_s": baseline_s,
+            }
+        median_s, chosen = best
+        return {
+            "strategy": chosen.strategy,
+            "workers": chosen.workers,
+            "granularity": chosen.granularity,
+            "median_s": median_s,
+            "baseline_s": baseline_s,
+        }
+
+    def _variants(self, decision: StrategyDecision) -> List[StrategyDecision]:
+        traversal = decision.candidate.traversal_type
+        strategies = sorted(s for s in self.kb.emittable.get(traversal, set()) if s != "sequential")
+        variants: List[StrategyDecision] = []
+        rendered = set()
+        for strategy in strategies:
+            for workers in self.WORKER_CHOICES:
+                for grain in self.GRAIN_CHOICES:
+                    variant = replace(decision, strategy=strategy, workers=workers, granularity=grain)
+                    # Templates that ignore the grain render identically; calibrate each distinct body once.
+                    body = self.rewriter.render(variant, "_")
+                    if body not in rendered:
+                        rendered.add(body)
+                        variants.append(variant)
+        return variants
+
+    def _sample_suffix(self) -> str:
+        return dedent(
+            f"""
+            # Autotuning calibration: shrink GRAPH to a connected sample around START_NODE.
+            def _autotune_sample(graph, start, limit):
+                order = [start]
+                keep = {{start}}
+                i = 0
+                while i < len(order) and len(order) < limit:
+                    neighbors = graph.get(order[i], [])
+                    i += 1
+                    for nbr in neighbors:
+                        if nbr not in keep and len(order) < limit:
+                            keep.add(nbr)
+                            order.append(nbr)
+                if any(isinstance(v, dict) for v in graph.values()):
+                    return {{n: {{v: w for v, w in graph.get(n, {{}}).items() if v in keep}} for n in order}}
+                return {{n: [v for v in graph.get(n, []) if v in keep] for n in order}}
+
+
+            if isinstance(globals().get("GRAPH"), dict) and "START_NODE" in globals():
+                GRAPH = _autotune_sample(GRAPH, START_NODE, {self.SAMPLE_NODES})
+            """
+        )
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_path.exists():
+            return {}
+        data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        return data.get("entries", {})
+
+    def _save_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"machine": MachineFingerprinter().describe(), "entries": self._cache}
+        self.cache_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
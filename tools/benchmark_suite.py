@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import math
+import statistics
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from core.models import (
+    BenchmarkComparison,
+    BenchmarkResult,
+    BenchmarkWorkload,
+    OrchestratorConfig,
+)
+from tools.machine_fingerprint import MachineFingerprinter
+
+
+class BenchmarkSuite:
+    """Runs seeded example workloads through the full pipeline and compares them to a stored baseline."""
+
+    # traversal -> (example module, graph generator)
+    ALGORITHMS: Dict[str, tuple[str, str]] = {
+        "bfs": ("bfs_example.py", "generate_graph"),
+        "dfs": ("dfs_example.py", "generate_graph"),
+        "dijkstra": ("dijkstra_example.py", "generate_weighted_graph"),
+        "bellman_ford": ("bellman_ford_example.py", "generate_weighted_graph"),
+    }
+    DEFAULT_SIZES = (50, 100, 200)
+
+    def __init__(
+        self,
+        examples_dir: Path,
+        repeat: int = 5,
+        max_workers: int = 4,
+        threshold: float = 0.10,
+        t_critical: float = 2.0,
+        knowledge_db: Path | None = None,
+    ) -> None:
+        self.examples_dir = examples_dir
+        self.repeat = repeat
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self.t_critical = t_critical
+        self.knowledge_db = knowledge_db
+
+    def default_workloads(self, sizes: Iterable[int] = DEFAULT_SIZES, seed: int = 1234) -> List[BenchmarkWorkload]:
+        workloads = []
+        for traversal, (module, generator) in self.ALGORITHMS.items():
+            for nodes in sizes:
+                workloads.append(
+                    BenchmarkWorkload(
+                        name=f"{traversal}_n{nodes}",
+                        source=self.examples_dir / module,
+                        generator=generator,
+                        nodes=nodes,
+                        seed=seed,
+                    )
+                )
+        return workloads
+
+    def run(self, workloads: List[BenchmarkWorkload], work_dir: Path) -> List[BenchmarkResult]:
+        # Imported lazily: the coordinator pulls in every agent and tool.
+        from agents.coordinator_agent import CoordinatorAgent
+
+        target_dir = work_dir / "workloads"
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for workload in workloads:
+            self._materialize(workload, target_dir)
+        config = OrchestratorConfig(
+            target_dir=target_dir,
+            output_dir=work_dir / "outputs",
+            max_workers=self.max_workers,
+            repeat=self.repeat,
+            knowledge_db=self.knowledge_db,
+        )
+        context = CoordinatorAgent(config).run()
+        results = []
+        for m in context.execution.metrics if context.execution else []:
+            results.append(
+                BenchmarkResult(
+                    workload=m.candidate.file_path.stem + (f"[{m.workload}]" if m.workload else ""),
+                    candidate=m.candidate.function_name,
+                    parallel_samples_s=m.parallel_timing.samples_s if m.parallel_timing else [m.parallel_time_s],
+                    sequential_samples_s=m.sequential_timing.samples_s if m.sequential_timing else [m.sequential_time_s],
+                    speedup=m.speedup,
+                    correct=m.correct,
+                )
+            )
+        return sorted(results, key=lambda r: r.workload)
+
+    def compare(
+        self, results: List[BenchmarkResult], baseline: Dict[str, BenchmarkResult]
+    ) -> List[BenchmarkComparison]:
+        comparisons = []
+        current = {r.workload: r for r in results}
+        for name in sorted(set(current) | set(baseline)):
+            base, cur = baseline.get(name), current.get(name)
+            base_median = statistics.median(base.parallel_samples_s) if base else 0.0
+            cur_median = statistics.median(cur.parallel_samples_s) if cur else 0.0
+            if cur is None:
+                comparisons.append(
+                    BenchmarkComparison(name, base_median, 0.0, 0.0, 0.0, True, "missing from current run")
+                )
+                continue
+            if base is None:
+                comparisons.append(BenchmarkComparison(name, 0.0, cur_median, 0.0, 0.0, False, "new workload"))
+                continue
+            change = (cur_median - base_median) / base_median if base_median > 0 else 0.0
+            t_stat = self._welch_t(cur.parallel_samples_s, base.parallel_samples_s)
+            reason = ""
+            if base.correct and not cur.correct:
+                reason = "output no longer matches sequential"
+            elif change > self.threshold and t_stat > self.t_critical:
+                reason = f"slower by {change:+.1%} (t={t_stat:.2f})"
+            comparisons.append(
+                BenchmarkComparison(name, base_median, cur_median, change, t_stat, bool(reason), reason)
+            )
+        return comparisons
+
+    def format_report(self, comparisons: List[BenchmarkComparison]) -> List[str]:
+        lines = [f"{'workload':<20} {'baseline':>12} {'current':>12} {'change':>9} {'t':>7}  status"]
+        for c in comparisons:
+            status = "REGRESSION: " + c.reason if c.regressed else (c.reason or "ok")
+            lines.append(
+                f"{c.workload:<20} {c.baseline_median_s:>11.6f}s {c.current_median_s:>11.6f}s "
+                f"{c.relative_change:>+8.1%} {c.t_statistic:>7.2f}  {status}"
+            )
+        return lines
+
+    def load_baseline(self, path: Path) -> tuple[Dict[str, str], Dict[str, BenchmarkResult]]:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        results = {r["workload"]: BenchmarkResult(**r) for r in data.get("results", [])}
+        return data.get("machine", {}), results
+
+    def save_baseline(self, path: Path, results: List[BenchmarkResult]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"machine": self.machine_fingerprint(), "results": [asdict(r) for r in results]}
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    def machine_fingerprint(self) -> Dict[str, str]:
+        return MachineFingerprinter().describe()
+
+    def _materialize(self, workload: BenchmarkWorkload, target_dir: Path) -> Path:
+        source = workload.source.read_text(encoding="utf-8")
+        # Rebinding GRAPH after the example's own setup keeps both variants on the same seeded graph.
+        suffix = (
+            f"\n\n# Benchmark workload {workload.name}: seeded graph with {workload.nodes} nodes.\n"
+            f"import random\n"
+            f"random.seed({workload.seed})\n"
+            f"GRAPH = {workload.generator}(nodes={workload.nodes})\n"
+        )
+        path = target_dir / f"{workload.name}.py"
+        path.write_text(source.rstrip() + suffix, encoding="utf-8")
+        return path
+
+    def _welch_t(self, current: List[float], baseline: List[float]) -> float:
+        diff = statistics.fmean(current) - statistics.fmean(baseline)
+        if len(current) < 2 or len(baseline) < 2:
+            # Without variance estimates only the relative threshold can decide.
+            return math.inf if diff > 0 else 0.0
+        error = math.sqrt(statistics.variance(current) / len(current) + statistics.variance(baseline) / len(baseline))
+        if error == 0:
+            return math.inf if diff > 0 else 0.0
+        return diff / error
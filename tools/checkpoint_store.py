@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+
+class CheckpointStore:
+    """Persists stage outputs on disk, keyed by hashes of their inputs and config."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def key(self, *parts: Any) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(repr(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:24]
+
+    def hash_file(self, path: Path) -> str:
+        if not path.exists():
+            return ""
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def hash_tree(self, base: Path, files: Iterable[Path]) -> str:
+        # Paths are hashed relative to the base so moving the checkout keeps checkpoints valid.
+        digest = hashlib.sha256()
+        for path in sorted(files):
+            digest.update(str(path.relative_to(base)).encode("utf-8"))
+            digest.update(self.hash_file(path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def load(self, stage: str, key: str) -> Optional[Any]:
+        path = self._path(stage, key)
+        if not path.exists():
+            return None
+        try:
+            with path.open("rb") as fh:
+                return pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            # A half-written or stale checkpoint is treated as missing.
+            return None
+
+    def save(self, stage: str, key: str, value: Any) -> None:
+        path = self._path(stage, key)
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as fh:
+            pickle.dump(value, fh)
+        tmp_path.replace(path)
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / f"{stage}-{key}.pkl"
@@ -1,111 +1,2161 @@
 from __future__ import annotations
 
+import ast
+import copy
+import os
+from dataclasses import replace
 from pathlib import Path
 from textwrap import dedent
+from typing import Dict, List, Optional, Tuple
 
-from core.models import StrategyDecision, TransformationResult
+from core.models import FunctionSplit, ReductionPlan, StrategyDecision, TransformationResult
+from tools.function_splitter import FunctionSplitter
 
 
 class CodeRewriter:
     """Creates parallel variants of traversal functions and writes them to the output directory."""
 
-    def __init__(self, output_dir: Path) -> None:
+    # Kept in step with CostModel.FANOUT_FACTOR.
+    FANOUT_FACTOR = 2.0
+    # Sources per bitmask sweep in the multi-source BFS. Python ints make masks wider than 64
+    # bits cheap, and wider sweeps share more adjacency scans.
+    MULTI_BATCH_SIZE = 256
+    # Default bound on in-flight per-node operations for the asyncio templates.
+    ASYNC_LIMIT = 1024
+    # Locks guarding shared distances in free-threaded templates; a power of two well above
+    # typical core counts keeps two threads from picking the same stripe most of the time.
+    LOCK_STRIPES = 64
+    # Kept in step with CostModel's "processes" entries; the batched shortest-path variant
+    # prices its process pool with these.
+    PROCESS_DISPATCH_S = 250e-6
+    PROCESS_STARTUP_S = 50e-3
+    # What each template binds per popped item (or round), in the order the original binds it.
+    NODE_EXPRS = {
+        "bfs": ["node"],
+        "dfs": ["node"],
+        "dijkstra": ["current_dist", "current_node"],
+        "bellman_ford": ["round_index"],
+    }
+    # Vertex orderings the packed (CSR) graphs in generated code can be relabeled with.
+    REORDERINGS = {
+        "bfs": "breadth-first",
+        "rcm": "reverse Cuthill-McKee",
+        "degree": "degree-sorted",
+    }
+    # Vertex partitioning for the destination-partitioned Bellman-Ford templates: label
+    # propagation rounds, the load a block may exceed the even share by, and the vertices per
+    # block below which the degree-balanced split is used as is.
+    PARTITION_ROUNDS = 5
+    PARTITION_SLACK = 0.05
+    PARTITION_MIN_VERTICES = 8
+    # Subtrees per worker the fork-join DFS aims to fork, so uneven subtrees still balance.
+    FORK_TASKS_PER_WORKER = 4
+    # Locals of the reduction BFS template that a spliced accumulator must not shadow.
+    REDUCTION_RESERVED = {
+        "graph", "start", "grain", "fanout_cost_s", "item_cost_s", "pool", "visited", "order", "frontier",
+        "tree", "expand", "chunks", "results", "buffers", "offsets", "merged", "next_frontier", "began",
+        "level", "operands", "values", "partials", "time", "ThreadPoolExecutor", "accumulate",
+    }
+
+    def __init__(
+        self,
+        output_dir: Path,
+        memoize: bool = False,
+        memo_size: int = 128,
+        memo_spill_dir: Path | None = None,
+        reorder: str = "none",
+    ) -> None:
+        if reorder != "none" and reorder not in self.REORDERINGS:
+            raise ValueError(f"Unknown vertex ordering {reorder!r}; expected none or one of {sorted(self.REORDERINGS)}")
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.memoize = memoize
+        self.memo_size = memo_size
+        self.memo_spill_dir = memo_spill_dir
+        self.reorder = reorder
+        self.splitter = FunctionSplitter()
 
     def rewrite(self, decision: StrategyDecision) -> TransformationResult:
-        src_path = decision.candidate.file_path
+        return self.rewrite_file([decision])[0]
+
+    def rewrite_file(self, decisions: List[StrategyDecision]) -> List[TransformationResult]:
+        """Renders every candidate of one source file into a single output module, written once."""
+        src_path = decisions[0].candidate.file_path
         try:
             source = src_path.read_text(encoding="utf-8")
-            parallel_func_name = f"parallel_{decision.candidate.function_name}"
-            template = self._render_template(decision, parallel_func_name)
-            new_source = f"{source}\n\n{template}\n"
             output_file = self._output_path(src_path)
-            output_file.write_text(new_source, encoding="utf-8")
-            return TransformationResult(
-                candidate=decision.candidate,
-                output_file=output_file,
-                parallel_function_name=parallel_func_name,
-                success=True,
-                message=f"Wrote {output_file}",
-            )
+            rendered = [self._rewrite_one(decision, output_file) for decision in decisions]
+            templates = "\n".join(template for template, _ in rendered)
+            output_file.write_text(f"{source}\n\n{templates}\n", encoding="utf-8")
+            return [result for _, result in rendered]
         except Exception as exc:  # pragma: no cover - defensive
-            return TransformationResult(
-                candidate=decision.candidate,
-                output_file=src_path,
-                parallel_function_name=decision.candidate.function_name,
-                success=False,
-                message=str(exc),
+            return [
+                TransformationResult(
+                    candidate=decision.candidate,
+                    output_file=src_path,
+                    parallel_function_name=decision.candidate.function_name,
+                    success=False,
+                    message=str(exc),
+                    strategy=decision.strategy,
+                )
+                for decision in decisions
+            ]
+
+    def _rewrite_one(self, decision: StrategyDecision, output_file: Path) -> Tuple[str, TransformationResult]:
+        parallel_func_name = f"parallel_{decision.candidate.function_name}"
+        decision, template = self._prepare(decision, parallel_func_name)
+        multi_func_name = ""
+        # Batched and goal-directed variants return traversal results only, never accumulators.
+        plain = decision.strategy != "sequential" and not decision.reductions
+        if decision.candidate.traversal_type == "bfs" and plain:
+            multi_func_name = f"{parallel_func_name}_multi"
+            template += "\n" + self._render_multi_bfs(decision, multi_func_name)
+        elif decision.candidate.traversal_type in ("dijkstra", "bellman_ford") and plain:
+            multi_func_name = f"{parallel_func_name}_multi"
+            template += "\n" + self._render_multi_sssp(decision, multi_func_name)
+            template += "\n" + self._render_dynamic_sssp(decision, f"{parallel_func_name}_dynamic")
+        if decision.candidate.traversal_type in ("bfs", "dijkstra") and plain:
+            template += self._prepare_search(decision, parallel_func_name)
+        cached_func_name = ""
+        if self.memoize:
+            cached_func_name = f"{parallel_func_name}_cached"
+            template += "\n" + self._render_memo(decision, cached_func_name, parallel_func_name)
+        result = TransformationResult(
+            candidate=decision.candidate,
+            output_file=output_file,
+            parallel_function_name=parallel_func_name,
+            success=True,
+            message=f"Wrote {output_file}",
+            strategy=decision.strategy,
+            multi_function_name=multi_func_name,
+            cached_function_name=cached_func_name,
+            workers=self._pool_size(decision),
+            multi_workers=self._multi_pool_size(decision) if multi_func_name else 0,
+        )
+        return template, result
+
+    def _pool_size(self, decision: StrategyDecision) -> int:
+        # Mirrors the defaults the templates fall back to when the decision leaves workers unset.
+        if decision.strategy == "sequential":
+            return 1
+        if decision.strategy == "asyncio":
+            return decision.workers or self.ASYNC_LIMIT
+        if decision.workers:
+            return decision.workers
+        cpus = os.cpu_count()
+        if decision.strategy == "free_threads":
+            return cpus or 4
+        if decision.candidate.traversal_type == "bellman_ford":
+            return 4
+        # ThreadPoolExecutor(max_workers=None)
+        return min(32, (cpus or 1) + 4)
+
+    def _multi_pool_size(self, decision: StrategyDecision) -> int:
+        if decision.candidate.traversal_type == "bfs":
+            return decision.workers or min(32, (os.cpu_count() or 1) + 4)
+        # The shortest-path process pool is capped at the core count.
+        return min(decision.workers or 4, os.cpu_count() or 1)
+
+    def render(self, decision: StrategyDecision, function_name: str) -> str:
+        return self._prepare(decision, function_name)[1]
+
+    def _render_multi_bfs(self, decision: StrategyDecision, func_name: str) -> str:
+        grain = max(1, decision.granularity)
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        return dedent(
+            f"""
+            def {func_name}(graph, sources, batch_size={self.MULTI_BATCH_SIZE}):
+                '''Multi-source BFS (MS-BFS): one bitmask sweep advances up to batch_size queries per adjacency scan.
+
+                Returns one {{node: hop depth}} map per source, covering exactly the nodes
+                {decision.candidate.function_name} visits from that source. Bit i of a vertex's mask means
+                "reached by source i", so an edge into territory every query has already seen costs one
+                mask test no matter how many sources share it. Several source batches run on separate
+                workers; a lone batch splits large levels into vertex ranges of {grain} when their
+                measured work outweighs dispatch.
+                '''
+                import time
+                from concurrent.futures import ThreadPoolExecutor
+
+                sources = list(sources)
+                batches = [sources[i:i + batch_size] for i in range(0, len(sources), batch_size)]
+                grain = {grain}
+                fanout_cost_s = {dispatch_cost_s!r}
+                pool = []
+
+                def scan(items, seen):
+                    found = {{}}
+                    seen_mask = seen.get
+                    found_mask = found.get
+                    for v, mask in items:
+                        for nbr in graph.get(v, []):
+                            new = mask & ~seen_mask(nbr, 0)
+                            if new:
+                                found[nbr] = found_mask(nbr, 0) | new
+                    return found
+
+                def sweep(batch, split):
+                    seen = {{}}
+                    depths = [{{src: 0}} for src in batch]
+                    for i, src in enumerate(batch):
+                        seen[src] = seen.get(src, 0) | (1 << i)
+                    visit = dict(seen)
+                    level = 0
+                    item_cost_s = 0.0
+                    while visit:
+                        level += 1
+                        items = list(visit.items())
+                        chunks = [items[i:i + grain] for i in range(0, len(items), grain)]
+                        if split and len(chunks) > 1 and item_cost_s * len(items) > fanout_cost_s * len(chunks):
+                            if not pool:
+                                pool.append(ThreadPoolExecutor(max_workers={decision.workers}))
+                            found = {{}}
+                            for part in pool[0].map(lambda chunk: scan(chunk, seen), chunks):
+                                for nbr, mask in part.items():
+                                    found[nbr] = found.get(nbr, 0) | mask
+                        else:
+                            began = time.perf_counter()
+                            found = scan(items, seen)
+                            item_cost_s = (time.perf_counter() - began) / len(items)
+                        for nbr, mask in found.items():
+                            seen[nbr] = seen.get(nbr, 0) | mask
+                            while mask:
+                                low = mask & -mask
+                                depths[low.bit_length() - 1][nbr] = level
+                                mask ^= low
+                        visit = found
+                    return depths
+
+                try:
+                    if len(batches) > 1:
+                        # Batches already keep every worker busy; splitting levels too would nest pool waits.
+                        pool.append(ThreadPoolExecutor(max_workers={decision.workers}))
+                        results = list(pool[0].map(lambda batch: sweep(batch, False), batches))
+                    else:
+                        results = [sweep(batch, True) for batch in batches]
+                finally:
+                    if pool:
+                        pool[0].shutdown()
+                return [depth_map for batch_depths in results for depth_map in batch_depths]
+            """
+        )
+
+    def _render_multi_sssp(self, decision: StrategyDecision, func_name: str) -> str:
+        orig = decision.candidate.function_name
+        grain = max(1, decision.granularity)
+        workers = decision.workers or 4
+        if decision.candidate.traversal_type == "dijkstra":
+            kernel_doc = "Dijkstra from vertex index src over the CSR arrays"
+            kernel_body = """
+                import heapq
+
+                pq = [(0.0, src)]
+                while pq:
+                    d, u = heapq.heappop(pq)
+                    if d > dist[u]:
+                        continue
+                    for k in range(offsets[u], offsets[u + 1]):
+                        nd = d + weights[k]
+                        if nd < dist[targets[k]]:
+                            dist[targets[k]] = nd
+                            heapq.heappush(pq, (nd, targets[k]))"""
+        else:
+            kernel_doc = "Bellman-Ford from vertex index src over the CSR arrays, in the original's edge order"
+            kernel_body = """
+                inf = float('inf')
+                for _ in range(n - 1):
+                    changed = False
+                    for u in range(n):
+                        if dist[u] == inf:
+                            continue
+                        for k in range(offsets[u], offsets[u + 1]):
+                            if dist[u] + weights[k] < dist[targets[k]]:
+                                dist[targets[k]] = dist[u] + weights[k]
+                                changed = True
+                    if not changed:
+                        break"""
+        kernel_body = dedent(kernel_body).strip("\n").replace("\n", "\n" + " " * 16)
+        reordered = self.reorder in self.REORDERINGS
+        packed = "packed" if reordered else "nodes"
+        relabel = [
+            f"layout = _{func_name}_layout\n"
+            "if not layout or layout[0] is not graph or layout[1] != nodes:\n"
+            "    # The permutation depends only on the node set, so each graph is relabeled once.\n"
+            f"    layout[:] = [graph, nodes, _{func_name}_relabel(graph, nodes)]\n"
+            "packed = [nodes[old] for old in layout[2]]"
+        ] if reordered else []
+        # Rows come back in packed order; callers index them by the graph's key order.
+        restore = "[array('d', map(row.__getitem__, place)) for row in rows]" if reordered else "rows"
+        place = ["place = [index[node] for node in nodes]"] if reordered else []
+        layout_doc = (
+            f"\n\n{' ' * 16}Vertices are packed in {self.REORDERINGS[self.reorder]} order for locality; the\n"
+            f"{' ' * 16}permutation is cached with the graph and rows are translated back before returning."
+        ) if reordered else ""
+        return (self._render_relabel(func_name) if reordered else "") + dedent(
+            f"""
+            _{func_name}_pool = []{self._splice_after([f"_{func_name}_layout = []"] if reordered else [], 12)}
+
+
+            def _{func_name}_kernel(offsets, targets, weights, n, src):
+                '''{kernel_doc}; returns an array('d') of distances.'''
+                from array import array
+
+                dist = array('d', [float('inf')]) * n
+                dist[src] = 0.0
+                {kernel_body}
+                return dist
+
+
+            def _{func_name}_serve(conn, parent_ends):
+                '''Worker loop: maps the parent's shared CSR segment once and streams one distance row per source.'''
+                from multiprocessing import shared_memory
+
+                for end in parent_ends:
+                    end.close()
+                segment = None
+                views = ()
+                try:
+                    while True:
+                        try:
+                            task = conn.recv()
+                        except EOFError:
+                            break
+                        if task is None:
+                            break
+                        name, n, m, chunk = task
+                        try:
+                            if segment is None or segment.name != name:
+                                for view in views:
+                                    view.release()
+                                if segment is not None:
+                                    segment.close()
+                                segment = shared_memory.SharedMemory(name=name)
+                                edges_at, weights_at = 8 * (n + 1), 8 * (n + 1 + m)
+                                views = (
+                                    segment.buf[:edges_at].cast('q'),
+                                    segment.buf[edges_at:weights_at].cast('q'),
+                                    segment.buf[weights_at:weights_at + 8 * m].cast('d'),
+                                )
+                            for position, src in chunk:
+                                conn.send((position, _{func_name}_kernel(*views, n, src).tobytes()))
+                            conn.send(None)
+                        except Exception as exc:
+                            conn.send(RuntimeError(repr(exc)))
+                finally:
+                    for view in views:
+                        view.release()
+                    if segment is not None:
+                        segment.close()
+
+
+            def _{func_name}_shutdown():
+                for proc, conn in _{func_name}_pool:
+                    try:
+                        conn.send(None)
+                    except OSError:
+                        pass
+                    proc.join(1.0)
+                    if proc.is_alive():
+                        proc.terminate()
+                    conn.close()
+                _{func_name}_pool.clear()
+
+
+            def {func_name}(graph, sources):
+                '''Batched single-source shortest paths: one {orig} per source, spread over a persistent process pool.
+
+                Returns (nodes, rows): rows[i] is an array('d') of distances from sources[i],
+                index-aligned with nodes (the graph's key order), with inf for unreachable nodes.
+                The graph is packed once into CSR arrays in a shared memory segment that every
+                worker maps read-only, so it is never pickled per source. Workers are forked on
+                first use and kept for later calls. The first source runs inline and prices the
+                rest; the pool is used only when that work outweighs process dispatch.{layout_doc}
+                '''
+                import atexit
+                import math
+                import multiprocessing
+                import os
+                import time
+                from array import array
+                from collections import deque
+                from multiprocessing import shared_memory
+                from multiprocessing.connection import wait
+
+                nodes = list(graph){self._splice_after(relabel, 16)}
+                index = {{node: i for i, node in enumerate({packed})}}
+                n = len(nodes)
+                offsets, targets, weights = array('q', [0]), array('q'), array('d')
+                for node in {packed}:
+                    for nbr, weight in graph[node].items():
+                        targets.append(index[nbr])
+                        weights.append(weight)
+                    offsets.append(len(targets))
+                m = len(targets)
+                starts = [index[src] for src in sources]
+                rows = [None] * len(starts){self._splice_after(place, 16)}
+                if not starts:
+                    return nodes, rows
+
+                began = time.perf_counter()
+                rows[0] = _{func_name}_kernel(offsets, targets, weights, n, starts[0])
+                item_cost_s = time.perf_counter() - began
+                pending = list(enumerate(starts))[1:]
+                # The kernel is pure CPU work; processes beyond the core count only add dispatch.
+                workers = min({workers}, len(pending), os.cpu_count() or 1)
+                grain = max({grain}, math.ceil(len(pending) / (4 * max(1, workers))))
+                chunks = deque(pending[i:i + grain] for i in range(0, len(pending), grain))
+                pool = _{func_name}_pool
+                startup_s = 0.0 if len(pool) >= workers else {self.PROCESS_STARTUP_S!r}
+                fan_out = (
+                    "fork" in multiprocessing.get_all_start_methods()
+                    and workers > 1
+                    and item_cost_s * len(pending) > {self.FANOUT_FACTOR!r} * ({self.PROCESS_DISPATCH_S!r} * len(chunks) + startup_s)
+                )
+                if not fan_out:
+                    for position, src in pending:
+                        rows[position] = _{func_name}_kernel(offsets, targets, weights, n, src)
+                    return nodes, {restore}
+
+                segment = shared_memory.SharedMemory(create=True, size=8 * (n + 1 + 2 * m))
+                try:
+                    edges_at, weights_at = 8 * (n + 1), 8 * (n + 1 + m)
+                    segment.buf[:edges_at] = offsets.tobytes()
+                    segment.buf[edges_at:weights_at] = targets.tobytes()
+                    segment.buf[weights_at:weights_at + 8 * m] = weights.tobytes()
+                    if len(pool) < workers or not all(proc.is_alive() for proc, _ in pool):
+                        _{func_name}_shutdown()
+                        atexit.unregister(_{func_name}_shutdown)
+                        atexit.register(_{func_name}_shutdown)
+                        ctx = multiprocessing.get_context("fork")
+                        for _ in range(workers):
+                            parent_end, child_end = ctx.Pipe()
+                            # Forked after the segment exists, so workers share our resource tracker.
+                            # Each worker closes every parent end it inherits, so all of them see EOF if we die.
+                            ends = [conn for _, conn in pool] + [parent_end]
+                            proc = ctx.Process(target=_{func_name}_serve, args=(child_end, ends), daemon=True)
+                            proc.start()
+                            child_end.close()
+                            pool.append((proc, parent_end))
+                    busy = {{}}
+                    for proc, conn in pool:
+                        if chunks:
+                            conn.send((segment.name, n, m, chunks.popleft()))
+                            busy[conn] = proc
+                    while busy:
+                        for conn in wait(list(busy)):
+                            try:
+                                message = conn.recv()
+                            except EOFError:
+                                raise RuntimeError(f"shortest-path worker {{busy[conn].pid}} exited")
+                            if isinstance(message, Exception):
+                                raise message
+                            if message is not None:
+                                position, data = message
+                                rows[position] = array('d')
+                                rows[position].frombytes(data)
+                            elif chunks:
+                                conn.send((segment.name, n, m, chunks.popleft()))
+                            else:
+                                del busy[conn]
+                except BaseException:
+                    # Workers may still be mid-chunk; stale rows must not leak into the next call.
+                    _{func_name}_shutdown()
+                    raise
+                finally:
+                    segment.close()
+                    segment.unlink()
+                return nodes, {restore}
+            """
+        )
+
+    def _render_spans(self, func_name: str) -> str:
+        """Contiguous frontier chunks balanced by edge count, for templates whose merge needs frontier order."""
+        return dedent(
+            f"""
+            def _{func_name}_spans(graph, frontier, count):
+                '''Cuts frontier into at most count contiguous chunks of about equal edge counts.
+
+                Equal node counts leave one worker holding a hub with most of a level's edges. Cutting
+                at equal prefix sums of out-degree evens the tasks without reordering the frontier,
+                which the first-discoverer merge relies on.
+                '''
+                from bisect import bisect_left
+                from itertools import accumulate
+
+                loads = list(accumulate(len(graph.get(node, ())) + 1 for node in frontier))
+                bounds = [0]
+                for k in range(1, count):
+                    bounds.append(max(bounds[-1], bisect_left(loads, loads[-1] * k / count) + 1))
+                bounds.append(len(frontier))
+                return [frontier[a:b] for a, b in zip(bounds, bounds[1:]) if a < b]
+            """
+        ) + "\n"
+
+    def _render_partition(self, func_name: str) -> str:
+        """A vertex partitioner for templates that hand each worker the edges into its vertices."""
+        return dedent(
+            f"""
+            def _{func_name}_partition(graph, parts):
+                '''Assigns every vertex to one of parts workers, balancing in-edges and cutting few edges.
+
+                Vertices are laid out breadth-first and cut into contiguous blocks of about equal
+                in-degree, so hubs do not pile into one block. That degree-balanced split is the
+                fallback for small inputs; otherwise size-capped label propagation refines it, moving
+                a vertex to the block most of its neighbors are in when that block has room. Every
+                move cuts fewer edges, so workers mostly read distances they write themselves.
+                '''
+                nodes = list(graph)
+                links = {{node: [] for node in nodes}}
+                load = dict.fromkeys(nodes, 0)
+                for u in nodes:
+                    for v in graph[u]:
+                        if v in links:
+                            links[u].append(v)
+                            links[v].append(u)
+                            load[v] += 1
+                layout = []
+                seen = set()
+                for root in nodes:
+                    if root in seen:
+                        continue
+                    seen.add(root)
+                    queue = [root]
+                    for u in queue:
+                        for v in links[u]:
+                            if v not in seen:
+                                seen.add(v)
+                                queue.append(v)
+                    layout.extend(queue)
+                target = sum(load.values()) / max(1, parts)
+                owner = {{}}
+                block, filled = 0, 0
+                for node in layout:
+                    if block < parts - 1 and filled >= target * (block + 1):
+                        block += 1
+                    owner[node] = block
+                    filled += load[node]
+                if parts < 2 or len(nodes) < {self.PARTITION_MIN_VERTICES} * parts:
+                    return owner
+
+                sizes = [0] * parts
+                for node in nodes:
+                    sizes[owner[node]] += load[node]
+                cap = max(target * {1 + self.PARTITION_SLACK!r}, 1)
+                for _ in range({self.PARTITION_ROUNDS}):
+                    moved = False
+                    for v in layout:
+                        here = owner[v]
+                        counts = {{}}
+                        for u in links[v]:
+                            counts[owner[u]] = counts.get(owner[u], 0) + 1
+                        best = max(counts, key=counts.get, default=here)
+                        if counts.get(best, 0) > counts.get(here, 0) and sizes[best] + load[v] <= cap:
+                            sizes[here] -= load[v]
+                            sizes[best] += load[v]
+                            owner[v] = best
+                            moved = True
+                    if not moved:
+                        break
+                return owner
+            """
+        ) + "\n"
+
+    def _render_relabel(self, func_name: str) -> str:
+        """The chosen vertex ordering as a helper returning, for each new label, the old index."""
+        if self.reorder == "degree":
+            body = """
+                # Hubs first: the vertices most edges touch end up sharing cache lines.
+                degree = [len(targets) for targets in adjacency]
+                for targets in adjacency:
+                    for v in targets:
+                        degree[v] += 1
+                return sorted(range(len(nodes)), key=lambda v: -degree[v])"""
+        elif self.reorder == "bfs":
+            body = """
+                # Each vertex follows the one that discovered it, so a frontier's neighbors sit close.
+                seen = [False] * len(nodes)
+                order = []
+                for root in range(len(nodes)):
+                    if seen[root]:
+                        continue
+                    seen[root] = True
+                    queue = [root]
+                    for u in queue:
+                        for v in adjacency[u]:
+                            if not seen[v]:
+                                seen[v] = True
+                                queue.append(v)
+                    order.extend(queue)
+                return order"""
+        else:
+            body = """
+                # Cuthill-McKee on the undirected structure: each component starts at a vertex of
+                # least degree and neighbors are taken in ascending degree; reversing narrows the
+                # bandwidth, so most edges join nearby labels.
+                links = [set(targets) for targets in adjacency]
+                for u, targets in enumerate(adjacency):
+                    for v in targets:
+                        links[v].add(u)
+                degree = [len(link) for link in links]
+                seen = [False] * len(nodes)
+                order = []
+                for root in sorted(range(len(nodes)), key=lambda v: (degree[v], v)):
+                    if seen[root]:
+                        continue
+                    seen[root] = True
+                    queue = [root]
+                    for u in queue:
+                        for v in sorted(links[u], key=lambda v: (degree[v], v)):
+                            if not seen[v]:
+                                seen[v] = True
+                                queue.append(v)
+                    order.extend(queue)
+                order.reverse()
+                return order"""
+        body = dedent(body).strip("\n").replace("\n", "\n" + " " * 16)
+        name = self.REORDERINGS[self.reorder]
+        return dedent(
+            f"""
+            def _{func_name}_relabel(graph, nodes):
+                '''{name[0].upper() + name[1:]} vertex order: the original index of each new label.'''
+                index = {{node: i for i, node in enumerate(nodes)}}
+                adjacency = [[index[nbr] for nbr in graph[node]] for node in nodes]
+                {body}
+            """
+        ) + "\n"
+
+    def _render_dynamic_sssp(self, decision: StrategyDecision, func_name: str) -> str:
+        orig = decision.candidate.function_name
+        grain = max(1, decision.granularity)
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        if decision.candidate.traversal_type == "dijkstra":
+            # With non-negative weights a heap settles each node once; rounds would re-relax many.
+            build = """
+                import heapq
+
+                dist, parents = self.distances, self.parents
+                pq = [(0, start)]
+                while pq:
+                    d, u = heapq.heappop(pq)
+                    if d > dist[u]:
+                        continue
+                    for v, w in self.graph.get(u, {}).items():
+                        if d + w < dist[v]:
+                            dist[v] = d + w
+                            parents[v] = u
+                            heapq.heappush(pq, (d + w, v))
+                for v, u in parents.items():
+                    if u is not None:
+                        self.children.setdefault(u, set()).add(v)"""
+        else:
+            build = """
+                self._repair([start], {})"""
+        build = dedent(build).strip("\n").replace("\n", "\n" + " " * 20)
+        return dedent(
+            f"""
+            class _{func_name}_Tree:
+                '''Shortest-path tree from one source of {orig} that repairs itself after edge changes.
+
+                distances matches {orig}(graph, start), and parents[v] is v's predecessor on a shortest
+                path. update() applies a batch of edge changes to the graph and recomputes only the nodes
+                those changes can reach (Ramalingam-Reps). A heavier or removed tree edge invalidates
+                the subtree below it, which is reseeded from its surviving in-neighbors. A lighter or new
+                edge seeds relaxation at its tail. Repair runs in label-correcting rounds, and a round's
+                frontier fans out to threads in chunks of {grain} when its measured work outweighs dispatch.
+                '''
+
+                def __init__(self, graph, start):
+                    self.graph = graph
+                    self.start = start
+                    self.distances = {{node: float('infinity') for node in graph}}
+                    self.distances[start] = 0
+                    self.parents = {{node: None for node in graph}}
+                    self.children = {{}}
+                    self.incoming = {{}}
+                    for u, edges in graph.items():
+                        for v, w in edges.items():
+                            self.incoming.setdefault(v, {{}})[u] = w
+                    self._build(start)
+
+                def _build(self, start):
+                    {build}
+
+                def update(self, changes):
+                    '''Applies (u, v, weight) edge changes, weight None deleting the edge.
+
+                    Mutates the graph in place and returns the nodes whose distance changed.
+                    '''
+                    graph, dist, parents = self.graph, self.distances, self.parents
+                    invalid, tails = [], []
+                    for u, v, w in changes:
+                        for node in (u, v):
+                            if node not in graph:
+                                graph[node] = {{}}
+                            if node not in dist:
+                                dist[node] = float('infinity')
+                                parents[node] = None
+                        old = graph[u].get(v)
+                        if w is None:
+                            graph[u].pop(v, None)
+                            self.incoming.get(v, {{}}).pop(u, None)
+                        else:
+                            graph[u][v] = w
+                            self.incoming.setdefault(v, {{}})[u] = w
+                        # An edge deleted earlier in the batch comes back as an insert (old is None),
+                        # even though parents[v] still names u until the repair below.
+                        if parents[v] == u and (w is None or (old is not None and w > old)):
+                            invalid.append(v)
+                        elif w is not None and (old is None or w < old):
+                            tails.append(u)
+
+                    before = {{}}
+                    stale = set()
+                    stack = invalid
+                    while stack:
+                        node = stack.pop()
+                        if node not in stale:
+                            stale.add(node)
+                            stack.extend(self.children.get(node, ()))
+                    for node in stale:
+                        before[node] = dist[node]
+                        dist[node] = float('infinity')
+                        self._reparent(node, None)
+                    # Surviving in-neighbors of the invalidated region carry it back in on the first round.
+                    frontier = [p for node in stale for p in self.incoming.get(node, {{}}) if p not in stale]
+                    self._repair(frontier + tails, before)
+                    return [node for node, d in before.items() if dist[node] != d]
+
+                def _reparent(self, node, parent):
+                    old = self.parents.get(node)
+                    if old is not None:
+                        self.children[old].discard(node)
+                    self.parents[node] = parent
+                    if parent is not None:
+                        self.children.setdefault(parent, set()).add(node)
+
+                def _repair(self, frontier, before):
+                    import time
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    graph, dist = self.graph, self.distances
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+
+                    def relax(items):
+                        # Reads only: every chunk of a round sees the same distances.
+                        proposals = {{}}
+                        for u in items:
+                            du = dist[u]
+                            if du == float('infinity'):
+                                continue
+                            for v, w in graph.get(u, {{}}).items():
+                                nd = du + w
+                                if nd < dist[v] and (v not in proposals or nd < proposals[v][0]):
+                                    proposals[v] = (nd, u)
+                        return proposals
+
+                    try:
+                        rounds = 0
+                        # More rounds than nodes can only mean a negative cycle; stop where Bellman-Ford would.
+                        while frontier and rounds < len(dist):
+                            rounds += 1
+                            items = list(dict.fromkeys(frontier))
+                            chunks = [items[i:i + grain] for i in range(0, len(items), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(items) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={decision.workers}))
+                                parts = list(pool[0].map(relax, chunks))
+                            else:
+                                began = time.perf_counter()
+                                parts = [relax(items)]
+                                item_cost_s = (time.perf_counter() - began) / len(items)
+                            frontier = []
+                            for proposals in parts:
+                                for v, (nd, u) in proposals.items():
+                                    if nd < dist[v]:
+                                        before.setdefault(v, dist[v])
+                                        dist[v] = nd
+                                        self._reparent(v, u)
+                                        frontier.append(v)
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
+
+
+            def {func_name}(graph, start):
+                '''Builds a repairable shortest-path tree; see _{func_name}_Tree.update for edge changes.'''
+                return _{func_name}_Tree(graph, start)
+            """
+        )
+
+    def _prepare_search(self, decision: StrategyDecision, parallel_func_name: str) -> str:
+        """Renders the goal-aware variant with the original's signature; empty when its locals would clash."""
+        func_name = f"{parallel_func_name}_search"
+        split = self.splitter.split(decision.candidate)
+        # The asyncio entry point's helper is a coroutine, so the search renders a plain one of its own.
+        visit_name = func_name if decision.strategy == "asyncio" else parallel_func_name
+        rendered = self._render_search(decision, func_name, f"{parallel_func_name}_path", split, visit_name)
+        stores = self._stores(rendered, func_name)
+        if {p for p in split.extras if stores.get(p)} | {n for n in split.setup_names if stores.get(n, 0) > 1}:
+            return ""
+        return "\n" + self._transplant(rendered, func_name, decision.candidate.function_name, split)
+
+    def _render_search(
+        self, decision: StrategyDecision, func_name: str, path_func_name: str, split: FunctionSplit, visit_name: str
+    ) -> str:
+        grain = max(1, decision.granularity)
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        traversal = decision.candidate.traversal_type
+        # Without per-node work the helper and every hook below render empty.
+        visit = bool(split.visit)
+        helper = self._render_visit(decision, visit_name, split, None) if visit and visit_name == func_name else ""
+        state = (split.setup + ["visit_cost_s = 0.0", "futures = []"]) if visit else []
+        hook = self._visit_block(visit_name, split, traversal, decision.workers) if visit else []
+        drain = ["for future in futures:\n    future.result()"] if visit else []
+        path = dedent(
+            f"""
+            def {path_func_name}(parents, target):
+                '''Rebuilds the start -> target path from {func_name}'s predecessor map; [] if target was not reached.'''
+                if target not in parents:
+                    return []
+                path = [target]
+                while parents[path[-1]] is not None:
+                    path.append(parents[path[-1]])
+                path.reverse()
+                return path
+            """
+        )
+        if traversal == "bfs":
+            return path + helper + dedent(
+                f"""
+                def {func_name}(graph, start, targets=None):
+                    '''Goal-aware BFS: stops as soon as every target is dequeued.
+
+                    Returns (order, parents). order is the prefix of {decision.candidate.function_name}'s visit order
+                    that ends at the last target (the full order without targets), and parents maps every
+                    discovered node to the node that first discovered it, start to None. The original's
+                    per-node work runs for every node in order, as in parallel_{decision.candidate.function_name}.
+                    Levels expand in thread chunks of {grain} when their measured work outweighs dispatch.
+                    '''
+                    import time
+                    from concurrent.futures import ThreadPoolExecutor
+                    from itertools import accumulate
+
+                    remaining = set(targets) if targets is not None else None
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+                    parents = {{start: None}}
+                    order = []
+                    frontier = [start]{self._splice_after(state, 20)}
+
+                    def expand(chunk):
+                        seen = set()
+                        buffer = []
+                        for node in chunk:
+                            for nbr in graph.get(node, []):
+                                if nbr not in parents and nbr not in seen:
+                                    seen.add(nbr)
+                                    buffer.append((nbr, node))
+                        return buffer
+
+                    try:
+                        while frontier:
+                            found = False
+                            if remaining is not None:
+                                for i, node in enumerate(frontier):
+                                    remaining.discard(node)
+                                    if not remaining:
+                                        frontier, found = frontier[:i + 1], True
+                                        break
+                            order.extend(frontier){self._splice_after(["for node in frontier:"] if visit else [], 28)}{self._splice_after(hook, 32)}
+                            if found:
+                                break
+                            chunks = [frontier[i:i + grain] for i in range(0, len(frontier), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(frontier) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={decision.workers}))
+                                buffers = list(pool[0].map(expand, chunks))
+                            else:
+                                began = time.perf_counter()
+                                buffers = [expand(chunk) for chunk in chunks]
+                                item_cost_s = (time.perf_counter() - began) / len(frontier)
+                            offsets = [0, *accumulate(len(buffer) for buffer in buffers)]
+                            merged = [None] * offsets[-1]
+                            for offset, buffer in zip(offsets, buffers):
+                                merged[offset:offset + len(buffer)] = buffer
+                            next_frontier = []
+                            for nbr, parent in merged:
+                                if nbr not in parents:
+                                    parents[nbr] = parent
+                                    next_frontier.append(nbr)
+                            frontier = next_frontier{self._splice_after(drain, 24)}
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
+                    return order, parents
+                """
             )
+        return path + helper + dedent(
+            f"""
+            def {func_name}(graph, start, targets=None):
+                '''Goal-aware Dijkstra: stops as soon as every target is settled.
 
-    def _output_path(self, src_path: Path) -> Path:
-        return self.output_dir / f"parallel_{src_path.name}"
+                Returns (distances, parents) over the settled nodes only, so the result is proportional
+                to the explored ball. Without targets, distances equals {decision.candidate.function_name}'s output
+                restricted to reachable nodes. Early stopping assumes non-negative weights. The original's
+                per-node work runs for every settled node, the last target included. A settled node's
+                neighbors are relaxed in thread chunks of {grain} when that outweighs dispatch.
+                '''
+                import heapq
+                import threading
+                import time
+                from concurrent.futures import ThreadPoolExecutor
+
+                remaining = set(targets) if targets is not None else None
+                grain = {grain}
+                fanout_cost_s = {dispatch_cost_s!r}
+                item_cost_s = 0.0
+                pool = []
+                tentative = {{start: 0}}
+                tentative_parents = {{start: None}}
+                distances = {{}}
+                pq = [(0, start)]
+                lock = threading.Lock(){self._splice_after(state, 16)}
+
+                def relax(current_dist, current_node, items):
+                    for neighbor, weight in items:
+                        distance = current_dist + weight
+                        with lock:
+                            if neighbor not in tentative or distance < tentative[neighbor]:
+                                tentative[neighbor] = distance
+                                tentative_parents[neighbor] = current_node
+                                heapq.heappush(pq, (distance, neighbor))
+
+                try:
+                    while pq:
+                        current_dist, current_node = heapq.heappop(pq)
+                        if current_dist > tentative[current_node]:
+                            continue
+                        distances[current_node] = current_dist{self._splice_after(hook, 24)}
+                        if remaining is not None:
+                            remaining.discard(current_node)
+                            if not remaining:
+                                break
+                        items = list(graph.get(current_node, {{}}).items())
+                        chunks = [items[i:i + grain] for i in range(0, len(items), grain)]
+                        if len(chunks) > 1 and item_cost_s * len(items) > fanout_cost_s * len(chunks):
+                            if not pool:
+                                pool.append(ThreadPoolExecutor(max_workers={decision.workers}))
+                            list(pool[0].map(relax, [current_dist] * len(chunks), [current_node] * len(chunks), chunks))
+                        else:
+                            began = time.perf_counter()
+                            relax(current_dist, current_node, items)
+                            item_cost_s = (time.perf_counter() - began) / max(1, len(items)){self._splice_after(drain, 20)}
+                finally:
+                    if pool:
+                        pool[0].shutdown()
+                return distances, {{node: tentative_parents[node] for node in distances}}
+            """
+        )
 
-    def _render_template(self, decision: StrategyDecision, parallel_func_name: str) -> str:
+    def _render_async(self, decision: StrategyDecision, parallel_func_name: str) -> str:
         traversal = decision.candidate.traversal_type
+        orig = decision.candidate.function_name
+        limit = decision.workers or self.ASYNC_LIMIT
+        profile = decision.work_profile
+        if profile is not None and profile.io_calls and all(call.split(".")[-1] == "sleep" for call in profile.io_calls):
+            visit_body = f"await asyncio.sleep({profile.io_cost_s!r})"
+            visit_doc = f"Awaits the {profile.io_cost_s * 1e3:g}ms the original sleeps per node, without blocking the loop."
+        else:
+            visit_body = "return None"
+            visit_doc = "No awaitable per-node work was recognized in the original; pass visit= to supply it."
+        visit = dedent(
+            f"""
+            async def _{parallel_func_name}_visit(node):
+                '''{visit_doc}'''
+                import asyncio
+
+                {visit_body}
+            """
+        )
+        entry = dedent(
+            f"""
+            def {parallel_func_name}(graph, start, visit=None):
+                '''Sync entry point: runs {parallel_func_name}_async on a fresh event loop.'''
+                import asyncio
+
+                if len(graph) < {decision.inline_below_nodes}:
+                    return {orig}(graph, start)
+                return asyncio.run({parallel_func_name}_async(graph, start, visit))
+            """
+        )
         if traversal == "bfs":
+            body = dedent(
+                f"""
+                async def {parallel_func_name}_async(graph, start, visit=None, limit={limit}):
+                    '''Asyncio BFS: each level's per-node work runs concurrently, at most limit in flight.
+
+                    visit(node) is an async callable for the per-node work. The traversal state is
+                    only touched on the event loop's thread between awaits, so it needs no locks.
+                    '''
+                    import asyncio
+
+                    visit = visit or _{parallel_func_name}_visit
+                    semaphore = asyncio.Semaphore(limit)
+
+                    async def bounded(node):
+                        async with semaphore:
+                            await visit(node)
+
+                    visited = {{start}}
+                    order = []
+                    frontier = [start]
+                    while frontier:
+                        order.extend(frontier)
+                        await asyncio.gather(*(bounded(node) for node in frontier))
+                        next_frontier = []
+                        for node in frontier:
+                            for nbr in graph.get(node, []):
+                                if nbr not in visited:
+                                    visited.add(nbr)
+                                    next_frontier.append(nbr)
+                        frontier = next_frontier
+                    return order
+                """
+            )
+        elif traversal == "dfs":
+            body = dedent(
+                f"""
+                async def {parallel_func_name}_async(graph, start, visit=None, limit={limit}):
+                    '''Asyncio DFS: the stack walk stays sequential and each visited node's work is started
+                    as a task, at most limit in flight. The visit order does not depend on that work, so
+                    the result equals {orig}'s and no locks are needed.
+                    '''
+                    import asyncio
+
+                    visit = visit or _{parallel_func_name}_visit
+                    semaphore = asyncio.Semaphore(limit)
+                    tasks = []
+
+                    async def bounded(node):
+                        try:
+                            await visit(node)
+                        finally:
+                            semaphore.release()
+
+                    visited = set()
+                    order = []
+                    stack = [start]
+                    while stack:
+                        node = stack.pop()
+                        if node in visited:
+                            continue
+                        visited.add(node)
+                        order.append(node)
+                        await semaphore.acquire()
+                        tasks.append(asyncio.create_task(bounded(node)))
+                        for nbr in graph.get(node, []):
+                            if nbr not in visited:
+                                stack.append(nbr)
+                    await asyncio.gather(*tasks)
+                    return order
+                """
+            )
+        else:
+            body = dedent(
+                f"""
+                async def {parallel_func_name}_async(graph, start, visit=None, limit={limit}):
+                    '''Asyncio Dijkstra: nodes settle sequentially and each settled node's work is started
+                    as a task, at most limit in flight. Distances do not depend on that work, so the
+                    result equals {orig}'s and no locks are needed.
+                    '''
+                    import asyncio
+                    import heapq
+
+                    visit = visit or _{parallel_func_name}_visit
+                    semaphore = asyncio.Semaphore(limit)
+                    tasks = []
+
+                    async def bounded(node):
+                        try:
+                            await visit(node)
+                        finally:
+                            semaphore.release()
+
+                    distances = {{node: float('infinity') for node in graph}}
+                    distances[start] = 0
+                    pq = [(0, start)]
+                    while pq:
+                        current_dist, current_node = heapq.heappop(pq)
+                        if current_dist > distances[current_node]:
+                            continue
+                        await semaphore.acquire()
+                        tasks.append(asyncio.create_task(bounded(current_node)))
+                        for neighbor, weight in graph.get(current_node, {{}}).items():
+                            distance = current_dist + weight
+                            if distance < distances[neighbor]:
+                                distances[neighbor] = distance
+                                heapq.heappush(pq, (distance, neighbor))
+                    await asyncio.gather(*tasks)
+                    return distances
+                """
+            )
+        return visit + body + entry
+
+    def _render_free_threaded(
+        self,
+        decision: StrategyDecision,
+        parallel_func_name: str,
+        split: Optional[FunctionSplit],
+        plan: Optional[ReductionPlan],
+    ) -> str:
+        traversal = decision.candidate.traversal_type
+        if traversal == "bfs":
+            # The BFS template already expands into per-chunk buffers and only reads shared state
+            # during a level, which is as safe without a GIL as with one.
+            return self._render_template(replace(decision, strategy="threads"), parallel_func_name, split, plan)
+        orig = decision.candidate.function_name
+        grain = max(1, decision.granularity)
+        workers = decision.workers or "os.cpu_count() or 4"
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        if traversal == "dijkstra":
             return dedent(
                 f"""
                 def {parallel_func_name}(graph, start):
-                    '''Parallel BFS using thread workers for neighbor expansion.'''
+                    '''Free-threaded Dijkstra: a settled node's neighbors relax in parallel thread chunks of {grain}.
+
+                    Distance updates take one of {self.LOCK_STRIPES} striped locks picked by the neighbor's hash, so
+                    chunks never contend on one global lock; each chunk pushes its improvements under
+                    the heap lock in one batch. Chunks fan out only when their measured work outweighs dispatch.
+                    '''
+                    import heapq
+                    import os
+                    import threading
+                    import time
                     from concurrent.futures import ThreadPoolExecutor
 
+                    if len(graph) < {decision.inline_below_nodes}:
+                        return {orig}(graph, start)
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+                    distances = {{node: float('infinity') for node in graph}}
+                    distances[start] = 0
+                    pq = [(0, start)]
+                    stripes = [threading.Lock() for _ in range({self.LOCK_STRIPES})]
+                    heap_lock = threading.Lock()
+
+                    def relax(current_dist, items):
+                        pushes = []
+                        for neighbor, weight in items:
+                            distance = current_dist + weight
+                            with stripes[hash(neighbor) % {self.LOCK_STRIPES}]:
+                                if distance < distances[neighbor]:
+                                    distances[neighbor] = distance
+                                    pushes.append((distance, neighbor))
+                        with heap_lock:
+                            for item in pushes:
+                                heapq.heappush(pq, item)
+
+                    try:
+                        while pq:
+                            current_dist, current_node = heapq.heappop(pq)
+                            if current_dist > distances[current_node]:
+                                continue
+                            items = list(graph.get(current_node, {{}}).items())
+                            chunks = [items[i:i + grain] for i in range(0, len(items), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(items) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={workers}))
+                                list(pool[0].map(relax, [current_dist] * len(chunks), chunks))
+                            else:
+                                began = time.perf_counter()
+                                relax(current_dist, items)
+                                item_cost_s = (time.perf_counter() - began) / max(1, len(items))
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
+                    return distances
+                """
+            )
+        return self._render_partition(parallel_func_name) + dedent(
+            f"""
+            def {parallel_func_name}(graph, start):
+                '''Free-threaded Bellman-Ford: edges are partitioned by destination, one partition per thread.
+
+                Partitions balance edge counts and cut few edges, and each is the only writer of its
+                destinations' distances, so rounds need no locks.
+                A read of another partition's distance sees an old or a new upper bound, and relaxing
+                with either is valid. Rounds fan out only when their measured work outweighs dispatch.
+                '''
+                import os
+                import time
+                from concurrent.futures import ThreadPoolExecutor
+
+                if len(graph) < {decision.inline_below_nodes}:
+                    return {orig}(graph, start)
+                fanout_cost_s = {dispatch_cost_s!r}
+                item_cost_s = 0.0
+                pool = []
+                distances = {{node: float('infinity') for node in graph}}
+                distances[start] = 0
+                num_workers = {workers}
+                owner = _{parallel_func_name}_partition(graph, num_workers)
+                partitions = [[] for _ in range(num_workers)]
+                for u in graph:
+                    for v, w in graph[u].items():
+                        partitions[owner[v]].append((u, v, w))
+                partitions = [edges for edges in partitions if edges]
+                num_edges = sum(len(edges) for edges in partitions)
+
+                def relax_partition(edges):
+                    changed = False
+                    for u, v, w in edges:
+                        if distances[u] + w < distances[v]:
+                            distances[v] = distances[u] + w
+                            changed = True
+                    return changed
+
+                try:
+                    for _ in range(len(graph) - 1):
+                        if len(partitions) > 1 and item_cost_s * num_edges > fanout_cost_s * len(partitions):
+                            if not pool:
+                                pool.append(ThreadPoolExecutor(max_workers=num_workers))
+                            changed = list(pool[0].map(relax_partition, partitions))
+                        else:
+                            began = time.perf_counter()
+                            changed = [relax_partition(edges) for edges in partitions]
+                            item_cost_s = (time.perf_counter() - began) / max(1, num_edges)
+                        if not any(changed):
+                            break
+                finally:
+                    if pool:
+                        pool[0].shutdown()
+                return distances
+            """
+        )
+
+    def _render_memo(self, decision: StrategyDecision, func_name: str, parallel_func_name: str) -> str:
+        spill_path = str(self.memo_spill_dir / func_name) if self.memo_spill_dir is not None else None
+        if decision.candidate.traversal_type in ("dijkstra", "bellman_ford"):
+            # One distance map answers every target of a source, so the target stays out of the key.
+            signature = "graph, start, target=None, graph_version=None"
+            query = "(start,)"
+            call = f"{parallel_func_name}(graph, start)"
+            answer = "result[target] if target is not None else copy.copy(result)"
+        else:
+            signature = "graph, *args, graph_version=None, **kwargs"
+            query = "(args, sorted(kwargs.items()))"
+            call = f"{parallel_func_name}(graph, *args, **kwargs)"
+            answer = "copy.copy(result)"
+        return dedent(
+            f"""
+            class _{func_name}_Memo:
+                '''Size-bounded LRU of {parallel_func_name} results keyed by graph identity; evicted entries spill to a shelve file if one is set.'''
+
+                def __init__(self, maxsize, spill_path):
+                    import threading
+                    from collections import OrderedDict
+
+                    self.maxsize = maxsize
+                    self.spill_path = spill_path
+                    self.entries = OrderedDict()
+                    self.last_graph = None
+                    self.lock = threading.Lock()
+                    self.stats = {{"hits": 0, "misses": 0, "evictions": 0, "spills": 0, "disk_hits": 0}}
+
+                def key(self, graph, version, query):
+                    # O(1) whatever the graph's size: identity, the caller's version and the node count.
+                    # Nothing here sees an in-place edit, which is why callers must supply the version.
+                    return (id(graph), version, len(graph), query)
+
+                def fingerprint(self, graph, version):
+                    # Only spilled entries need a key that outlives the process. repr covers structure and
+                    # weights at C speed and, unlike hash() or id(), is stable across processes; it is
+                    # computed once per graph_version of the same graph object.
+                    import hashlib
+
+                    last = self.last_graph
+                    if version is not None and last is not None and last[0] is graph and last[1] == version:
+                        return last[2]
+                    digest = hashlib.blake2b(repr(graph).encode(), digest_size=16).hexdigest()
+                    self.last_graph = (graph, version, digest) if version is not None else None
+                    return digest
+
+                def get(self, graph, key):
+                    '''Returns (found, result, disk_key); pass disk_key on to put() after a miss.'''
+                    with self.lock:
+                        entry = self.entries.get(key)
+                        # Entries hold their graph, so its id cannot be reused while they are cached.
+                        if entry is not None and entry[0] is graph:
+                            self.entries.move_to_end(key)
+                            self.stats["hits"] += 1
+                            return True, entry[2], entry[1]
+                        disk_key = None
+                        if self.spill_path is not None:
+                            disk_key = repr((self.fingerprint(graph, key[1]), key[3]))
+                            with self._disk() as disk:
+                                found = disk_key in disk
+                                value = disk.pop(disk_key) if found else None
+                            if found:
+                                self.stats["hits"] += 1
+                                self.stats["disk_hits"] += 1
+                                self._insert(key, (graph, disk_key, value))
+                                return True, value, disk_key
+                        self.stats["misses"] += 1
+                        return False, None, disk_key
+
+                def put(self, graph, key, disk_key, value):
+                    with self.lock:
+                        self._insert(key, (graph, disk_key, value))
+
+                def _insert(self, key, entry):
+                    self.entries[key] = entry
+                    self.entries.move_to_end(key)
+                    spilled = []
+                    while len(self.entries) > self.maxsize:
+                        spilled.append(self.entries.popitem(last=False)[1])
+                        self.stats["evictions"] += 1
+                    if spilled and self.spill_path is not None:
+                        with self._disk() as disk:
+                            for _, disk_key, value in spilled:
+                                disk[disk_key] = value
+                        self.stats["spills"] += len(spilled)
+
+                def _disk(self):
+                    import os
+                    import shelve
+
+                    os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                    return shelve.open(self.spill_path)
+
+                def info(self):
+                    with self.lock:
+                        return dict(self.stats, size=len(self.entries), maxsize=self.maxsize)
+
+                def clear(self):
+                    with self.lock:
+                        self.entries.clear()
+                        self.last_graph = None
+                        if self.spill_path is not None:
+                            with self._disk() as disk:
+                                disk.clear()
+                        for name in self.stats:
+                            self.stats[name] = 0
+
+
+            _{func_name}_memo = _{func_name}_Memo({self.memo_size}, {spill_path!r})
+
+
+            def {func_name}({signature}):
+                '''Memoized {parallel_func_name}, keyed by the graph object, graph_version and the query.
+
+                Only the caller knows when a graph was edited in place, so calls without a graph_version
+                go straight to {parallel_func_name} and nothing is cached; bump graph_version on every
+                mutation. Results are copied on the way out, so callers may mutate them freely.
+                {func_name}.cache_info() reports hits, misses, evictions and disk spills.
+                '''
+                import copy
+
+                if graph_version is None:
+                    result = {call}
+                    return {answer}
+                memo = _{func_name}_memo
+                key = memo.key(graph, graph_version, repr({query}))
+                found, result, disk_key = memo.get(graph, key)
+                if not found:
+                    result = {call}
+                    memo.put(graph, key, disk_key, result)
+                return {answer}
+
+
+            {func_name}.cache_info = _{func_name}_memo.info
+            {func_name}.cache_clear = _{func_name}_memo.clear
+            """
+        )
+
+    def _prepare(self, decision: StrategyDecision, parallel_func_name: str) -> Tuple[StrategyDecision, str]:
+        """Fits the decision to what the templates can honor and renders its entry point.
+
+        The entry point keeps the original's signature and runs its per-node work; when either
+        cannot be carried over, the decision falls back to a sequential wrapper.
+        """
+        split = self.splitter.split(decision.candidate, {r.lineno for r in decision.reductions})
+        decision, plan = self._fit(decision, split)
+        rendered = self._render_template(decision, parallel_func_name, split, plan)
+        if split is None or (decision.strategy == "sequential" and not self._stack_ready(decision, split)):
+            return decision, rendered
+        stores = self._stores(rendered, parallel_func_name)
+        clash = sorted(
+            {p for p in split.extras if stores.get(p)}
+            | {name for name in split.setup_names if stores.get(name, 0) > 1}
+        )
+        if clash:
+            decision = replace(
+                decision, strategy="sequential", rationale=f"{', '.join(clash)} would be shadowed by template locals"
+            )
+            return decision, self._render_template(decision, parallel_func_name, replace(split, isolated=False), None)
+        return decision, self._transplant(rendered, parallel_func_name, decision.candidate.function_name, split)
+
+    def _fit(
+        self, decision: StrategyDecision, split: Optional[FunctionSplit]
+    ) -> Tuple[StrategyDecision, Optional[ReductionPlan]]:
+        traversal = decision.candidate.traversal_type
+        if decision.strategy == "sequential" or traversal not in self.NODE_EXPRS:
+            return decision, None
+        if split is None or not split.isolated or self._visit_args(split, self.NODE_EXPRS[traversal]) is None:
+            rationale = "per-node work could not be separated from the traversal"
+            return replace(decision, strategy="sequential", rationale=rationale), None
+        if split.params[0] == "start" or split.params[1] == "graph":
+            return replace(decision, strategy="sequential", rationale="graph and start parameters are swapped"), None
+        if split.visit and (
+            (decision.strategy == "asyncio" and (split.extras or not self._sleeps_only(split)))
+            or (decision.strategy == "free_threads" and traversal in ("dijkstra", "bellman_ford"))
+        ):
+            # Only the threads templates run arbitrary per-node work; asyncio just awaits sleeps.
+            decision = replace(decision, strategy="threads", rationale=f"{decision.rationale}; threads run the per-node work")
+        if decision.strategy == "asyncio" and decision.reductions:
+            # Sleeps still overlap on threads, and only the threads templates split accumulators.
+            decision = replace(decision, strategy="threads", rationale=f"{decision.rationale}; threads split the reductions")
+        if split.recursive and decision.strategy not in ("threads", "free_threads"):
+            decision = replace(decision, strategy="threads", rationale=f"{decision.rationale}; the fork-join DFS runs on threads")
+        if not decision.reductions:
+            return decision, None
+        plan = self._reduction_plan(decision, split)
+        if plan is None:
+            names = ", ".join(r.variable for r in decision.reductions)
+            rationale = f"no {decision.strategy} {traversal} template can split {names}"
+            return replace(decision, strategy="sequential", rationale=rationale), None
+        return decision, plan
+
+    def _stack_ready(self, decision: StrategyDecision, split: Optional[FunctionSplit]) -> bool:
+        # A recursive DFS with separable work runs on an explicit stack, sequential strategy included.
+        return (
+            decision.candidate.traversal_type == "dfs"
+            and split is not None
+            and split.recursive
+            and split.isolated
+            and not decision.reductions
+            and split.params[0] != "start"
+            and split.params[1] != "graph"
+        )
+
+    def _sleeps_only(self, split: FunctionSplit) -> bool:
+        for statement in split.visit:
+            call = ast.parse(statement).body[0]
+            if not (isinstance(call, ast.Expr) and isinstance(call.value, ast.Call)):
+                return False
+            func = call.value.func
+            if (func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", "")) != "sleep":
+                return False
+        return True
+
+    def _visit_args(self, split: FunctionSplit, node_exprs: List[str]) -> Optional[List[str]]:
+        # The template's per-item values, matched to the names the original binds for them.
+        if len(split.node_vars) == len(node_exprs):
+            values = list(node_exprs)
+        elif len(split.node_vars) == 1:
+            values = [f"({', '.join(node_exprs)})"]
+        else:
+            return None
+        return values + ["graph", "start"] + split.extras + split.setup_names
+
+    def _visit_call(self, func_name: str, split: FunctionSplit, traversal: str) -> str:
+        return f"_{func_name}_visit({', '.join(self._visit_args(split, self.NODE_EXPRS[traversal]))})"
+
+    def _render_visit(self, decision: StrategyDecision, func_name: str, split: FunctionSplit, plan: Optional[ReductionPlan]) -> str:
+        """The original's per-node work as a module-level helper the template calls per node."""
+        statements = list(split.visit)
+        if plan is not None:
+            statements.append(f"return ({', '.join(plan.operands)},)")
+        params = split.node_vars + split.params + split.setup_names
+        return dedent(
+            f"""
+            def _{func_name}_visit({", ".join(params)}):
+                '''Per-node work of {decision.candidate.function_name}, split out of its main loop.'''
+                {self._splice(statements, 16)}
+            """
+        )
+
+    def _transplant(self, rendered: str, func_name: str, orig: str, split: FunctionSplit) -> str:
+        """Gives the rendered entry point the original's parameters, defaults included.
+
+        The template body keeps naming the graph and start node `graph` and `start`; when the
+        original calls them something else they are bound once after the docstring.
+        """
+        tree = ast.parse(rendered)
+        func = next((n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == func_name), None)
+        if func is None or [a.arg for a in func.args.args[:2]] != ["graph", "start"]:
+            return rendered
+        own = ast.arguments(
+            posonlyargs=[], args=func.args.args[2:], kwonlyargs=[], kw_defaults=[], defaults=func.args.defaults
+        )
+        signature = ", ".join(part for part in (split.signature, ast.unparse(own)) if part)
+        lines = rendered.splitlines()
+        head = func.lineno - 1
+        lines[head] = lines[head].replace(f"{func_name}({ast.unparse(func.args)})", f"{func_name}({signature})")
+        for i in range(head, func.end_lineno):
+            lines[i] = lines[i].replace(f"{orig}(graph, start)", f"{orig}({split.forward})")
+        if split.params[:2] != ["graph", "start"]:
+            indent = " " * func.body[1].col_offset
+            lines.insert(func.body[0].end_lineno, f"{indent}graph, start = {split.params[0]}, {split.params[1]}")
+        return "\n".join(lines) + "\n"
+
+    def _stores(self, rendered: str, func_name: str) -> Dict[str, int]:
+        # How often each name is bound inside the rendered entry point, nested helpers included.
+        func = next(n for n in ast.parse(rendered).body if isinstance(n, ast.FunctionDef) and n.name == func_name)
+        counts: Dict[str, int] = {}
+        for node in ast.walk(func):
+            names = []
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                names = [node.id]
+            elif isinstance(node, ast.arg) and node not in func.args.args[:2]:
+                names = [node.arg]
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node is not func:
+                names = [node.name]
+            elif isinstance(node, (ast.Import, ast.ImportFrom)):
+                names = [(alias.asname or alias.name).split(".")[0] for alias in node.names]
+            for name in names:
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def _reduction_plan(self, decision: StrategyDecision, split: FunctionSplit) -> Optional[ReductionPlan]:
+        candidate = decision.candidate
+        # Merges happen at level boundaries, which only the level-synchronous BFS template has.
+        if candidate.traversal_type != "bfs" or decision.strategy not in ("threads", "free_threads"):
+            return None
+        tree = ast.parse(candidate.file_path.read_text(encoding="utf-8"))
+        func = next(
+            (n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef) and n.name == candidate.function_name), None
+        )
+        loop = next((stmt for stmt in func.body if isinstance(stmt, ast.While)), None) if func else None
+        returns = [n for n in ast.walk(func) if isinstance(n, ast.Return)] if func else []
+        if loop is None or len(returns) != 1 or returns[0] is not func.body[-1] or returns[0].value is None:
+            return None
+        node_var = split.node_vars[0]
+        order_var = next(
+            (
+                stmt.value.func.value.id
+                for stmt in loop.body
+                if isinstance(stmt, ast.Expr)
+                and isinstance(stmt.value, ast.Call)
+                and isinstance(stmt.value.func, ast.Attribute)
+                and isinstance(stmt.value.func.value, ast.Name)
+                and stmt.value.func.attr == "append"
+                and [ast.unparse(arg) for arg in stmt.value.args] == [node_var]
+            ),
+            "",
+        )
+        local = {n.id for n in ast.walk(func) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+        # Operands run at the end of the visit helper, after the per-node work assigned its locals.
+        visible = {node_var, *split.params} | {
+            n.id
+            for statement in split.visit
+            for n in ast.walk(ast.parse(statement))
+            if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)
+        }
+        plan = ReductionPlan()
+        for i, reduction in enumerate(decision.reductions):
+            stmt = next((s for s in loop.body if s.lineno == reduction.lineno), None)
+            if stmt is None or reduction.variable in self.REDUCTION_RESERVED:
+                return None
+            if self._updates(loop, reduction.variable) != 1:
+                return None
+            parts = self._reduction_parts(stmt, reduction.variable, reduction.operator, f"values[{i}]")
+            if parts is None:
+                return None
+            operand, fold, merge = parts
+            if any(isinstance(n, ast.Name) and n.id in local - visible for n in ast.walk(operand)):
+                return None
+            init = ast.parse(reduction.init or "None", mode="eval").body
+            if any(isinstance(n, ast.Name) and n.id in local for n in ast.walk(init)):
+                return None
+            plan.inits.append(f"{reduction.variable} = {ast.unparse(init)}")
+            plan.operands.append(ast.unparse(operand))
+            if fold:
+                plan.folds.append(fold)
+            if merge:
+                plan.merges.append(merge)
+
+        value = returns[0].value
+        names = value.elts if isinstance(value, ast.Tuple) else [value]
+        variables = {r.variable for r in decision.reductions}
+        if not all(isinstance(n, ast.Name) and (n.id in variables or n.id == order_var) for n in names):
+            return None
+        plan.returns = self._substitute(value, {ast.dump(ast.Name(order_var, ast.Load())): "order"})
+        return plan
+
+    def _reduction_parts(
+        self, stmt: ast.stmt, variable: str, operator: str, slot: str
+    ) -> Optional[Tuple[ast.expr, str, Optional[Tuple[str, str, str, str]]]]:
+        """Splits an accumulator update into its per-node operand and how to combine operands.
+
+        Sums and products come back as a fold statement reading `slot`; the rest as a merge whose
+        combine expression is the original update over `a` (earlier) and `b` (later).
+        """
+        accumulator = ast.dump(ast.Name(variable, ast.Load()))
+        if isinstance(stmt, ast.AugAssign):
+            operand, combined = stmt.value, ast.BinOp(ast.Name("a", ast.Load()), stmt.op, ast.Name("b", ast.Load()))
+        elif isinstance(stmt, ast.Assign) and isinstance(stmt.value, (ast.BinOp, ast.Call)):
+            call = stmt.value
+            sides = [call.left, call.right] if isinstance(call, ast.BinOp) else call.args
+            operand, combined = next(side for side in sides if ast.dump(side) != accumulator), call
+        elif isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call) and len(stmt.value.args) == 1:
+            operand = stmt.value.args[0]
+            value = f"{{{slot}}}" if stmt.value.func.attr == "add" else f"set({slot})"
+            return operand, "", (variable, value, "a | b", f"{variable}.update(level)")
+        elif isinstance(stmt, ast.If):
+            test = stmt.test
+            operand = test.comparators[0] if ast.dump(test.left) == accumulator else test.left
+            swap = {accumulator: "a", ast.dump(operand): "b"}
+            apply = self._substitute(stmt, {ast.dump(operand): "level"})
+            return operand, "", (variable, slot, f"b if {self._substitute(test, swap)} else a", apply)
+        else:
+            return None
+        if operator in ("sum", "product"):
+            return operand, self._substitute(stmt, {ast.dump(operand): slot}), None
+        swap = {accumulator: "a", ast.dump(operand): "b"}
+        apply = self._substitute(stmt, {ast.dump(operand): "level"})
+        return operand, "", (variable, slot, self._substitute(combined, swap), apply)
+
+    def _updates(self, loop: ast.AST, name: str) -> int:
+        # Rebindings of `name` plus in-place set updates on it.
+        count = 0
+        for node in ast.walk(loop):
+            if isinstance(node, ast.Name) and node.id == name and isinstance(node.ctx, ast.Store):
+                count += 1
+            elif (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and node.func.attr in ("add", "update")
+                and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == name
+            ):
+                count += 1
+        return count
+
+    def _substitute(self, node: ast.AST, replacements: Dict[str, str]) -> str:
+        """Unparses `node` with every subexpression whose dump is a key replaced by its source."""
+        return ast.unparse(_Substitute(replacements).visit(copy.deepcopy(node)))
+
+    def _render_visit_bfs(
+        self, decision: StrategyDecision, func_name: str, split: FunctionSplit, plan: Optional[ReductionPlan]
+    ) -> str:
+        grain = max(1, decision.granularity)
+        orig = decision.candidate.function_name
+        workers = decision.workers
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        plan = plan or ReductionPlan(returns="order")
+        call = self._visit_call(func_name, split, "bfs")
+        setup = split.setup + plan.inits
+        for variable, _, combine, _ in plan.merges:
+            setup.append(f"\ndef combine_{variable}(a, b):\n    return {combine}")
+        collect = [f"tree([{value} for values in operands], combine_{variable})" for variable, value, _, _ in plan.merges]
+        boundary: List[str] = []
+        if plan.folds:
+            folds = "\n        ".join(plan.folds)
+            boundary.append(f"for _, operands, _ in results:\n    for values in operands:\n        {folds}")
+        for j, (variable, _, _, apply) in enumerate(plan.merges):
+            boundary.append(f"level = tree([partials[{j}] for _, _, partials in results], combine_{variable})")
+            boundary.append(apply)
+        if decision.reductions:
+            summary = ", ".join(f"{r.variable} ({r.operator})" for r in decision.reductions)
+            doc = f"""Order-preserving level-synchronous BFS with parallel reductions: {summary}.
+
+                Workers expand frontier chunks of about {grain} node(s), cut at equal edge counts, and
+                run {orig}'s per-node work,
+                which also yields each node's reduction operands. At every level boundary sums and
+                products are folded in visit order, so floating-point results are deterministic and
+                round exactly as in {orig}; min, max and union partials per chunk are merged pairwise
+                in a fixed tree shape."""
+        else:
+            doc = f"""Order-preserving level-synchronous BFS that runs {orig}'s per-node work in its workers.
+
+                Workers expand frontier chunks of about {grain} node(s), cut at equal edge counts, and
+                call the per-node work for each node they hold; levels fan out to threads only when
+                their measured work outweighs dispatch."""
+        helpers = self._render_visit(decision, func_name, split, plan if decision.reductions else None)
+        return helpers + self._render_spans(func_name) + dedent(
+            f"""
+
+            def {func_name}(graph, start):
+                '''{doc}
+                '''
+                import time
+                from concurrent.futures import ThreadPoolExecutor
+                from itertools import accumulate
+
+                if len(graph) < {decision.inline_below_nodes}:
+                    return {orig}(graph, start)
+                grain = {grain}
+                fanout_cost_s = {dispatch_cost_s!r}
+                item_cost_s = 0.0
+                pool = []
+                visited = {{start}}
+                order = []
+                frontier = [start]{self._splice_after(setup, 16)}
+
+                def tree(partials, combine):
+                    # Adjacent pairs only, so merges keep visit order and depend on the chunking alone.
+                    while len(partials) > 1:
+                        paired = [combine(partials[i], partials[i + 1]) for i in range(0, len(partials) - 1, 2)]
+                        partials = paired + partials[len(partials) - len(partials) % 2:]
+                    return partials[0]
+
+                def expand(chunk):
+                    # visited is only written between levels, so workers read a stable set.
+                    seen = set()
+                    buffer = []
+                    operands = []
+                    for node in chunk:
+                        {f"operands.append({call})" if plan.operands else call}
+                        for nbr in graph.get(node, []):
+                            if nbr not in visited and nbr not in seen:
+                                seen.add(nbr)
+                                buffer.append(nbr)
+                    return buffer, operands, [{", ".join(collect)}]
+
+                try:
+                    while frontier:
+                        order.extend(frontier)
+                        chunks = [frontier[i:i + grain] for i in range(0, len(frontier), grain)]
+                        if len(chunks) > 1 and item_cost_s * len(frontier) > fanout_cost_s * len(chunks):
+                            if not pool:
+                                pool.append(ThreadPoolExecutor(max_workers={workers}))
+                            chunks = _{func_name}_spans(graph, frontier, len(chunks))
+                            results = list(pool[0].map(expand, chunks))
+                        else:
+                            began = time.perf_counter()
+                            results = [expand(chunk) for chunk in chunks]
+                            item_cost_s = (time.perf_counter() - began) / len(frontier){self._splice_after(boundary, 24)}
+                        buffers = [buffer for buffer, _, _ in results]
+                        offsets = [0, *accumulate(len(buffer) for buffer in buffers)]
+                        merged = [None] * offsets[-1]
+                        for offset, buffer in zip(offsets, buffers):
+                            merged[offset:offset + len(buffer)] = buffer
+                        next_frontier = []
+                        for nbr in merged:
+                            if nbr not in visited:
+                                visited.add(nbr)
+                                next_frontier.append(nbr)
+                        frontier = next_frontier
+                finally:
+                    if pool:
+                        pool[0].shutdown()
+                return {plan.returns}
+            """
+        )
+
+    def _render_stack_dfs(self, decision: StrategyDecision, func_name: str, split: FunctionSplit) -> str:
+        """Recursive DFS on an explicit stack, forking subtrees into a pool when there is work to share."""
+        orig = decision.candidate.function_name
+        visit = bool(split.visit)
+        helper = self._render_visit(decision, func_name, split, None) if visit else ""
+        call = self._visit_call(func_name, split, "dfs")
+        if decision.strategy == "sequential" or not visit:
+            return helper + dedent(
+                f"""
+                def {func_name}(graph, start):
+                    '''Recursion-free {orig}: the same preorder walk on an explicit stack of neighbor iterators.
+
+                    Each open call of the recursion is one iterator on the stack, so deep inputs pay for
+                    no Python frames and never hit the recursion limit.
+                    '''
                     visited = set()
+                    order = []{self._splice_after(split.setup, 20)}
+                    stack = [iter([start])]
+                    while stack:
+                        for node in stack[-1]:
+                            if node not in visited:
+                                visited.add(node)
+                                order.append(node){self._splice_after([call] if visit else [], 32)}
+                                stack.append(iter(graph.get(node, [])))
+                                break
+                        else:
+                            stack.pop()
+                    return order
+                """
+            )
+        workers = decision.workers or ("os.cpu_count() or 4" if decision.strategy == "free_threads" else None)
+        tasks = (decision.workers or 4) * self.FORK_TASKS_PER_WORKER
+        return helper + dedent(
+            f"""
+            def {func_name}(graph, start):
+                '''Fork-join {orig}: the recursion on explicit stacks, with subtrees at the fork depth run as pool tasks.
+
+                Every node is claimed once in a shared table, so its work runs exactly once. On a tree
+                the tasks' preorders splice into the sequential order where their roots stood; a node
+                claimed by two walks means shared descendants or a cycle, and the order is then rebuilt
+                by a work-free walk. Subtrees fork only once a node's measured work outweighs dispatch,
+                and graphs below {decision.inline_below_nodes} nodes never fork.
+                '''
+                import os
+                import time
+                from concurrent.futures import Future, ThreadPoolExecutor
+                from itertools import count
+
+                fanout_cost_s = {decision.dispatch_cost_s * self.FANOUT_FACTOR!r}
+                visit_cost_s = 0.0
+                pool = []
+                claimed = {{}}
+                shared = []
+                tokens = count(1){self._splice_after(split.setup, 16)}
+                # Fork at the depth where about {tasks} subtrees hang below the root.
+                branching = [len(children) for children in graph.values() if children]
+                fanout = sum(branching) / len(branching) if branching else 0.0
+                fork_depth = -1
+                if len(graph) >= {decision.inline_below_nodes} and fanout > 1:
+                    fork_depth = 1
+                    while fanout ** fork_depth < {tasks}:
+                        fork_depth += 1
+
+                def walk(root, token, fork_depth):
+                    # Preorder of root's subtree; the caller's walk (token 0) hands nodes with children
+                    # at fork_depth to new tasks, which stand in its order as their futures.
+                    nonlocal visit_cost_s
+                    order = []
+                    local = set()
+                    stack = [iter([root])]
+                    while stack:
+                        for node in stack[-1]:
+                            if claimed.setdefault(node, token) != token:
+                                shared.append(node)
+                                continue
+                            if node in local:
+                                continue
+                            local.add(node)
+                            if len(stack) - 1 == fork_depth and graph.get(node) and visit_cost_s > fanout_cost_s:
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={workers}))
+                                claimed[node] = child = next(tokens)
+                                order.append(pool[0].submit(walk, node, child, -1))
+                                continue
+                            order.append(node)
+                            if token:
+                                {call}
+                            else:
+                                began = time.perf_counter()
+                                {call}
+                                visit_cost_s = time.perf_counter() - began
+                            stack.append(iter(graph.get(node, [])))
+                            break
+                        else:
+                            stack.pop()
+                    return order
+
+                try:
+                    parts = walk(start, 0, fork_depth)
+                    order = [node for part in parts for node in (part.result() if isinstance(part, Future) else [part])]
+                finally:
+                    if pool:
+                        pool[0].shutdown()
+                if shared:
+                    # Some node was reachable from two walks, so rebuild the recursion's preorder
+                    # without running the work again.
+                    order = []
+                    seen = set()
+                    stack = [iter([start])]
+                    while stack:
+                        for node in stack[-1]:
+                            if node not in seen:
+                                seen.add(node)
+                                order.append(node)
+                                stack.append(iter(graph.get(node, [])))
+                                break
+                        else:
+                            stack.pop()
+                return order
+            """
+        )
+
+    def _visit_block(self, func_name: str, split: FunctionSplit, traversal: str, workers: object) -> List[str]:
+        # Per-node work starts inline and moves to the pool once one call outweighs dispatch; its
+        # futures are drained before returning so errors surface as in the original.
+        args = ", ".join(self._visit_args(split, self.NODE_EXPRS[traversal]))
+        return [
+            "if visit_cost_s > fanout_cost_s:\n"
+            "    if not pool:\n"
+            f"        pool.append(ThreadPoolExecutor(max_workers={workers}))\n"
+            f"    futures.append(pool[0].submit(_{func_name}_visit, {args}))\n"
+            "else:\n"
+            "    began = time.perf_counter()\n"
+            f"    _{func_name}_visit({args})\n"
+            "    visit_cost_s = time.perf_counter() - began"
+        ]
+
+    def _splice(self, statements: List[str], spaces: int) -> str:
+        # Joins statements for a placeholder already indented `spaces` deep in a dedent template.
+        return ("\n" + " " * spaces).join(line for stmt in statements for line in stmt.splitlines())
+
+    def _splice_after(self, statements: List[str], spaces: int) -> str:
+        # Like _splice, for a placeholder at the end of a template line; empty when there is nothing.
+        return "".join("\n" + " " * spaces + line for stmt in statements for line in stmt.splitlines())
+
+    def _output_path(self, src_path: Path) -> Path:
+        return self.output_dir / f"parallel_{src_path.name}"
+
+    def _render_template(
+        self,
+        decision: StrategyDecision,
+        parallel_func_name: str,
+        split: Optional[FunctionSplit],
+        plan: Optional[ReductionPlan],
+    ) -> str:
+        traversal = decision.candidate.traversal_type
+        grain = max(1, decision.granularity)
+        orig = decision.candidate.function_name
+        if self._stack_ready(decision, split):
+            return self._render_stack_dfs(decision, parallel_func_name, split)
+        if decision.strategy == "sequential" or traversal == "astar":
+            rationale = decision.rationale if decision.strategy == "sequential" else "A* stays sequential"
+            signature, forward = (split.signature, split.forward) if split else ("*args, **kwargs", "*args, **kwargs")
+            return dedent(
+                f"""
+                def {parallel_func_name}({signature}):
+                    '''Sequential by choice: {rationale}.'''
+                    return {orig}({forward})
+                """
+            )
+        if decision.strategy == "asyncio":
+            return self._render_async(decision, parallel_func_name)
+        if decision.strategy == "free_threads":
+            return self._render_free_threaded(decision, parallel_func_name, split, plan)
+        workers = decision.workers
+        inline_below = decision.inline_below_nodes
+        # Fan out only when a batch's measured work is FANOUT_FACTOR times its dispatch cost.
+        dispatch_cost_s = decision.dispatch_cost_s * self.FANOUT_FACTOR
+        visit = split is not None and bool(split.visit)
+        if traversal == "bfs" and (visit or plan is not None):
+            return self._render_visit_bfs(decision, parallel_func_name, split, plan)
+        # Without per-node work the helper and every hook below render empty.
+        helper = self._render_visit(decision, parallel_func_name, split, None) if visit else ""
+        state = (split.setup + ["visit_cost_s = 0.0", "futures = []"]) if visit else []
+        hook = self._visit_block(parallel_func_name, split, traversal, workers) if visit else []
+        drain = ["for future in futures:\n    future.result()"] if visit else []
+        if traversal == "bfs":
+            return self._render_spans(parallel_func_name) + dedent(
+                f"""
+                def {parallel_func_name}(graph, start):
+                    '''Order-preserving level-synchronous BFS.
+
+                    Workers expand frontier chunks of about {grain} node(s), cut at equal edge counts,
+                    into local buffers against the level's visited set; buffers are placed at prefix-sum
+                    offsets in frontier order and the first discoverer wins, which reproduces the
+                    sequential queue order exactly. Levels fan out to threads only when their measured
+                    work outweighs dispatch.
+                    '''
+                    import time
+                    from concurrent.futures import ThreadPoolExecutor
+                    from itertools import accumulate
+
+                    if len(graph) < {inline_below}:
+                        return {orig}(graph, start)
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+                    visited = {{start}}
                     order = []
                     frontier = [start]
-                    visited.add(start)
-                    with ThreadPoolExecutor() as ex:
-                        while frontier:
-                            order.extend(frontier)
-                            tasks = list(frontier)
 
-                            def expand(node):
-                                return [nbr for nbr in graph.get(node, []) if nbr not in visited]
+                    def expand(chunk):
+                        # visited is only written between levels, so workers read a stable set.
+                        seen = set()
+                        buffer = []
+                        for node in chunk:
+                            for nbr in graph.get(node, []):
+                                if nbr not in visited and nbr not in seen:
+                                    seen.add(nbr)
+                                    buffer.append(nbr)
+                        return buffer
 
-                            results = ex.map(expand, tasks)
+                    try:
+                        while frontier:
+                            order.extend(frontier)
+                            chunks = [frontier[i:i + grain] for i in range(0, len(frontier), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(frontier) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={workers}))
+                                chunks = _{parallel_func_name}_spans(graph, frontier, len(chunks))
+                                buffers = list(pool[0].map(expand, chunks))
+                            else:
+                                began = time.perf_counter()
+                                buffers = [expand(chunk) for chunk in chunks]
+                                item_cost_s = (time.perf_counter() - began) / len(frontier)
+                            offsets = [0, *accumulate(len(buffer) for buffer in buffers)]
+                            merged = [None] * offsets[-1]
+                            for offset, buffer in zip(offsets, buffers):
+                                merged[offset:offset + len(buffer)] = buffer
                             next_frontier = []
-                            for node, neighbors in zip(tasks, results):
-                                for nbr in neighbors:
-                                    if nbr not in visited:
-                                        visited.add(nbr)
-                                        next_frontier.append(nbr)
+                            for nbr in merged:
+                                if nbr not in visited:
+                                    visited.add(nbr)
+                                    next_frontier.append(nbr)
                             frontier = next_frontier
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
                     return order
                 """
             )
         if traversal == "dfs":
-            return dedent(
+            return helper + dedent(
                 f"""
                 def {parallel_func_name}(graph, start):
-                    '''Parallel-ish DFS: expands neighbors in a thread pool while preserving stack order.'''
+                    '''Parallel-ish DFS: filters large neighbor lists in thread chunks of {grain}, small ones inline, preserving stack order.'''
+                    import time
                     from concurrent.futures import ThreadPoolExecutor
 
+                    if len(graph) < {inline_below}:
+                        return {orig}(graph, start)
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
                     visited = set()
                     order = []
-                    stack = [start]
-                    with ThreadPoolExecutor() as ex:
+                    stack = [start]{self._splice_after(state, 20)}
+
+                    def expand(chunk):
+                        return [nbr for nbr in chunk if nbr not in visited]
+
+                    try:
                         while stack:
                             node = stack.pop()
                             if node in visited:
                                 continue
                             visited.add(node)
-                            order.append(node)
-
-                            def expand(n):
-                                return [nbr for nbr in graph.get(n, []) if nbr not in visited]
-
-                            neighbors = list(ex.map(expand, [node]))[0]
+                            order.append(node){self._splice_after(hook, 28)}
+                            candidates = list(graph.get(node, []))
+                            chunks = [candidates[i:i + grain] for i in range(0, len(candidates), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(candidates) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={workers}))
+                                neighbors = [nbr for part in pool[0].map(expand, chunks) for nbr in part]
+                            else:
+                                began = time.perf_counter()
+                                neighbors = expand(candidates)
+                                item_cost_s = (time.perf_counter() - began) / max(1, len(candidates))
                             for nbr in reversed(neighbors):
-                                stack.append(nbr)
+                                stack.append(nbr){self._splice_after(drain, 24)}
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
                     return order
                 """
             )
-        if traversal == "astar":
-            return dedent(
+        if traversal == "dijkstra":
+            return helper + dedent(
                 f"""
-                def {parallel_func_name}(graph, start, goal, heuristic):
-                    '''Conservative A*: delegates to sequential implementation for correctness.'''
-                    return {decision.candidate.function_name}(graph, start, goal, heuristic)
+                def {parallel_func_name}(graph, start):
+                    '''Parallel Dijkstra: relaxes a settled node's neighbors in thread chunks of {grain} when that outweighs dispatch.'''
+                    import heapq
+                    import threading
+                    import time
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    if len(graph) < {inline_below}:
+                        return {orig}(graph, start)
+                    grain = {grain}
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+                    distances = {{node: float('infinity') for node in graph}}
+                    distances[start] = 0
+                    pq = [(0, start)]
+                    lock = threading.Lock(){self._splice_after(state, 20)}
+
+                    def relax(current_dist, items):
+                        for neighbor, weight in items:
+                            distance = current_dist + weight
+                            with lock:
+                                if distance < distances[neighbor]:
+                                    distances[neighbor] = distance
+                                    heapq.heappush(pq, (distance, neighbor))
+
+                    try:
+                        while pq:
+                            current_dist, current_node = heapq.heappop(pq)
+                            if current_dist > distances[current_node]:
+                                continue{self._splice_after(hook, 28)}
+                            items = list(graph.get(current_node, {{}}).items())
+                            chunks = [items[i:i + grain] for i in range(0, len(items), grain)]
+                            if len(chunks) > 1 and item_cost_s * len(items) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers={workers}))
+                                list(pool[0].map(relax, [current_dist] * len(chunks), chunks))
+                            else:
+                                began = time.perf_counter()
+                                relax(current_dist, items)
+                                item_cost_s = (time.perf_counter() - began) / max(1, len(items)){self._splice_after(drain, 24)}
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
+                    return distances
+                """
+            )
+        if traversal == "bellman_ford":
+            # The original runs its per-round work for every round, so converging early only stops
+            # the relaxation, not the rounds.
+            rounds = [f"_{parallel_func_name}_visit({', '.join(self._visit_args(split, ['round_index']))})"] if visit else []
+            rounds += ["if converged:\n    continue"] if visit else []
+            exit_round = "converged = True" if visit else "break"
+            return helper + self._render_partition(parallel_func_name) + dedent(
+                f"""
+                def {parallel_func_name}(graph, start):
+                    '''Parallel Bellman-Ford: relaxes destination-partitioned edge sets in a thread pool.
+
+                    Each worker holds the edges into one partition of the vertices, so every distance
+                    has a single writer; partitions balance edge counts and cut few edges. Rounds fan
+                    out only when their measured work outweighs dispatch.
+                    '''
+                    import time
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    if len(graph) < {inline_below}:
+                        return {orig}(graph, start)
+                    fanout_cost_s = {dispatch_cost_s!r}
+                    item_cost_s = 0.0
+                    pool = []
+                    distances = {{node: float('infinity') for node in graph}}
+                    distances[start] = 0
+                    all_edges = [(u, v, w) for u in graph for v, w in graph[u].items()]
+                    num_workers = {workers or 4}
+                    owner = _{parallel_func_name}_partition(graph, max(1, min(num_workers, len(all_edges) // {grain})))
+                    chunks = [[] for _ in range(num_workers)]
+                    for edge in all_edges:
+                        chunks[owner[edge[1]]].append(edge)
+                    chunks = [chunk for chunk in chunks if chunk]{self._splice_after(split.setup + ["converged = False"] if visit else [], 20)}
+
+                    def relax_chunk(edge_chunk):
+                        changed = False
+                        for u, v, w in edge_chunk:
+                            if distances[u] + w < distances[v]:
+                                distances[v] = distances[u] + w
+                                changed = True
+                        return changed
+
+                    try:
+                        for round_index in range(len(graph) - 1):{self._splice_after(rounds, 28)}
+                            if len(chunks) > 1 and item_cost_s * len(all_edges) > fanout_cost_s * len(chunks):
+                                if not pool:
+                                    pool.append(ThreadPoolExecutor(max_workers=num_workers))
+                                changed = list(pool[0].map(relax_chunk, chunks))
+                            else:
+                                began = time.perf_counter()
+                                changed = [relax_chunk(chunk) for chunk in chunks]
+                                item_cost_s = (time.perf_counter() - began) / max(1, len(all_edges))
+                            if not any(changed):
+                                {exit_round}
+                    finally:
+                        if pool:
+                            pool[0].shutdown()
+                    return distances
                 """
             )
         return dedent(
@@ -114,3 +2164,15 @@ class CodeRewriter:
                 return {decision.candidate.function_name}(*args, **kwargs)
             """
         )
+
+
+class _Substitute(ast.NodeTransformer):
+    """Replaces subexpressions, matched by their dump, with names spelling the replacement source."""
+
+    def __init__(self, replacements: Dict[str, str]) -> None:
+        self.replacements = replacements
+
+    def visit(self, node: ast.AST) -> ast.AST:
+        if isinstance(node, ast.expr) and ast.dump(node) in self.replacements:
+            return ast.Name(self.replacements[ast.dump(node)], ast.Load())
+        return super().visit(node)
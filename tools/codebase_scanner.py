@@ -16,7 +16,7 @@ class CodebaseScanner:
 
     def scan_for_traversals(self, target_dir: Path) -> DiscoveryResult:
         candidates: List[TraversalCandidate] = []
-        for file_path in self._iter_py_files(target_dir):
+        for file_path in self.source_files(target_dir):
             source = file_path.read_text(encoding="utf-8")
             tree = ast.parse(source)
             for node in getattr(tree, "body", []):  # only top-level functions
@@ -33,6 +33,9 @@ class CodebaseScanner:
                         )
         return DiscoveryResult(candidates=candidates)
 
+    def source_files(self, target_dir: Path) -> List[Path]:
+        return sorted(self._iter_py_files(target_dir))
+
     def _iter_py_files(self, base: Path) -> Iterable[Path]:
         for path in base.rglob("*.py"):
             if path.name.startswith("__"):
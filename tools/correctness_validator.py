@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Dict, List, Sequence, Tuple
 
 
 class CorrectnessValidator:
@@ -8,3 +8,42 @@ class CorrectnessValidator:
 
     def compare_outputs(self, sequential_out: Any, parallel_out: Any) -> bool:
         return sequential_out == parallel_out
+
+    def compare_bfs_depths(
+        self, orders: List[List[Any]], depth_maps: List[Dict[Any, int]], hop_depths: List[Dict[Any, int]]
+    ) -> bool:
+        # Each depth map must cover exactly the nodes the original visits from that source and
+        # equal the hop depths an independent BFS over the same graph finds.
+        if not len(orders) == len(depth_maps) == len(hop_depths):
+            return False
+        for order, depths, expected in zip(orders, depth_maps, hop_depths):
+            if len(order) != len(depths) or set(order) != depths.keys() or depths != expected:
+                return False
+        return True
+
+    def hop_depths(self, graph: Dict[Any, Any], source: Any) -> Dict[Any, int]:
+        depths = {source: 0}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for node in frontier:
+                for nbr in graph.get(node, []):
+                    if nbr not in depths:
+                        depths[nbr] = depths[node] + 1
+                        next_frontier.append(nbr)
+            frontier = next_frontier
+        return depths
+
+    def compare_distance_rows(
+        self, distance_maps: List[Dict[Any, float]], batch: Tuple[List[Any], List[Sequence[float]]]
+    ) -> bool:
+        # Row i is index-aligned with the batch's node list and must equal the i-th distance map.
+        nodes, rows = batch
+        if len(distance_maps) != len(rows):
+            return False
+        for distances, row in zip(distance_maps, rows):
+            if len(distances) != len(nodes) or len(row) != len(nodes):
+                return False
+            if any(distances.get(node) != dist for node, dist in zip(nodes, row)):
+                return False
+        return True
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict
+
+from core.models import WorkProfile
+from tools.machine_fingerprint import MachineFingerprinter
+
+
+@dataclass
+class CostEstimate:
+    strategy: str
+    granularity: int
+    rationale: str
+
+
+class CostModel:
+    """Picks a strategy and task granularity from the estimated per-node work.
+
+    Dispatch overheads are per task; the granularity batches enough loop iterations into
+    one task that the overhead stays under ``TARGET_OVERHEAD_RATIO`` of the useful work.
+    """
+
+    DISPATCH_OVERHEAD_S = {
+        "threads": 20e-6,
+        "free_threads": 20e-6,
+        "processes": 250e-6,
+        "asyncio": 5e-6,
+    }
+    # Creating and shutting down a pool, paid once per call that fans out at all.
+    POOL_STARTUP_S = {
+        "threads": 200e-6,
+        "free_threads": 200e-6,
+        "processes": 50e-3,
+        "asyncio": 50e-6,
+    }
+    TARGET_OVERHEAD_RATIO = 0.1
+    FANOUT_FACTOR = 2.0
+    # Work that spends this much longer waiting than computing needs no OS threads at all.
+    ASYNC_WAIT_RATIO = 100.0
+    ASYNC_IO_CALLS = {"sleep", "asyncio.sleep", "time.sleep", "urlopen", "recv", "send", "sendall", "connect"}
+    CALIBRATION_TASKS = 512
+
+    def __init__(self, free_threaded: bool | None = None) -> None:
+        self.dispatch_overhead_s = dict(self.DISPATCH_OVERHEAD_S)
+        self.pool_startup_s = dict(self.POOL_STARTUP_S)
+        # Without a GIL, threads run CPU-bound kernels in parallel and skip process pickling.
+        self.free_threaded = not MachineFingerprinter().gil_enabled() if free_threaded is None else free_threaded
+
+    def calibrate(self) -> Dict[str, float]:
+        """Measures this machine's thread pool startup and per-task dispatch cost (best of three)."""
+        startups, dispatches = [], []
+        for _ in range(3):
+            began = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                ex.submit(int).result()
+            startups.append(time.perf_counter() - began)
+            with ThreadPoolExecutor(max_workers=4) as ex:
+                ex.submit(int).result()
+                began = time.perf_counter()
+                list(ex.map(int, range(self.CALIBRATION_TASKS)))
+                dispatches.append((time.perf_counter() - began) / self.CALIBRATION_TASKS)
+        return {"threads_pool_startup_s": min(startups), "threads_dispatch_s": min(dispatches)}
+
+    def apply_calibration(self, values: Dict[str, float]) -> None:
+        for name, value in values.items():
+            strategy, _, metric = name.partition("_")
+            table = self.pool_startup_s if metric == "pool_startup_s" else self.dispatch_overhead_s
+            table[strategy] = value
+            if strategy == "threads":
+                # Free-threaded templates use the same ThreadPoolExecutor machinery.
+                table["free_threads"] = value
+
+    def inline_below_nodes(self, strategy: str, profile: WorkProfile | None) -> int:
+        # Whole graphs whose estimated work cannot pay for starting a pool run the original function.
+        if profile is None or profile.estimated_cost_s <= 0:
+            return 0
+        startup = self.pool_startup_s.get(strategy, 0.0)
+        return math.ceil(self.FANOUT_FACTOR * startup / profile.estimated_cost_s)
+
+    def estimate(self, profile: WorkProfile) -> CostEstimate:
+        cost_us = profile.estimated_cost_s * 1e6
+        if profile.work_class == "trivial":
+            return CostEstimate(
+                "sequential", 1, f"trivial per-node work (~{cost_us:.1f}us) is below task dispatch overhead"
+            )
+        if profile.work_class == "io":
+            waits_only = profile.cpu_cost_s == 0 or profile.io_cost_s / profile.cpu_cost_s >= self.ASYNC_WAIT_RATIO
+            awaitable = all(call in self.ASYNC_IO_CALLS or call.split(".")[-1] in self.ASYNC_IO_CALLS for call in profile.io_calls)
+            strategy = "asyncio" if waits_only and awaitable else "threads"
+            return CostEstimate(
+                strategy,
+                self.granularity(strategy, profile),
+                f"I/O-bound per-node work (~{cost_us:.1f}us, {', '.join(profile.io_calls)})",
+            )
+        if self.free_threaded:
+            return CostEstimate(
+                "free_threads",
+                self.granularity("free_threads", profile),
+                f"CPU-bound per-node work (~{cost_us:.1f}us) runs on parallel threads without the GIL",
+            )
+        return CostEstimate(
+            "processes",
+            self.granularity("processes", profile),
+            f"CPU-bound per-node work (~{cost_us:.1f}us) needs processes to sidestep the GIL",
+        )
+
+    def granularity(self, strategy: str, profile: WorkProfile) -> int:
+        overhead = self.dispatch_overhead_s.get(strategy, 0.0)
+        cost = profile.estimated_cost_s
+        if overhead <= 0 or cost <= 0:
+            return 1
+        return max(1, math.ceil(overhead / (self.TARGET_OVERHEAD_RATIO * cost)))
@@ -1,43 +1,350 @@
 from __future__ import annotations
 
 import ast
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 
-from core.models import AnalysisArtifact, TraversalCandidate
+from core.models import AnalysisArtifact, LoopDependence, Reduction, TraversalCandidate, WorkProfile
+
+# (name, kind, lineno) with kind one of read | write (rebinding) | mutate (in place).
+Event = Tuple[str, str, int]
 
 
 class DependencyAnalyzer:
-    """Finds mutable globals and shared state heuristically."""
+    """Finds mutable globals, shared state and the loop-carried dependencies of a traversal loop."""
+
+    MUTATING_METHODS = {
+        "append", "appendleft", "add", "update", "extend", "extendleft", "insert", "pop", "popleft",
+        "popitem", "remove", "discard", "clear", "setdefault", "sort", "reverse",
+    }
+    HEAP_FUNCTIONS = {"heappush", "heappop", "heappushpop", "heapreplace", "heapify"}
+    WORKLIST_METHODS = {"pop", "popleft"}
+    REDUCTION_OPERATORS = {ast.Add: "sum", ast.Mult: "product", ast.BitOr: "union"}
 
-    def find_mutable_globals(self, tree: ast.AST) -> List[str]:
+    def find_mutable_globals(self, tree: ast.AST, function_name: str | None = None) -> List[str]:
         mutable_globals: List[str] = []
         for node in tree.body if isinstance(tree, ast.Module) else []:
             if isinstance(node, ast.Assign):
                 for target in node.targets:
                     if isinstance(target, ast.Name):
                         mutable_globals.append(target.id)
-        return mutable_globals
+        func = self._find_function(tree, function_name) if function_name else None
+        if func is None:
+            return mutable_globals
+        # Module state a function never touches cannot race inside it.
+        referenced = {node.id for node in ast.walk(func) if isinstance(node, ast.Name)} - self._local_names(func)
+        return [name for name in mutable_globals if name in referenced]
 
     def find_shared_state(self, tree: ast.AST, function_name: str) -> List[str]:
         shared: List[str] = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef) and node.name == function_name:
-                for inner in ast.walk(node):
-                    if isinstance(inner, ast.Global):
-                        shared.extend(inner.names)
+        func = self._find_function(tree, function_name)
+        if func is None:
+            return shared
+        for inner in ast.walk(func):
+            if isinstance(inner, ast.Global):
+                shared.extend(inner.names)
+        # Module globals mutated in place need no `global` statement but are shared all the same.
+        module_names = set(self.find_mutable_globals(tree))
+        local = self._local_names(func)
+        events: List[Event] = []
+        for stmt in func.body:
+            self._collect(stmt, events, [])
+        shared.extend(name for name, kind, _ in events if kind == "mutate" and name in module_names - local)
         return list(sorted(set(shared)))
 
+    def analyze_loop(self, tree: ast.AST, function_name: str) -> Optional[LoopDependence]:
+        func = self._find_function(tree, function_name)
+        loop = self._main_loop(func) if func is not None else None
+        if func is None or loop is None:
+            return None
+        events: List[Event] = []
+        attribute_writes: List[str] = []
+        self._collect(loop, events, attribute_writes)
+        reductions = self._reductions(func, loop, events)
+        reduced = {r.variable for r in reductions}
+        params = {arg.arg for arg in func.args.args + func.args.kwonlyargs}
+
+        state = self._worklists(loop) | self._membership_sets(loop) | self._returned(func)
+        written = {name for name, kind, _ in events if kind in ("write", "mutate")}
+        state = (state & written) - reduced - params
+
+        read_after = self._read_after(func, loop)
+        first_kind: Dict[str, str] = {}
+        for name, kind, _ in events:
+            first_kind.setdefault(name, kind)
+        private = {
+            name for name, kind in first_kind.items()
+            if kind == "write" and name not in read_after and name not in state | reduced
+        }
+        carried = written - private - state - reduced
+        return LoopDependence(
+            loop_lineno=loop.lineno,
+            reads=sorted({name for name, kind, _ in events if kind == "read"}),
+            writes=sorted(written),
+            private=sorted(private),
+            traversal_state=sorted(state),
+            reductions=reductions,
+            carried=sorted(carried),
+            attribute_writes=sorted(set(attribute_writes)),
+        )
+
     def build_artifact(
         self,
         candidate: TraversalCandidate,
         shared_state: List[str],
         mutable_globals: List[str],
         safe: bool,
+        work_profile: Optional[WorkProfile] = None,
+        loop_dependence: Optional[LoopDependence] = None,
     ) -> AnalysisArtifact:
+        notes = []
+        if not safe:
+            notes.append("unsafe due to shared state")
+        if loop_dependence is not None and loop_dependence.carried:
+            notes.append(f"loop-carried dependence on {', '.join(loop_dependence.carried)}")
+        if loop_dependence is not None and loop_dependence.attribute_writes:
+            notes.append(f"writes attributes {', '.join(loop_dependence.attribute_writes)}")
         return AnalysisArtifact(
             candidate=candidate,
             shared_state_variables=shared_state,
             mutable_globals=mutable_globals,
             safe_to_parallelize=safe,
-            notes="unsafe due to shared state" if not safe else "",
+            notes="; ".join(notes),
+            work_profile=work_profile,
+            loop_dependence=loop_dependence,
         )
+
+    def _collect(self, node: ast.AST, events: List[Event], attribute_writes: List[str]) -> None:
+        # Children are visited in evaluation order, so `x = x + 1` reads x before writing it.
+        if isinstance(node, ast.Assign):
+            self._collect(node.value, events, attribute_writes)
+            for target in node.targets:
+                self._collect_target(target, events, attribute_writes)
+        elif isinstance(node, ast.AugAssign):
+            if isinstance(node.target, ast.Name):
+                events.append((node.target.id, "read", node.lineno))
+            self._collect(node.value, events, attribute_writes)
+            self._collect_target(node.target, events, attribute_writes)
+        elif isinstance(node, ast.AnnAssign):
+            if node.value is not None:
+                self._collect(node.value, events, attribute_writes)
+            self._collect_target(node.target, events, attribute_writes)
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self._collect(node.iter, events, attribute_writes)
+            self._collect_target(node.target, events, attribute_writes)
+            for stmt in node.body + node.orelse:
+                self._collect(stmt, events, attribute_writes)
+        elif isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            # Comprehension targets live in their own scope.
+            scoped = {n.id for gen in node.generators for n in ast.walk(gen.target) if isinstance(n, ast.Name)}
+            inner: List[Event] = []
+            for child in ast.iter_child_nodes(node):
+                self._collect(child, inner, attribute_writes)
+            events.extend(event for event in inner if event[0] not in scoped)
+        elif isinstance(node, ast.Call):
+            receiver = self._mutated_receiver(node)
+            if isinstance(receiver, ast.Name):
+                events.append((receiver.id, "read", node.lineno))
+                events.append((receiver.id, "mutate", node.lineno))
+            elif isinstance(receiver, ast.Attribute):
+                attribute_writes.append(ast.unparse(receiver))
+            for child in ast.iter_child_nodes(node):
+                self._collect(child, events, attribute_writes)
+        elif isinstance(node, ast.Name):
+            events.append((node.id, "read" if isinstance(node.ctx, ast.Load) else "write", node.lineno))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            return
+        else:
+            for child in ast.iter_child_nodes(node):
+                self._collect(child, events, attribute_writes)
+
+    def _collect_target(self, target: ast.AST, events: List[Event], attribute_writes: List[str]) -> None:
+        if isinstance(target, ast.Name):
+            events.append((target.id, "write", target.lineno))
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self._collect_target(elt, events, attribute_writes)
+        elif isinstance(target, ast.Starred):
+            self._collect_target(target.value, events, attribute_writes)
+        elif isinstance(target, ast.Subscript):
+            self._collect(target.slice, events, attribute_writes)
+            base = target.value
+            if isinstance(base, ast.Name):
+                events.append((base.id, "read", target.lineno))
+                events.append((base.id, "mutate", target.lineno))
+            else:
+                if isinstance(base, ast.Attribute):
+                    attribute_writes.append(ast.unparse(base))
+                self._collect(base, events, attribute_writes)
+        elif isinstance(target, ast.Attribute):
+            attribute_writes.append(ast.unparse(target))
+            self._collect(target.value, events, attribute_writes)
+
+    def _mutated_receiver(self, call: ast.Call) -> Optional[ast.AST]:
+        func = call.func
+        if isinstance(func, ast.Attribute) and func.attr in self.MUTATING_METHODS:
+            return func.value
+        name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else ""
+        if name in self.HEAP_FUNCTIONS and call.args:
+            return call.args[0]
+        return None
+
+    def _reductions(self, func: ast.FunctionDef, loop: ast.AST, events: List[Event]) -> List[Reduction]:
+        found: Dict[str, List[Tuple[str, ast.AST]]] = {}
+        for stmt in ast.walk(loop):
+            if stmt is loop:
+                continue
+            match = self._reduction_pattern(stmt)
+            if match is not None:
+                found.setdefault(match[0], []).append((match[1], stmt))
+        reductions: List[Reduction] = []
+        for variable, matches in found.items():
+            operators = {operator for operator, _ in matches}
+            if len(operators) != 1:
+                continue
+            # Every touch of the accumulator inside the loop must be one of its update statements;
+            # a set that is also membership-tested is a visited set, not a reduction.
+            inside: List[Event] = []
+            for _, stmt in matches:
+                self._collect(stmt, inside, [])
+            total = sum(1 for name, _, _ in events if name == variable)
+            if total != sum(1 for name, _, _ in inside if name == variable):
+                continue
+            init = self._initializer(func, loop, variable)
+            if init is None:
+                continue
+            reductions.append(Reduction(variable, operators.pop(), min(s.lineno for _, s in matches), init))
+        return sorted(reductions, key=lambda r: r.lineno)
+
+    def _reduction_pattern(self, stmt: ast.AST) -> Optional[Tuple[str, str]]:
+        if isinstance(stmt, ast.AugAssign) and isinstance(stmt.target, ast.Name):
+            operator = self.REDUCTION_OPERATORS.get(type(stmt.op))
+            if operator and not self._reads(stmt.value, stmt.target.id):
+                return stmt.target.id, operator
+        if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+            name, value = stmt.targets[0].id, stmt.value
+            if isinstance(value, ast.BinOp) and type(value.op) in self.REDUCTION_OPERATORS:
+                operands = [value.left, value.right]
+                others = [op for op in operands if not (isinstance(op, ast.Name) and op.id == name)]
+                if len(others) == 1 and not self._reads(others[0], name):
+                    return name, self.REDUCTION_OPERATORS[type(value.op)]
+            if (
+                isinstance(value, ast.Call)
+                and isinstance(value.func, ast.Name)
+                and value.func.id in ("min", "max")
+                and len(value.args) == 2
+                and not value.keywords
+            ):
+                others = [arg for arg in value.args if not (isinstance(arg, ast.Name) and arg.id == name)]
+                if len(others) == 1 and not self._reads(others[0], name):
+                    return name, value.func.id
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            call = stmt.value
+            if (
+                isinstance(call.func, ast.Attribute)
+                and isinstance(call.func.value, ast.Name)
+                and call.func.attr in ("add", "update")
+                and not any(self._reads(arg, call.func.value.id) for arg in call.args)
+            ):
+                return call.func.value.id, "union"
+        if isinstance(stmt, ast.If) and not stmt.orelse and len(stmt.body) == 1:
+            return self._compare_and_swap(stmt)
+        return None
+
+    def _compare_and_swap(self, stmt: ast.If) -> Optional[Tuple[str, str]]:
+        # `if e > best: best = e` is a max reduction, `if e < best: best = e` a min.
+        assign, test = stmt.body[0], stmt.test
+        if not (
+            isinstance(assign, ast.Assign)
+            and len(assign.targets) == 1
+            and isinstance(assign.targets[0], ast.Name)
+            and isinstance(test, ast.Compare)
+            and len(test.ops) == 1
+        ):
+            return None
+        name = assign.targets[0].id
+        left, right, op = test.left, test.comparators[0], test.ops[0]
+        if isinstance(right, ast.Name) and right.id == name:
+            value, greater = left, isinstance(op, (ast.Gt, ast.GtE))
+            lesser = isinstance(op, (ast.Lt, ast.LtE))
+        elif isinstance(left, ast.Name) and left.id == name:
+            value, greater = right, isinstance(op, (ast.Lt, ast.LtE))
+            lesser = isinstance(op, (ast.Gt, ast.GtE))
+        else:
+            return None
+        if ast.dump(value) != ast.dump(assign.value) or self._reads(value, name) or not (greater or lesser):
+            return None
+        return name, "max" if greater else "min"
+
+    def _initializer(self, func: ast.FunctionDef, loop: ast.AST, variable: str) -> Optional[str]:
+        init = None
+        for stmt in func.body:
+            if stmt.lineno >= loop.lineno:
+                break
+            if isinstance(stmt, ast.Assign) and any(
+                isinstance(t, ast.Name) and t.id == variable for t in stmt.targets
+            ):
+                init = ast.unparse(stmt.value)
+        return init
+
+    def _worklists(self, loop: ast.AST) -> Set[str]:
+        names: Set[str] = set()
+        if isinstance(loop, ast.While):
+            names |= {n.id for n in ast.walk(loop.test) if isinstance(n, ast.Name)}
+        for node in ast.walk(loop):
+            if not isinstance(node, ast.Call):
+                continue
+            func = node.func
+            name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else ""
+            if name in self.WORKLIST_METHODS and isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+                names.add(func.value.id)
+            elif name in self.HEAP_FUNCTIONS and node.args and isinstance(node.args[0], ast.Name):
+                names.add(node.args[0].id)
+        return names
+
+    def _membership_sets(self, loop: ast.AST) -> Set[str]:
+        names: Set[str] = set()
+        for node in ast.walk(loop):
+            if isinstance(node, ast.Compare):
+                for op, right in zip(node.ops, node.comparators):
+                    if isinstance(op, (ast.In, ast.NotIn)) and isinstance(right, ast.Name):
+                        names.add(right.id)
+        return names
+
+    def _returned(self, func: ast.FunctionDef) -> Set[str]:
+        names: Set[str] = set()
+        for node in ast.walk(func):
+            if isinstance(node, ast.Return) and node.value is not None:
+                values = node.value.elts if isinstance(node.value, ast.Tuple) else [node.value]
+                names |= {v.id for v in values if isinstance(v, ast.Name)}
+        return names
+
+    def _read_after(self, func: ast.FunctionDef, loop: ast.AST) -> Set[str]:
+        end = getattr(loop, "end_lineno", loop.lineno)
+        return {
+            node.id
+            for node in ast.walk(func)
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.lineno > end
+        }
+
+    def _reads(self, node: ast.AST, name: str) -> bool:
+        return any(isinstance(n, ast.Name) and n.id == name for n in ast.walk(node))
+
+    def _local_names(self, func: ast.FunctionDef) -> Set[str]:
+        local = {arg.arg for arg in func.args.args + func.args.kwonlyargs}
+        declared_global = {name for node in ast.walk(func) if isinstance(node, ast.Global) for name in node.names}
+        for node in ast.walk(func):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                local.add(node.id)
+        return local - declared_global
+
+    def _main_loop(self, func: ast.FunctionDef) -> Optional[ast.AST]:
+        for node in ast.walk(func):
+            if isinstance(node, (ast.While, ast.For)):
+                return node
+        return None
+
+    def _find_function(self, tree: ast.AST, function_name: str) -> Optional[ast.FunctionDef]:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef) and node.name == function_name:
+                return node
+        return None
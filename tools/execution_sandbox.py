@@ -1,35 +1,233 @@
 from __future__ import annotations
 
+import hashlib
 import importlib.util
+import multiprocessing
+import os
 import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from multiprocessing.connection import Connection
 from pathlib import Path
 from types import ModuleType
-from typing import Any, Callable
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.models import GraphSummary, RunMeasurement, Workload
+from tools.correctness_validator import CorrectnessValidator
+from tools.graph_fingerprint import GraphFingerprinter
+from tools.stage_profiler import StageProfiler
+from tools.workload_manifest import WorkloadBuilder
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+@dataclass
+class LoadedModule:
+    module: ModuleType
+    graph: Any
+    start: Any
+    goal: Any
+    heuristic: Any
+    summary: GraphSummary
+    # Workload graphs built against this module, keyed by their graph source.
+    workload_graphs: Dict[str, Tuple[Any, GraphSummary]] = field(default_factory=dict)
 
 
 class ExecutionSandbox:
     """Loads transformed modules and executes traversal functions safely."""
 
-    def __init__(self, use_processes: bool, max_workers: int, timeout_s: float | None) -> None:
+    # Loaded modules kept warm; each candidate needs its module for two variants in a row.
+    MAX_CACHED_MODULES = 8
+
+    def __init__(
+        self,
+        use_processes: bool,
+        max_workers: int,
+        timeout_s: float | None,
+        stage_profiler: StageProfiler | None = None,
+        isolate: bool = False,
+        memory_limit_mb: int | None = None,
+        cpu_affinity: List[int] | None = None,
+    ) -> None:
         self.use_processes = use_processes
         self.max_workers = max_workers
         self.timeout_s = timeout_s
+        self.stage_profiler = stage_profiler
+        self.isolate = isolate
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_affinity = cpu_affinity
+        self.fingerprinter = GraphFingerprinter()
+        self.workload_builder = WorkloadBuilder()
+        self.validator = CorrectnessValidator()
+        self._worker: Optional[SandboxWorker] = None
+        self._fixtures: OrderedDict[str, LoadedModule] = OrderedDict()
+
+    def run_function(
+        self,
+        file_path: Path,
+        func_name: str,
+        repeat: int = 1,
+        workload: Workload | None = None,
+        call_kwargs: Dict[str, Any] | None = None,
+    ) -> RunMeasurement:
+        """call_kwargs are passed to every call of func on top of the workload's own arguments."""
+        if not self.isolate:
+            return self._run_inline(file_path, func_name, repeat, workload=workload, call_kwargs=call_kwargs)
+        outcome, payload, stats = self._started_worker().request(
+            (str(file_path), func_name, repeat, workload, call_kwargs), self.timeout_s
+        )
+        if self.stage_profiler is not None:
+            self.stage_profiler.stats.extend(stats)
+        if outcome == "ok":
+            return payload
+        if outcome == "timeout":
+            payload = f"{func_name} exceeded the {self.timeout_s}s deadline"
+        return RunMeasurement(
+            output=None, wall_times_s=[], cpu_time_s=0.0, peak_memory_mb=0.0, outcome=outcome, error=str(payload or "")
+        )
+
+    def fixture_summary(self, file_path: Path) -> Optional[GraphSummary]:
+        """Summarizes the module's GRAPH fixture, loading it where runs happen; None if it cannot load."""
+        return self._probe("fixture_summary", str(file_path))
+
+    def hop_depths(self, file_path: Path, workload: Workload) -> Optional[List[Dict[Any, int]]]:
+        """Hop depths from each of the workload's starts over its graph; None if it cannot load."""
+        return self._probe("hop_depths", str(file_path), workload)
 
-    def run_function(self, file_path: Path, func_name: str) -> tuple[Any, float]:
-        module = self._load_module(file_path)
-        func: Callable[..., Any] = getattr(module, func_name)
-        start = time.perf_counter()
-        # Examples expect (graph, start, [goal, heuristic])
-        graph = getattr(module, "GRAPH", None)
-        start_node = getattr(module, "START_NODE", None)
-        goal = getattr(module, "GOAL_NODE", None)
-        heuristic = getattr(module, "heuristic", None)
-        if goal is not None and heuristic:
-            output = func(graph, start_node, goal, heuristic)
+    def _probe(self, name: str, *args: Any) -> Any:
+        # Probes read fixtures where the runs happen, so an isolated module is never imported here.
+        if not self.isolate:
+            try:
+                return getattr(self, f"_{name}_inline")(*args)
+            except Exception:
+                return None
+        outcome, payload, _ = self._started_worker().request(("probe", name, args), self.timeout_s)
+        return payload if outcome == "ok" else None
+
+    def _fixture_summary_inline(self, file_path: str) -> GraphSummary:
+        return self._load_fixtures(Path(file_path)).summary
+
+    def _hop_depths_inline(self, file_path: str, workload: Workload) -> List[Dict[Any, int]]:
+        graph, _ = self._workload_graph(self._load_fixtures(Path(file_path)), workload)
+        return [self.validator.hop_depths(graph, start) for start in self.workload_builder.starts(workload, graph)]
+
+    def _started_worker(self) -> SandboxWorker:
+        if self._worker is None:
+            self._worker = SandboxWorker(
+                use_processes=self.use_processes,
+                max_workers=self.max_workers,
+                trace_memory=bool(self.stage_profiler and self.stage_profiler.trace_memory),
+                memory_limit_mb=self.memory_limit_mb,
+                cpu_affinity=self.cpu_affinity,
+            )
+        return self._worker
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+        self._fixtures.clear()
+
+    def _run_inline(
+        self,
+        file_path: Path,
+        func_name: str,
+        repeat: int,
+        progress: Callable[[], None] | None = None,
+        workload: Workload | None = None,
+        call_kwargs: Dict[str, Any] | None = None,
+    ) -> RunMeasurement:
+        loaded = self._load_fixtures(file_path)
+        func: Callable[..., Any] = getattr(loaded.module, func_name)
+        summary = loaded.summary
+        extra = call_kwargs or {}
+        if workload is not None:
+            graph, summary = self._workload_graph(loaded, workload)
+            calls = [(args, {**kwargs, **extra}) for args, kwargs in self.workload_builder.build_calls(workload, graph, loaded.module)]
+            if workload.batch:
+                # A batched workload is one call whose own result covers every source.
+                args, kwargs = calls[0]
+                call = partial(func, *args, **kwargs)
+            else:
+                call = partial(_run_batch, func, calls)
+        elif loaded.goal is not None and loaded.heuristic:
+            call = partial(func, loaded.graph, loaded.start, loaded.goal, loaded.heuristic, **extra)
         else:
-            output = func(graph, start_node)
-        elapsed = time.perf_counter() - start
-        return output, elapsed
+            call = partial(func, loaded.graph, loaded.start, **extra)
+
+        wall_times: List[float] = []
+        start_cpu = time.process_time()
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            output = call()
+            wall_times.append(time.perf_counter() - start)
+            if progress is not None:
+                progress()
+        cpu_time = time.process_time() - start_cpu
+        return RunMeasurement(
+            output=output,
+            wall_times_s=wall_times,
+            cpu_time_s=cpu_time,
+            peak_memory_mb=self._peak_memory(func_name, call, progress),
+            graph=summary,
+        )
+
+    def _workload_graph(self, loaded: LoadedModule, workload: Workload) -> Tuple[Any, GraphSummary]:
+        key = repr(workload.graph)
+        if key not in loaded.workload_graphs:
+            graph = self.workload_builder.build_graph(workload.graph, loaded.module)
+            loaded.workload_graphs[key] = (graph, self.fingerprinter.summarize(graph))
+        return loaded.workload_graphs[key]
+
+    def _load_fixtures(self, file_path: Path) -> LoadedModule:
+        # Keyed by content so both variants and every repetition share one module and one GRAPH.
+        key = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        timer = (
+            self.stage_profiler.measure(f"module_load:{file_path.name}", type(self).__name__)
+            if self.stage_profiler
+            else nullcontext()
+        )
+        with timer as record:
+            loaded = self._fixtures.get(key)
+            if loaded is None:
+                module = self._load_module(file_path)
+                # Examples expect (graph, start, [goal, heuristic])
+                graph = getattr(module, "GRAPH", None)
+                loaded = LoadedModule(
+                    module=module,
+                    graph=graph,
+                    start=getattr(module, "START_NODE", None),
+                    goal=getattr(module, "GOAL_NODE", None),
+                    heuristic=getattr(module, "heuristic", None),
+                    summary=self.fingerprinter.summarize(graph),
+                )
+                self._fixtures[key] = loaded
+                if len(self._fixtures) > self.MAX_CACHED_MODULES:
+                    self._fixtures.popitem(last=False)
+            else:
+                self._fixtures.move_to_end(key)
+                if record is not None:
+                    record.cached = True
+            if record is not None:
+                record.items = 1
+        return loaded
+
+    def _peak_memory(self, func_name: str, call: Callable[[], Any], progress: Callable[[], None] | None) -> float:
+        # tracemalloc skews timings, so memory comes from a separate probe run, and only
+        # when --trace-memory asked for it.
+        if self.stage_profiler is None or not self.stage_profiler.trace_memory:
+            return 0.0
+        with self.stage_profiler.measure(f"memory_probe:{func_name}", type(self).__name__) as record:
+            call()
+        if progress is not None:
+            # The probe is one more full call, so it gets its own heartbeat.
+            progress()
+        return record.peak_memory_mb or 0.0
 
     def _load_module(self, file_path: Path) -> ModuleType:
         spec = importlib.util.spec_from_file_location(file_path.stem, file_path)
@@ -38,3 +236,125 @@ class ExecutionSandbox:
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
         return module
+
+
+class SandboxWorker:
+    """Pre-forked subprocess that runs sandbox requests and reports back over a pipe.
+
+    The worker sends a heartbeat after every timed run, so the deadline applies to each run
+    rather than to a whole batch of repetitions. A worker that misses its deadline or dies is
+    killed and a fresh one is forked right away for the next request.
+    """
+
+    def __init__(
+        self,
+        use_processes: bool,
+        max_workers: int,
+        trace_memory: bool,
+        memory_limit_mb: int | None,
+        cpu_affinity: List[int] | None,
+    ) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        self._args = (use_processes, max_workers, trace_memory, memory_limit_mb, cpu_affinity)
+        self.process: Any = None
+        self.conn: Optional[Connection] = None
+        self._start()
+
+    def request(self, payload: tuple, timeout_s: float | None) -> tuple[str, Any, list]:
+        assert self.conn is not None
+        self.conn.send(payload)
+        while True:
+            if not self.conn.poll(timeout_s):
+                self._restart()
+                return "timeout", None, []
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                code = self.process.exitcode if self.process is not None else None
+                self._restart()
+                return "crashed", f"worker exited with code {code}", []
+            if message[0] != "tick":
+                return message
+
+    def close(self) -> None:
+        if self.conn is not None:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if self.process is not None:
+            self.process.join(timeout=1.0)
+        self._kill()
+
+    def _start(self) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(target=_worker_main, args=(child_conn, *self._args))
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def _restart(self) -> None:
+        self._kill()
+        self._start()
+
+    def _kill(self) -> None:
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+
+
+def _run_batch(func: Callable[..., Any], calls: List[Tuple[tuple, dict]]) -> List[Any]:
+    return [func(*args, **kwargs) for args, kwargs in calls]
+
+
+def _worker_main(
+    conn: Connection,
+    use_processes: bool,
+    max_workers: int,
+    trace_memory: bool,
+    memory_limit_mb: int | None,
+    cpu_affinity: List[int] | None,
+) -> None:
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpu_affinity)
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # One sandbox for the worker's lifetime keeps its module and fixture cache warm across requests.
+    sandbox = ExecutionSandbox(use_processes, max_workers, None)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        if request[0] == "probe":
+            _, name, args = request
+            try:
+                conn.send(("ok", getattr(sandbox, f"_{name}_inline")(*args), []))
+            except Exception as exc:
+                conn.send(("error", f"{type(exc).__name__}: {exc}", []))
+            continue
+        file_path, func_name, repeat, workload, call_kwargs = request
+        profiler = StageProfiler(trace_memory=trace_memory)
+        sandbox.stage_profiler = profiler
+        try:
+            measurement = sandbox._run_inline(
+                Path(file_path),
+                func_name,
+                repeat,
+                progress=lambda: conn.send(("tick",)),
+                workload=workload,
+                call_kwargs=call_kwargs,
+            )
+            conn.send(("ok", measurement, profiler.stats))
+        except MemoryError:
+            conn.send(("memory_limit", f"{func_name} exceeded the {memory_limit_mb}MB limit", profiler.stats))
+        except Exception as exc:
+            conn.send(("error", f"{type(exc).__name__}: {exc}", profiler.stats))
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import ast
+from pathlib import Path
+from typing import List, Optional, Set
+
+from core.models import FunctionSplit, TraversalCandidate
+from tools.dependency_analyzer import DependencyAnalyzer
+
+
+class FunctionSplitter:
+    """Separates a traversal function's per-node work from its traversal machinery.
+
+    The machinery (worklist pops, visited and stale checks, output appends and the neighbor or
+    edge loops) is what the parallel templates rebuild; everything else in the main loop is
+    per-node work they must still run, once for every node (or round) the original reaches.
+    """
+
+    CONTROL_FLOW = (ast.Break, ast.Continue, ast.Return, ast.Yield, ast.YieldFrom, ast.Global, ast.Nonlocal)
+
+    def split(self, candidate: TraversalCandidate, skip_lines: Set[int] | None = None) -> Optional[FunctionSplit]:
+        """Returns None when the function is missing or takes no graph and start node.
+
+        A split whose per-node work cannot be isolated keeps its signature but has isolated=False.
+        Statements starting on skip_lines (reductions the rewriter plans separately) are left out.
+        """
+        tree = ast.parse(Path(candidate.file_path).read_text(encoding="utf-8"))
+        func = next(
+            (n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef) and n.name == candidate.function_name), None
+        )
+        if func is None:
+            return None
+        return self.split_function(func, skip_lines)
+
+    def split_function(self, func: ast.FunctionDef, skip_lines: Set[int] | None = None) -> Optional[FunctionSplit]:
+        args = func.args
+        positional = [a.arg for a in args.posonlyargs + args.args]
+        if len(positional) < 2:
+            return None
+        split = FunctionSplit(
+            params=positional
+            + ([args.vararg.arg] if args.vararg else [])
+            + [a.arg for a in args.kwonlyargs]
+            + ([args.kwarg.arg] if args.kwarg else []),
+            signature=ast.unparse(args),
+            forward=self._forward(args),
+        )
+        split.extras = split.params[2:]
+        split.isolated = self._separate(func, split, skip_lines or set())
+        return split
+
+    def _separate(self, func: ast.FunctionDef, split: FunctionSplit, skip_lines: Set[int]) -> bool:
+        loop = next((stmt for stmt in func.body if isinstance(stmt, (ast.While, ast.For))), None)
+        if loop is None:
+            return self._separate_recursive(func, split, skip_lines)
+        before = [stmt for stmt in func.body if stmt.lineno < loop.lineno]
+        prior = self._prior(before)
+        state = self._state(loop, prior)
+        if isinstance(loop, ast.For):
+            # A round loop (Bellman-Ford): its target is the per-round variable.
+            split.node_vars = [n.id for n in ast.walk(loop.target) if isinstance(n, ast.Name)]
+        work = self._work(loop.body, state, split, skip_lines)
+        if work is None or not split.node_vars:
+            return False
+        return self._resolve(func, split, work, before, prior, state)
+
+    def _separate_recursive(self, func: ast.FunctionDef, split: FunctionSplit, skip_lines: Set[int]) -> bool:
+        # The nested-helper shape: `def dfs(node): ...` recursing on neighbors, then `dfs(start)`
+        # and `return order`, where order is the list the helper appends each node to.
+        index, helper = next(
+            ((i, s) for i, s in enumerate(func.body) if isinstance(s, ast.FunctionDef) and self._recurses(s)),
+            (None, None),
+        )
+        if helper is None or len(helper.args.args) != 1 or ast.unparse(helper.args) != helper.args.args[0].arg:
+            return False
+        node = helper.args.args[0].arg
+        rest = func.body[index + 1:]
+        entry = f"{helper.name}({split.params[1]})"
+        if len(rest) != 2 or ast.unparse(rest[0]) != entry or not isinstance(rest[1], ast.Return):
+            return False
+        returned = rest[1].value
+        appends = {
+            ast.unparse(n.func.value)
+            for n in ast.walk(helper)
+            if isinstance(n, ast.Call)
+            and isinstance(n.func, ast.Attribute)
+            and n.func.attr == "append"
+            and [ast.unparse(arg) for arg in n.args] == [node]
+        }
+        if not isinstance(returned, ast.Name) or returned.id not in appends:
+            return False
+        before = func.body[:index]
+        prior = self._prior(before)
+        # The recursive calls are machinery too, so whatever makes them is not per-node work.
+        state = self._state(helper, prior) | {helper.name}
+        split.node_vars = [node]
+        split.recursive = True
+        # `if node in visited: return` is the recursion's visited guard.
+        work = self._work(helper.body, state, split, skip_lines, exits=(ast.Return, ast.Pass))
+        if work is None:
+            return False
+        return self._resolve(func, split, work, before, prior, state)
+
+    def _resolve(
+        self,
+        func: ast.FunctionDef,
+        split: FunctionSplit,
+        work: List[ast.stmt],
+        before: List[ast.stmt],
+        prior: Set[str],
+        state: Set[str],
+    ) -> bool:
+        # Work may read the loop's bindings, parameters, globals, names it assigns itself and
+        # pre-loop constants, which the template recomputes once as its setup.
+        assigned = {n.id for stmt in work for n in ast.walk(stmt) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+        known = set(split.node_vars) | set(split.params) | assigned
+        setup: List[ast.Assign] = []
+        pending = [n.id for stmt in work for n in ast.walk(stmt) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)]
+        while pending:
+            name = pending.pop()
+            if name in known:
+                continue
+            known.add(name)
+            if name in state:
+                return False
+            if name not in prior:
+                continue
+            sources = [s for s in before if isinstance(s, ast.Assign) and self._binds(s, name)]
+            if len(sources) != 1 or len(sources[0].targets) != 1 or not isinstance(sources[0].targets[0], ast.Name):
+                return False
+            setup.append(sources[0])
+            pending.extend(n.id for n in ast.walk(sources[0].value) if isinstance(n, ast.Name))
+        # The templates only pass extra parameters on to the per-node work and its setup; one that
+        # steers the traversal itself would be silently ignored.
+        inside = {id(n) for stmt in work + setup for n in ast.walk(stmt)}
+        steering = {n.id for stmt in func.body for n in ast.walk(stmt) if isinstance(n, ast.Name) and id(n) not in inside}
+        if steering & set(split.extras):
+            return False
+        setup.sort(key=lambda stmt: stmt.lineno)
+        split.setup = [ast.unparse(stmt) for stmt in setup]
+        split.setup_names = [stmt.targets[0].id for stmt in setup]
+        split.visit = [ast.unparse(stmt) for stmt in work]
+        return True
+
+    def _work(
+        self,
+        body: List[ast.stmt],
+        state: Set[str],
+        split: FunctionSplit,
+        skip_lines: Set[int],
+        exits: tuple = (ast.Continue, ast.Pass),
+    ) -> Optional[List[ast.stmt]]:
+        work: List[ast.stmt] = []
+        for stmt in body:
+            if stmt.lineno in skip_lines:
+                continue
+            if self._is_pop(stmt, state):
+                split.node_vars = [n.id for n in ast.walk(stmt.targets[0]) if isinstance(n, ast.Name)]
+                continue
+            if not self._touches(stmt, state):
+                if any(isinstance(n, self.CONTROL_FLOW) for n in ast.walk(stmt)):
+                    return None
+                work.append(stmt)
+            elif isinstance(stmt, ast.If) and not stmt.orelse and self._touches(stmt.test, state):
+                # A `continue` (or, in a recursion, `return`) guard is a stale or visited check and
+                # `if node not in visited:` wraps
+                # the visit itself; the templates apply the same guards.
+                if all(isinstance(s, exits) for s in stmt.body):
+                    continue
+                inner = self._work(stmt.body, state, split, skip_lines, exits)
+                if inner is None:
+                    return None
+                work.extend(inner)
+            elif not (isinstance(stmt, ast.For) or self._updates_state(stmt, state)):
+                return None
+        return work
+
+    def _updates_state(self, stmt: ast.stmt, state: Set[str]) -> bool:
+        # Output appends, visited adds, heap pushes and distance writes.
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call):
+            func = stmt.value.func
+            if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) and func.value.id in state:
+                return func.attr in DependencyAnalyzer.MUTATING_METHODS
+            name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else ""
+            args = stmt.value.args
+            return name in DependencyAnalyzer.HEAP_FUNCTIONS and bool(args) and self._touches(args[0], state)
+        if isinstance(stmt, (ast.Assign, ast.AugAssign)):
+            targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+            return all(self._touches(t, state) for t in targets)
+        return False
+
+    def _prior(self, before: List[ast.stmt]) -> Set[str]:
+        return {n.id for stmt in before for n in ast.walk(stmt) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+
+    def _recurses(self, func: ast.FunctionDef) -> bool:
+        return any(isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == func.name for n in ast.walk(func))
+
+    def _state(self, loop: ast.AST, prior: Set[str]) -> Set[str]:
+        # Pre-loop locals the loop tests or mutates: worklists, visited sets, outputs, distances.
+        state: Set[str] = set()
+        if isinstance(loop, ast.While):
+            state |= {n.id for n in ast.walk(loop.test) if isinstance(n, ast.Name)}
+        for node in ast.walk(loop):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                state.add(node.id)
+            elif isinstance(node, (ast.Subscript, ast.Attribute)) and isinstance(node.ctx, (ast.Store, ast.Del)):
+                base = node.value
+                if isinstance(base, ast.Name):
+                    state.add(base.id)
+            elif isinstance(node, ast.Call):
+                func = node.func
+                if (
+                    isinstance(func, ast.Attribute)
+                    and func.attr in DependencyAnalyzer.MUTATING_METHODS
+                    and isinstance(func.value, ast.Name)
+                ):
+                    state.add(func.value.id)
+                name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else ""
+                if name in DependencyAnalyzer.HEAP_FUNCTIONS and node.args and isinstance(node.args[0], ast.Name):
+                    state.add(node.args[0].id)
+        return state & prior
+
+    def _is_pop(self, stmt: ast.stmt, state: Set[str]) -> bool:
+        if not (isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.value, ast.Call)):
+            return False
+        func = stmt.value.func
+        if isinstance(func, ast.Attribute) and func.attr in ("pop", "popleft"):
+            return isinstance(func.value, ast.Name) and func.value.id in state
+        name = func.attr if isinstance(func, ast.Attribute) else func.id if isinstance(func, ast.Name) else ""
+        return name == "heappop"
+
+    def _touches(self, node: ast.AST, state: Set[str]) -> bool:
+        return any(isinstance(n, ast.Name) and n.id in state for n in ast.walk(node))
+
+    def _binds(self, stmt: ast.Assign, name: str) -> bool:
+        return any(isinstance(n, ast.Name) and n.id == name for t in stmt.targets for n in ast.walk(t))
+
+    def _forward(self, args: ast.arguments) -> str:
+        # Call arguments that hand every parameter on unchanged.
+        parts = [a.arg for a in args.posonlyargs + args.args]
+        if args.vararg:
+            parts.append(f"*{args.vararg.arg}")
+        parts.extend(f"{a.arg}={a.arg}" for a in args.kwonlyargs)
+        if args.kwarg:
+            parts.append(f"**{args.kwarg.arg}")
+        return ", ".join(parts)
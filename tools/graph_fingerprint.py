@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any
+
+from core.models import GraphSummary
+
+
+class GraphFingerprinter:
+    """Summarizes adjacency-dict graphs by size and a stable content hash."""
+
+    def summarize(self, graph: Any) -> GraphSummary:
+        if not isinstance(graph, dict):
+            return GraphSummary(nodes=0, edges=0, fingerprint="")
+        digest = hashlib.sha256()
+        edges = 0
+        for node in sorted(graph, key=repr):
+            neighbors = graph[node]
+            edges += len(neighbors)
+            digest.update(repr(node).encode("utf-8"))
+            # Weighted graphs hash (neighbor, weight) pairs; list order matters for traversal order.
+            items = sorted(neighbors.items(), key=repr) if isinstance(neighbors, dict) else list(neighbors)
+            digest.update(repr(items).encode("utf-8"))
+        return GraphSummary(nodes=len(graph), edges=edges, fingerprint=digest.hexdigest()[:16])
@@ -1,17 +1,183 @@
 from __future__ import annotations
 
-from typing import Dict
+import sqlite3
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from core.models import ExecutionMetrics, StrategyDecision, StrategyRecommendation, WorkProfile
+from tools.machine_fingerprint import MachineFingerprinter
 
 
 class ParallelizationKnowledgeBase:
-    """Encodes heuristic strategies per traversal type."""
+    """Encodes heuristic strategies per traversal type and learns better ones from past runs.
+
+    With a database path, every validated execution is stored as an observation keyed by
+    traversal type, code feature signature, graph size class and machine. Lookups return
+    the configuration with the best mean speedup among correct runs, with a confidence
+    that grows with the number of observations, and fall back to the heuristic rules.
+    """
+
+    # Confidence is samples / (samples + PRIOR_SAMPLES): 3 runs give 0.5, 9 runs give 0.75.
+    PRIOR_SAMPLES = 3
+    SIZE_CLASSES = ((100, "tiny"), (1_000, "small"), (10_000, "medium"), (100_000, "large"))
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS observations (
+            traversal_type TEXT NOT NULL,
+            feature_signature TEXT NOT NULL,
+            size_class TEXT NOT NULL,
+            machine TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            workers INTEGER,
+            granularity INTEGER NOT NULL,
+            speedup REAL NOT NULL,
+            correct INTEGER NOT NULL,
+            recorded_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS observations_lookup
+            ON observations (traversal_type, feature_signature, machine, size_class);
+        CREATE TABLE IF NOT EXISTS calibration (
+            machine TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (machine, name)
+        );
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, db_path: Path | None = None) -> None:
         self.rules: Dict[str, str] = {
             "bfs": "threads",
             "dfs": "threads",
             "astar": "processes",
+            "dijkstra": "threads",
+            "bellman_ford": "threads",
         }
+        # Strategies the code rewriter has templates for, per traversal type.
+        self.emittable: Dict[str, Set[str]] = {
+            "bfs": {"sequential", "threads", "asyncio", "free_threads"},
+            "dfs": {"sequential", "threads", "asyncio"},
+            "astar": {"sequential"},
+            "dijkstra": {"sequential", "threads", "asyncio", "free_threads"},
+            "bellman_ford": {"sequential", "threads", "free_threads"},
+        }
+        # Accumulator reductions (see LoopDependence) the rewriter can merge without locks, per
+        # traversal type; only the level-synchronous BFS template has boundaries to merge at.
+        self.reduction_operators: Dict[str, Set[str]] = {
+            "bfs": {"sum", "product", "min", "max", "union"},
+        }
+        self.machine = MachineFingerprinter().digest()
+        self.db: Optional[sqlite3.Connection] = None
+        if db_path is not None:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(db_path)
+            self.db.executescript(self.SCHEMA)
+
+    def get_default_strategy(
+        self, traversal_type: str, feature_signature: str | None = None, size_class: str | None = None
+    ) -> str:
+        return self.recommend(traversal_type, feature_signature, size_class).strategy
+
+    def recommend(
+        self, traversal_type: str, feature_signature: str | None = None, size_class: str | None = None
+    ) -> StrategyRecommendation:
+        learned = self._best_observed(traversal_type, feature_signature, size_class)
+        if learned is not None:
+            return learned
+        return StrategyRecommendation(strategy=self.rules.get(traversal_type, "sequential"), confidence=0.0)
+
+    def supports(self, traversal_type: str, strategy: str) -> bool:
+        return strategy in self.emittable.get(traversal_type, {"sequential"})
+
+    def record(self, decision: StrategyDecision, metrics: ExecutionMetrics) -> None:
+        if self.db is None or metrics.outcome != "ok":
+            return
+        with self.db:
+            self.db.execute(
+                "INSERT INTO observations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    decision.candidate.traversal_type,
+                    self.feature_signature(decision.work_profile),
+                    self.size_class(metrics.graph.nodes if metrics.graph else 0),
+                    self.machine,
+                    decision.strategy,
+                    decision.workers,
+                    decision.granularity,
+                    metrics.speedup,
+                    int(metrics.correct),
+                    time.time(),
+                ),
+            )
+
+    def calibration(self, measure: Callable[[], Dict[str, float]]) -> Dict[str, float]:
+        # Measured once per machine; re-measuring every run would make the emitted code churn.
+        if self.db is None:
+            return measure()
+        rows = self.db.execute("SELECT name, value FROM calibration WHERE machine = ?", (self.machine,)).fetchall()
+        if rows:
+            return dict(rows)
+        values = measure()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO calibration VALUES (?, ?, ?)",
+                [(self.machine, name, value) for name, value in values.items()],
+            )
+        return values
+
+    def revision(self) -> int:
+        if self.db is None:
+            return 0
+        return self.db.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+    def close(self) -> None:
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def feature_signature(self, profile: WorkProfile | None) -> str:
+        if profile is None:
+            return "unknown"
+        return f"{profile.work_class}:{','.join(profile.io_calls)}"
+
+    def size_class(self, nodes: int) -> str:
+        for limit, name in self.SIZE_CLASSES:
+            if nodes < limit:
+                return name
+        return "huge"
 
-    def get_default_strategy(self, traversal_type: str) -> str:
-        return self.rules.get(traversal_type, "sequential")
+    def _best_observed(
+        self, traversal_type: str, feature_signature: str | None, size_class: str | None
+    ) -> Optional[StrategyRecommendation]:
+        if self.db is None:
+            return None
+        query = (
+            "SELECT strategy, workers, granularity, COUNT(*), AVG(speedup), MIN(correct) FROM observations "
+            "WHERE traversal_type = ? AND machine = ?"
+        )
+        params: list = [traversal_type, self.machine]
+        if feature_signature is not None:
+            query += " AND feature_signature = ?"
+            params.append(feature_signature)
+        # Without a size class (no fixture graph to size up front) all size classes are pooled.
+        if size_class is not None:
+            query += " AND size_class = ?"
+            params.append(size_class)
+        query += " GROUP BY strategy, workers, granularity"
+        rows = self.db.execute(query, params).fetchall()
+        # A configuration that ever produced a wrong answer is never recommended.
+        candidates = [row for row in rows if row[5] == 1 and self.supports(traversal_type, row[0])]
+        if not candidates:
+            return None
+        strategy, workers, granularity, samples, mean_speedup, _ = max(candidates, key=lambda row: row[4])
+        if strategy != "sequential" and mean_speedup < 1.0:
+            # Nothing parallel has paid off here yet.
+            strategy, workers, granularity = "sequential", None, 1
+        return StrategyRecommendation(
+            strategy=strategy,
+            confidence=samples / (samples + self.PRIOR_SAMPLES),
+            workers=workers,
+            granularity=granularity,
+            samples=samples,
+            mean_speedup=mean_speedup,
+            source="history",
+        )
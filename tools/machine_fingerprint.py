@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import platform
+import sys
+from typing import Dict
+
+
+class MachineFingerprinter:
+    """Describes the host so stored timings and tuned settings are only reused on the same hardware."""
+
+    def describe(self) -> Dict[str, str]:
+        info = {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": str(os.cpu_count()),
+            "python": platform.python_version(),
+        }
+        # Only added when set, so fingerprints taken on regular builds stay unchanged.
+        if not self.gil_enabled():
+            info["free_threaded"] = "1"
+        return info
+
+    def gil_enabled(self) -> bool:
+        # sys._is_gil_enabled exists from 3.13; older interpreters always have the GIL.
+        return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+    def interpreter_mode(self) -> str:
+        return "gil" if self.gil_enabled() else "free-threaded"
+
+    def digest(self) -> str:
+        return hashlib.sha256(json.dumps(self.describe(), sort_keys=True).encode("utf-8")).hexdigest()[:16]
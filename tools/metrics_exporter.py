@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+from core.models import ExecutionMetrics, TimingStats
+
+
+class MetricsExporter:
+    """Writes execution metrics as JSON Lines, CSV and OpenMetrics text for dashboards and regression jobs."""
+
+    JSONL_NAME = "metrics.jsonl"
+    CSV_NAME = "metrics.csv"
+    OPENMETRICS_NAME = "metrics.prom"
+
+    def __init__(self, output_dir: Path) -> None:
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.timestamp = time.time()
+
+    def export_all(self, metrics: List[ExecutionMetrics]) -> List[Path]:
+        records = [self.to_record(m) for m in metrics]
+        return [
+            self.export_jsonl(records),
+            self.export_csv(records),
+            self.export_openmetrics(records),
+        ]
+
+    def to_record(self, m: ExecutionMetrics) -> Dict[str, Any]:
+        record: Dict[str, Any] = {
+            "run_id": self.run_id,
+            "timestamp": self.timestamp,
+            "file": str(m.candidate.file_path),
+            "candidate": m.candidate.function_name,
+            "workload": m.workload,
+            "variant": m.variant,
+            "traversal_type": m.candidate.traversal_type,
+            "strategy": m.strategy,
+            "interpreter": m.interpreter,
+            "workers": m.workers,
+            "graph_nodes": m.graph.nodes if m.graph else 0,
+            "graph_edges": m.graph.edges if m.graph else 0,
+            "graph_fingerprint": m.graph.fingerprint if m.graph else "",
+            "outcome": m.outcome,
+            "correct": m.correct,
+            "speedup": m.speedup,
+            "seq_memory_mb": m.seq_memory_mb,
+            "par_memory_mb": m.par_memory_mb,
+            "cpu_utilization_pct": m.cpu_utilization_pct,
+            "throughput_qps": m.throughput_qps,
+        }
+        record.update(self._timing_fields("seq", m.sequential_timing, m.sequential_time_s))
+        record.update(self._timing_fields("par", m.parallel_timing, m.parallel_time_s))
+        return record
+
+    def export_jsonl(self, records: List[Dict[str, Any]]) -> Path:
+        path = self.output_dir / self.JSONL_NAME
+        with path.open("a", encoding="utf-8") as fh:
+            for record in records:
+                fh.write(json.dumps(record) + "\n")
+        return path
+
+    def export_csv(self, records: List[Dict[str, Any]]) -> Path:
+        path = self.output_dir / self.CSV_NAME
+        if not records:
+            return path
+        # Raw samples only belong in the JSON Lines file; CSV keeps one scalar per column.
+        rows = [{k: v for k, v in r.items() if not k.endswith("_samples_s")} for r in records]
+        fieldnames = list(rows[0].keys())
+        write_header = not path.exists() or path.stat().st_size == 0
+        if not write_header and self._csv_header(path) != fieldnames:
+            # Appending under another release's columns would shift values under the wrong headers.
+            self._rotate(path)
+            write_header = True
+        with path.open("a", encoding="utf-8", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=fieldnames)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def _csv_header(self, path: Path) -> List[str]:
+        with path.open(encoding="utf-8", newline="") as fh:
+            return next(csv.reader(fh), [])
+
+    def _rotate(self, path: Path) -> Path:
+        index = 1
+        while (rotated := path.with_name(f"{path.stem}.{index}{path.suffix}")).exists():
+            index += 1
+        path.rename(rotated)
+        return rotated
+
+    def export_openmetrics(self, records: List[Dict[str, Any]]) -> Path:
+        path = self.output_dir / self.OPENMETRICS_NAME
+        families = [
+            ("traversal_sequential_seconds", "gauge", "seconds", "Median sequential wall time", "seq_median_s"),
+            ("traversal_parallel_seconds", "gauge", "seconds", "Median parallel wall time", "par_median_s"),
+            ("traversal_parallel_stdev_seconds", "gauge", "seconds", "Stdev of parallel wall time", "par_stdev_s"),
+            ("traversal_speedup_ratio", "gauge", "ratio", "Sequential over parallel median time", "speedup"),
+            ("traversal_parallel_memory_megabytes", "gauge", "megabytes", "Peak parallel memory", "par_memory_mb"),
+            ("traversal_cpu_utilization_percent", "gauge", "percent", "Parallel CPU time over wall time", "cpu_utilization_pct"),
+            ("traversal_correct", "gauge", "", "1 if parallel output matched sequential", "correct"),
+            ("traversal_throughput_queries_per_second", "gauge", "", "Sources per second of a batched variant", "throughput_qps"),
+        ]
+        lines: List[str] = []
+        for name, kind, unit, help_text, key in families:
+            lines.append(f"# TYPE {name} {kind}")
+            if unit:
+                lines.append(f"# UNIT {name} {unit}")
+            lines.append(f"# HELP {name} {help_text}.")
+            for record in records:
+                lines.append(f"{name}{{{self._labels(record)}}} {float(record[key])}")
+        lines.append("# EOF")
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+    def _timing_fields(self, prefix: str, timing: TimingStats | None, fallback_s: float) -> Dict[str, Any]:
+        if timing is None:
+            timing = TimingStats([fallback_s], fallback_s, fallback_s, 0.0, fallback_s, fallback_s)
+        return {
+            f"{prefix}_samples_s": timing.samples_s,
+            f"{prefix}_mean_s": timing.mean_s,
+            f"{prefix}_median_s": timing.median_s,
+            f"{prefix}_stdev_s": timing.stdev_s,
+            f"{prefix}_min_s": timing.min_s,
+            f"{prefix}_max_s": timing.max_s,
+        }
+
+    def _labels(self, record: Dict[str, Any]) -> str:
+        labels = {
+            "candidate": record["candidate"],
+            "workload": record["workload"],
+            "variant": record["variant"],
+            "file": record["file"],
+            "strategy": record["strategy"],
+            "interpreter": record["interpreter"],
+            "workers": str(record["workers"]),
+            "graph": record["graph_fingerprint"],
+        }
+        return ",".join(f'{k}="{self._escape(v)}"' for k, v in labels.items())
+
+    def _escape(self, value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
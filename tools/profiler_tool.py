@@ -1,29 +1,84 @@
 from __future__ import annotations
 
-from core.models import ExecutionMetrics, TransformationResult
+import statistics
+from typing import List
+
+from core.models import ExecutionMetrics, RunMeasurement, TimingStats, TransformationResult
+from tools.machine_fingerprint import MachineFingerprinter
 
 
 class ProfilerTool:
-    """Computes simple speedup metrics."""
+    """Computes speedup, timing distribution, memory and CPU utilization metrics."""
+
+    def __init__(self) -> None:
+        # Runs happen in this interpreter or a fork of it, so the mode is the same for every run.
+        self.interpreter = MachineFingerprinter().interpreter_mode()
 
     def compute_speedup(self, seq_time: float, par_time: float) -> float:
         if par_time <= 0:
             return float("inf")
         return seq_time / par_time
 
+    def summarize_timings(self, samples: List[float]) -> TimingStats:
+        return TimingStats(
+            samples_s=list(samples),
+            mean_s=statistics.fmean(samples),
+            median_s=statistics.median(samples),
+            stdev_s=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            min_s=min(samples),
+            max_s=max(samples),
+        )
+
     def build_metrics(
         self,
         transformation: TransformationResult,
-        seq_time: float,
-        par_time: float,
-        speedup: float,
+        seq: RunMeasurement,
+        par: RunMeasurement,
         correct: bool,
+        workers: int,
     ) -> ExecutionMetrics:
+        seq_timing = self.summarize_timings(seq.wall_times_s)
+        par_timing = self.summarize_timings(par.wall_times_s)
+        speedup = self.compute_speedup(seq_timing.median_s, par_timing.median_s)
+        # CPU Util = CPU Time / Wall Time * 100 (Can be >100% for multi-core)
+        par_wall = sum(par.wall_times_s)
+        cpu_util = (par.cpu_time_s / par_wall * 100) if par_wall > 0 else 0.0
         return ExecutionMetrics(
             candidate=transformation.candidate,
-            sequential_time_s=seq_time,
-            parallel_time_s=par_time,
+            sequential_time_s=seq_timing.median_s,
+            parallel_time_s=par_timing.median_s,
             speedup=speedup,
             correct=correct,
-            details={},
+            strategy=transformation.strategy,
+            workers=workers,
+            interpreter=self.interpreter,
+            graph=seq.graph,
+            sequential_timing=seq_timing,
+            parallel_timing=par_timing,
+            seq_memory_mb=seq.peak_memory_mb,
+            par_memory_mb=par.peak_memory_mb,
+            cpu_utilization_pct=round(cpu_util, 2),
+        )
+
+    def build_failed_metrics(
+        self,
+        transformation: TransformationResult,
+        seq: RunMeasurement,
+        par: RunMeasurement,
+        workers: int,
+    ) -> ExecutionMetrics:
+        failed = seq if seq.outcome != "ok" else par
+        variant = "sequential" if failed is seq else "parallel"
+        return ExecutionMetrics(
+            candidate=transformation.candidate,
+            sequential_time_s=self.summarize_timings(seq.wall_times_s).median_s if seq.wall_times_s else 0.0,
+            parallel_time_s=self.summarize_timings(par.wall_times_s).median_s if par.wall_times_s else 0.0,
+            speedup=0.0,
+            correct=False,
+            strategy=transformation.strategy,
+            workers=workers,
+            interpreter=self.interpreter,
+            graph=seq.graph or par.graph,
+            outcome=failed.outcome,
+            error=f"{variant}: {failed.error}",
         )
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List
+
+from core.models import StageStats
+
+
+class StageProfiler:
+    """Records wall time, CPU time, item counts and peak memory per pipeline stage."""
+
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.stats: List[StageStats] = []
+        # Peak seen so far by each open measurement, so nested stages do not hide their parent's peak.
+        self._peaks: List[int] = []
+
+    @contextmanager
+    def measure(self, stage: str, agent: str) -> Iterator[StageStats]:
+        record = StageStats(stage=stage, agent=agent)
+        # Appended up front so nested stages are listed after the stage that contains them.
+        self.stats.append(record)
+        started_tracing = self._enter_memory()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall_time_s = time.perf_counter() - start_wall
+            record.cpu_time_s = time.process_time() - start_cpu
+            if self.trace_memory:
+                record.peak_memory_mb = round(self._exit_memory(started_tracing) / (1024 * 1024), 3)
+
+    def format_report(self) -> List[str]:
+        lines = []
+        for s in self.stats:
+            memory = f" peak={s.peak_memory_mb:.3f}MB" if s.peak_memory_mb is not None else ""
+            cached = " (cached)" if s.cached else ""
+            lines.append(
+                f"- {s.stage} [{s.agent}]: wall={s.wall_time_s:.6f}s cpu={s.cpu_time_s:.6f}s "
+                f"items={s.items}{memory}{cached}"
+            )
+        return lines
+
+    def export_json(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps([asdict(s) for s in self.stats], indent=2), encoding="utf-8")
+
+    def _enter_memory(self) -> bool:
+        if not self.trace_memory:
+            return False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._peaks.append(0)
+            return True
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+        return False
+
+    def _exit_memory(self, started_tracing: bool) -> int:
+        peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+        if started_tracing:
+            tracemalloc.stop()
+        elif self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        return peak
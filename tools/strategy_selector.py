@@ -1,29 +1,105 @@
 from __future__ import annotations
 
-from core.models import AnalysisResult, StrategyDecision, StrategyResult
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict
+
+from core.models import AnalysisArtifact, AnalysisResult, StrategyDecision, StrategyResult
+from tools.cost_model import CostModel
 from tools.knowledge_base import ParallelizationKnowledgeBase
 
 
 class StrategySelector:
     """Maps analysis artifacts to concrete parallelization strategies."""
 
-    def __init__(self, kb: ParallelizationKnowledgeBase) -> None:
+    # Learned recommendations below this confidence defer to the cost model.
+    MIN_CONFIDENCE = 0.5
+
+    def __init__(self, kb: ParallelizationKnowledgeBase, cost_model: CostModel | None = None) -> None:
         self.kb = kb
+        self.cost_model = cost_model or CostModel()
+        self._calibrated = False
+
+    def select(self, analysis: AnalysisResult, graph_nodes: Dict[Path, int] | None = None) -> StrategyResult:
+        """graph_nodes maps a source file to its fixture graph's node count, where known."""
+        if not self._calibrated:
+            self.cost_model.apply_calibration(self.kb.calibration(self.cost_model.calibrate))
+            self._calibrated = True
+        graph_nodes = graph_nodes or {}
+        return StrategyResult(
+            decisions=[
+                self._with_dispatch(self.decide(artifact, graph_nodes.get(artifact.candidate.file_path)))
+                for artifact in analysis.artifacts
+            ]
+        )
+
+    def _with_dispatch(self, decision: StrategyDecision) -> StrategyDecision:
+        if decision.strategy == "sequential":
+            return decision
+        return replace(
+            decision,
+            inline_below_nodes=self.cost_model.inline_below_nodes(decision.strategy, decision.work_profile),
+            dispatch_cost_s=self.cost_model.dispatch_overhead_s.get(decision.strategy, 0.0),
+        )
 
-    def select(self, analysis: AnalysisResult) -> StrategyResult:
-        decisions = []
-        for artifact in analysis.artifacts:
-            if not artifact.safe_to_parallelize:
-                strategy = "sequential"
-                rationale = "unsafe shared state"
-            else:
-                strategy = self.kb.get_default_strategy(artifact.candidate.traversal_type)
-                rationale = f"default for {artifact.candidate.traversal_type}"
-            decisions.append(
-                StrategyDecision(
-                    candidate=artifact.candidate,
-                    strategy=strategy,
-                    rationale=rationale,
-                )
+    def decide(self, artifact: AnalysisArtifact, graph_nodes: int | None = None) -> StrategyDecision:
+        candidate = artifact.candidate
+        profile = artifact.work_profile
+        if not artifact.safe_to_parallelize:
+            return StrategyDecision(
+                candidate=candidate, strategy="sequential", rationale=artifact.notes or "unsafe shared state"
+            )
+        reductions = artifact.loop_dependence.reductions if artifact.loop_dependence else []
+        mergeable = self.kb.reduction_operators.get(candidate.traversal_type, set())
+        unsupported = sorted({r.operator for r in reductions} - mergeable)
+        if unsupported:
+            # The templates rebuild only the traversal itself; an accumulator they cannot merge would be lost.
+            return StrategyDecision(
+                candidate=candidate,
+                strategy="sequential",
+                rationale=f"no lock-free {'/'.join(unsupported)} reduction for {', '.join(r.variable for r in reductions)}",
+                work_profile=profile,
+            )
+        # Parallelism that wins on large graphs can lose on small ones, so history is only
+        # pooled across sizes when the fixture's size is unknown.
+        size_class = self.kb.size_class(graph_nodes) if graph_nodes is not None else None
+        learned = self.kb.recommend(candidate.traversal_type, self.kb.feature_signature(profile), size_class)
+        if learned.source == "history" and learned.confidence >= self.MIN_CONFIDENCE:
+            return StrategyDecision(
+                candidate=candidate,
+                strategy=learned.strategy,
+                rationale=(
+                    f"learned from {learned.samples} run(s): {learned.mean_speedup:.2f}x mean speedup "
+                    f"(confidence {learned.confidence:.2f})"
+                ),
+                granularity=learned.granularity,
+                workers=learned.workers,
+                work_profile=profile,
+                reductions=reductions,
+            )
+        if profile is None:
+            return StrategyDecision(
+                candidate=candidate,
+                strategy=learned.strategy,
+                rationale=f"default for {candidate.traversal_type}",
+                reductions=reductions,
             )
-        return StrategyResult(decisions=decisions)
+        estimate = self.cost_model.estimate(profile)
+        strategy, granularity, rationale = estimate.strategy, estimate.granularity, estimate.rationale
+        if not self.kb.supports(candidate.traversal_type, strategy):
+            # Waiting work still overlaps on threads; CPU work on threads only adds GIL contention
+            # unless the interpreter has none.
+            fallback = "threads" if profile.work_class == "io" or self.cost_model.free_threaded else "sequential"
+            if not self.kb.supports(candidate.traversal_type, fallback):
+                fallback = "sequential"
+            rationale += f"; no {strategy} variant for {candidate.traversal_type}, using {fallback}"
+            strategy = fallback
+            granularity = self.cost_model.granularity(strategy, profile)
+        return StrategyDecision(
+            candidate=candidate,
+            strategy=strategy,
+            rationale=rationale,
+            granularity=granularity,
+            work_profile=profile,
+            reductions=reductions,
+        )
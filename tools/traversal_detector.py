@@ -8,21 +8,30 @@ class TraversalDetector:
     """Classifies traversal algorithms using simple structural heuristics."""
 
     def classify_function(self, func: ast.FunctionDef) -> Optional[str]:
-        uses_queue = any(self._is_queue_call(n) for n in ast.walk(func))
-        uses_stack = any(self._is_stack_pattern(n) for n in ast.walk(func))
-        uses_pq = any(self._is_priority_queue(n) for n in ast.walk(func))
+        # Graph generators build adjacency lists with append and would look like DFS.
+        if "generate" in func.name:
+            return None
+        nodes = list(ast.walk(func))
+        uses_queue = any(self._is_queue_call(n) for n in nodes)
+        uses_stack = any(self._is_stack_pattern(n) for n in nodes)
+        uses_pq = any(self._is_priority_queue(n) for n in nodes)
         if uses_pq:
-            return "astar"
+            # A* is told apart from Dijkstra by a heuristic argument or variable.
+            return "astar" if self._has_heuristic(nodes) else "dijkstra"
         if uses_queue:
             return "bfs"
+        if self._is_nested_loop(func) and self._has_relaxation_pattern(nodes):
+            return "bellman_ford"
         if uses_stack or self._is_recursive(func):
             return "dfs"
         return None
 
     def is_safe(self, traversal_type: str, shared_state: list[str], mutable_globals: list[str]) -> bool:
-        if shared_state or mutable_globals:
+        # Uppercase module globals (GRAPH, START_NODE) are treated as constants.
+        dangerous_globals = [g for g in mutable_globals if not g.isupper()]
+        if shared_state or dangerous_globals:
             return False
-        return traversal_type in {"bfs", "dfs", "astar"}
+        return traversal_type in {"bfs", "dfs", "astar", "dijkstra", "bellman_ford"}
 
     def _is_queue_call(self, node: ast.AST) -> bool:
         # Heuristic for BFS: look for deque() creation or popleft usage
@@ -47,3 +56,23 @@ class TraversalDetector:
             if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == func.name:
                 return True
         return False
+
+    def _has_heuristic(self, nodes: list[ast.AST]) -> bool:
+        return any(
+            (isinstance(n, ast.arg) and "heuristic" in n.arg) or (isinstance(n, ast.Name) and "heuristic" in n.id)
+            for n in nodes
+        )
+
+    def _is_nested_loop(self, func: ast.FunctionDef) -> bool:
+        for node in ast.walk(func):
+            if isinstance(node, (ast.For, ast.While)):
+                for child in ast.walk(node):
+                    if child is not node and isinstance(child, (ast.For, ast.While)):
+                        return True
+        return False
+
+    def _has_relaxation_pattern(self, nodes: list[ast.AST]) -> bool:
+        for node in nodes:
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store) and "dist" in node.id:
+                return True
+        return False
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import ast
+from typing import Dict, List, Optional
+
+from core.models import WorkProfile
+from tools.function_splitter import FunctionSplitter
+
+
+class WorkAnalyzer:
+    """Statically estimates the per-node work inside a traversal's main loop.
+
+    Costs are rough orders of magnitude: every AST node executed costs one interpreter step,
+    nested loops multiply by their constant range or an assumed neighbor count, and I/O calls cost their sleep
+    duration when it is a constant or a default latency otherwise.
+    """
+
+    PY_STEP_COST_S = 30e-9
+    ASSUMED_TRIP_COUNT = 8
+    DEFAULT_IO_COST_S = 1e-3
+    TRIVIAL_COST_S = 10e-6
+
+    IO_FUNCTIONS = {"sleep", "open", "urlopen", "input", "select", "getaddrinfo", "create_connection"}
+    IO_METHODS = {
+        "read", "readline", "readlines", "write", "recv", "recvfrom", "send", "sendall", "connect",
+        "accept", "request", "get", "post", "put", "fetch", "fetchone", "fetchall", "execute", "urlopen",
+    }
+    IO_MODULES = {"socket", "requests", "urllib", "http", "subprocess", "os", "shutil", "sqlite3"}
+    # Neighbor lookups such as graph.get(node, []) are dict reads, not I/O.
+    NON_IO_RECEIVERS = {"graph", "distances", "visited", "dist", "cache", "memo", "self"}
+
+    def profile(self, tree: ast.AST, function_name: str) -> Optional[WorkProfile]:
+        func = self._find_function(tree, function_name)
+        if func is None:
+            return None
+        constants = self._constants(tree, func)
+        loop = self._main_loop(func)
+        body = loop.body if loop is not None else func.body
+        io_calls: List[str] = []
+        io_cost, cpu_cost = 0.0, 0.0
+        for stmt in body:
+            io, cpu = self._cost(stmt, 1, constants, io_calls)
+            io_cost += io
+            cpu_cost += cpu
+        if io_cost > 0 and io_cost >= cpu_cost:
+            work_class = "io"
+        elif cpu_cost >= self.TRIVIAL_COST_S:
+            work_class = "cpu"
+        else:
+            work_class = "trivial"
+        work_cost = self._work_cpu_cost(func, constants)
+        return WorkProfile(
+            work_class=work_class,
+            io_cost_s=io_cost,
+            cpu_cost_s=min(work_cost, cpu_cost) if work_cost is not None else cpu_cost,
+            io_calls=sorted(set(io_calls)),
+            loop_lineno=loop.lineno if loop is not None else func.lineno,
+            machinery_cost_s=max(0.0, cpu_cost - work_cost) if work_cost is not None else 0.0,
+        )
+
+    def _work_cpu_cost(self, func: ast.FunctionDef, constants: Dict[str, float]) -> Optional[float]:
+        # The templates rebuild the traversal bookkeeping themselves; only the per-node work
+        # tells whether a node is mostly waiting.
+        split = FunctionSplitter().split_function(func)
+        if split is None or not split.isolated:
+            return None
+        return sum(self._cost(ast.parse(stmt).body[0], 1, constants, [])[1] for stmt in split.visit)
+
+    def _cost(self, node: ast.AST, multiplier: int, constants: Dict[str, float], io_calls: List[str]) -> tuple[float, float]:
+        io_cost = 0.0
+        cpu_cost = self.PY_STEP_COST_S * multiplier
+        if isinstance(node, ast.Call):
+            name = self._call_name(node)
+            if self._is_io_call(node, name):
+                io_calls.append(name)
+                io_cost += self._io_latency(node, name, constants) * multiplier
+        inner = multiplier * self._trip_count(node, constants) if isinstance(node, (ast.For, ast.While)) else multiplier
+        for child in ast.iter_child_nodes(node):
+            # A nested loop's header runs once per outer iteration; only its body repeats.
+            child_multiplier = inner if isinstance(node, (ast.For, ast.While)) and child in node.body else multiplier
+            io, cpu = self._cost(child, child_multiplier, constants, io_calls)
+            io_cost += io
+            cpu_cost += cpu
+        return io_cost, cpu_cost
+
+    def _trip_count(self, loop: ast.AST, constants: Dict[str, float]) -> int:
+        # range() over a known constant is exact; anything else is assumed to walk the neighbors.
+        if isinstance(loop, ast.For) and isinstance(loop.iter, ast.Call) and self._call_name(loop.iter) == "range":
+            bounds = [self._const_eval(arg, constants) for arg in loop.iter.args]
+            if bounds and all(b is not None for b in bounds):
+                start, stop = (0.0, bounds[0]) if len(bounds) == 1 else (bounds[0], bounds[1])
+                return max(1, int(stop - start))
+        return self.ASSUMED_TRIP_COUNT
+
+    def _is_io_call(self, node: ast.Call, name: str) -> bool:
+        parts = name.split(".")
+        if parts[-1] in self.IO_FUNCTIONS and (len(parts) == 1 or parts[0] in self.IO_MODULES | {"time", "asyncio"}):
+            return True
+        if len(parts) > 1 and parts[0] in self.IO_MODULES:
+            return True
+        if isinstance(node.func, ast.Attribute) and parts[-1] in self.IO_METHODS:
+            return parts[0] not in self.NON_IO_RECEIVERS
+        return False
+
+    def _io_latency(self, node: ast.Call, name: str, constants: Dict[str, float]) -> float:
+        if name.split(".")[-1] == "sleep" and node.args:
+            value = self._const_eval(node.args[0], constants)
+            if value is not None:
+                return value
+        return self.DEFAULT_IO_COST_S
+
+    def _const_eval(self, node: ast.AST, constants: Dict[str, float]) -> Optional[float]:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return constants.get(node.id)
+        if isinstance(node, ast.BinOp):
+            left = self._const_eval(node.left, constants)
+            right = self._const_eval(node.right, constants)
+            if left is None or right is None:
+                return None
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Div) and right:
+                return left / right
+        return None
+
+    def _constants(self, tree: ast.AST, func: ast.FunctionDef) -> Dict[str, float]:
+        constants: Dict[str, float] = {}
+        scopes = [tree.body if isinstance(tree, ast.Module) else [], func.body]
+        for body in scopes:
+            for stmt in body:
+                if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+                    value = self._const_eval(stmt.value, constants)
+                    if value is not None:
+                        constants[stmt.targets[0].id] = value
+        return constants
+
+    def _main_loop(self, func: ast.FunctionDef) -> Optional[ast.AST]:
+        # A nested helper that recurses on each node is the loop of a recursive DFS.
+        for node in func.body:
+            if isinstance(node, ast.FunctionDef) and any(
+                isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == node.name for n in ast.walk(node)
+            ):
+                return node
+        for node in ast.walk(func):
+            if isinstance(node, (ast.While, ast.For)):
+                return node
+        return None
+
+    def _find_function(self, tree: ast.AST, function_name: str) -> Optional[ast.FunctionDef]:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.FunctionDef) and node.name == function_name:
+                return node
+        return None
+
+    def _call_name(self, node: ast.Call) -> str:
+        parts = []
+        func = node.func
+        while isinstance(func, ast.Attribute):
+            parts.append(func.attr)
+            func = func.value
+        if isinstance(func, ast.Name):
+            parts.append(func.id)
+        return ".".join(reversed(parts))
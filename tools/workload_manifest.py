@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import pickle
+import random
+import tomllib
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.models import GraphSource, TraversalCandidate, Workload
+
+
+class WorkloadManifest:
+    """Loads TOML/JSON workload manifests that map candidates to named input sets.
+
+    A manifest is a list of ``[[workload]]`` tables. Each one names a candidate, a graph
+    source, the start nodes and goals to query, and optionally the repetitions and an
+    argument template for functions that do not take ``(graph, start)``. The placeholders
+    ``$graph``, ``$start``, ``$goal`` and ``$heuristic`` are substituted in ``args`` and
+    ``kwargs``. ``starts`` may also be an integer N, meaning the graph's first N nodes, and
+    ``batch = true`` issues one call with every start as ``$sources`` against the
+    candidate's multi-source variant.
+    """
+
+    GRAPH_KINDS = ("generator", "random", "edge_list", "binary", "module")
+
+    def __init__(self, workloads: List[Workload]) -> None:
+        self.workloads = workloads
+
+    @classmethod
+    def load(cls, path: Path) -> "WorkloadManifest":
+        if path.suffix == ".toml":
+            with path.open("rb") as fh:
+                data = tomllib.load(fh)
+        else:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        entries = data.get("workload", data.get("workloads", []))
+        return cls([cls._parse_workload(entry, path.parent) for entry in entries])
+
+    def for_candidate(self, candidate: TraversalCandidate) -> List[Workload]:
+        qualified = f"{candidate.file_path.name}::{candidate.function_name}"
+        return [w for w in self.workloads if w.candidate in (candidate.function_name, qualified)]
+
+    @classmethod
+    def _parse_workload(cls, entry: Dict[str, Any], base_dir: Path) -> Workload:
+        graph = dict(entry.get("graph", {}))
+        kinds = [k for k in cls.GRAPH_KINDS if k in graph]
+        if len(kinds) != 1:
+            raise ValueError(f"workload {entry.get('name')!r} needs exactly one graph source of {cls.GRAPH_KINDS}")
+        kind = kinds[0]
+        value = graph[kind]
+        source = GraphSource(
+            kind=kind,
+            seed=graph.get("seed"),
+            weighted=graph.get("weighted"),
+            undirected=bool(graph.get("undirected", False)),
+        )
+        if kind == "generator":
+            source.generator = value
+            source.params = dict(graph.get("params", {}))
+        elif kind == "module":
+            source.generator = value
+        elif kind == "random":
+            source.params = dict(value)
+        else:
+            source.path = (base_dir / value).resolve()
+        starts = entry.get("starts", [entry["start"]] if "start" in entry else [])
+        sample_starts = 0
+        if isinstance(starts, int):
+            sample_starts, starts = starts, []
+        if not starts and not sample_starts:
+            raise ValueError(f"workload {entry.get('name')!r} has no start nodes")
+        return Workload(
+            name=entry.get("name", entry["candidate"]),
+            candidate=entry["candidate"],
+            graph=source,
+            starts=list(starts),
+            goals=list(entry.get("goals", [entry["goal"]] if "goal" in entry else [])),
+            repetitions=int(entry.get("repetitions", 0)),
+            args=list(entry.get("args", [])),
+            kwargs=dict(entry.get("kwargs", {})),
+            heuristic=entry.get("heuristic", ""),
+            sample_starts=sample_starts,
+            batch=bool(entry.get("batch", False)),
+        )
+
+
+class WorkloadBuilder:
+    """Materializes workload graph sources and per-query call arguments inside the sandbox."""
+
+    def build_graph(self, source: GraphSource, module: ModuleType) -> Any:
+        if source.seed is not None:
+            random.seed(source.seed)
+        if source.kind == "generator":
+            generator = getattr(module, source.generator)
+            return generator(**source.params)
+        if source.kind == "module":
+            return getattr(module, source.generator)
+        if source.kind == "random":
+            return self._random_graph(source)
+        if source.kind == "edge_list":
+            return self._read_edge_list(source)
+        with source.path.open("rb") as fh:
+            return pickle.load(fh)
+
+    def starts(self, workload: Workload, graph: Any) -> List[Any]:
+        return list(workload.starts) or list(graph)[: workload.sample_starts]
+
+    def build_calls(self, workload: Workload, graph: Any, module: ModuleType) -> List[Tuple[tuple, dict]]:
+        heuristic = getattr(module, workload.heuristic) if workload.heuristic else None
+        starts = self.starts(workload, graph)
+        if workload.batch:
+            template = workload.args or ["$graph", "$sources"]
+            values = {"$graph": graph, "$sources": starts, "$heuristic": heuristic}
+            args = tuple(values.get(a, a) if isinstance(a, str) else a for a in template)
+            kwargs = {k: values.get(v, v) if isinstance(v, str) else v for k, v in workload.kwargs.items()}
+            return [(args, kwargs)]
+        goals: List[Optional[Any]] = list(workload.goals) or [None]
+        if workload.args:
+            template = workload.args
+        elif workload.goals:
+            template = ["$graph", "$start", "$goal"] + (["$heuristic"] if heuristic else [])
+        else:
+            template = ["$graph", "$start"]
+        calls = []
+        for start in starts:
+            for goal in goals:
+                # `$sources` in a per-start call is the one-source batch, for timing a batched variant per start.
+                values = {"$graph": graph, "$start": start, "$sources": [start], "$goal": goal, "$heuristic": heuristic}
+                args = tuple(values.get(a, a) if isinstance(a, str) else a for a in template)
+                kwargs = {k: values.get(v, v) if isinstance(v, str) else v for k, v in workload.kwargs.items()}
+                calls.append((args, kwargs))
+        return calls
+
+    def _random_graph(self, source: GraphSource) -> Dict[str, Any]:
+        params = source.params
+        nodes = int(params.get("nodes", 100))
+        avg_degree = int(params.get("avg_degree", 4))
+        max_weight = int(params.get("max_weight", 10))
+        weighted = bool(source.weighted)
+        graph: Dict[str, Any] = {str(i): ({} if weighted else []) for i in range(nodes)}
+        for i in range(nodes):
+            # A chain edge keeps every node reachable from "0", like the example generators.
+            targets = ([i + 1] if i + 1 < nodes else []) + [random.randrange(nodes) for _ in range(avg_degree)]
+            for j in targets:
+                if j != i:
+                    weight = random.randint(1, max_weight)
+                    self._add_edge(graph, str(i), str(j), weight, weighted)
+                    if source.undirected:
+                        self._add_edge(graph, str(j), str(i), weight, weighted)
+        return graph
+
+    def _read_edge_list(self, source: GraphSource) -> Dict[str, Any]:
+        rows = []
+        for line in source.path.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                rows.append(line.split())
+        weighted = source.weighted if source.weighted is not None else any(len(r) > 2 for r in rows)
+        graph: Dict[str, Any] = {}
+        for row in rows:
+            u, v = row[0], row[1]
+            weight = float(row[2]) if len(row) > 2 else 1.0
+            for node in (u, v):
+                graph.setdefault(node, {} if weighted else [])
+            self._add_edge(graph, u, v, weight, weighted)
+            if source.undirected:
+                self._add_edge(graph, v, u, weight, weighted)
+        return graph
+
+    def _add_edge(self, graph: Dict[str, Any], u: str, v: str, weight: float, weighted: bool) -> None:
+        if weighted:
+            graph[u][v] = weight
+        elif v not in graph[u]:
+            graph[u].append(v)